@@ -2,12 +2,19 @@ import pandas as pd
 import google.generativeai as genai
 from openai import OpenAI
 from collections import Counter
+import argparse
+import asyncio
+import hashlib
 import time
 import json
 import re
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
+from annotation_cache import ProgressLog, ResponseCache
+from near_duplicates import cluster_descriptions, estimate_tokens, pack_batches
+
 # --- CONFIGURATION ---
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -16,23 +23,54 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # --- PATHS ---
 INPUT_CSV = "data/episode_descriptions_for_annotation.csv"
 OUTPUT_CSV = "data/radio_programs_annotated-ai.csv"
+CACHE_DIR = "data/.annotation_cache"  # model answers, shared by every run
 
 DESCRIPTION_COLUMN = "episodeDescription"
-BATCH_SIZE = 10
+BATCH_TOKENS = 2000  # estimated tokens of descriptions per request (the prompt comes on top)
+NEAR_DUPLICATE_THRESHOLD = 0.8  # descriptions this similar are sent once, see near_duplicates.py
+MAX_IN_FLIGHT = 4  # batches sent before the first one has to come back
+
+# --- RATE LIMITS ---
+# Requests per minute each model may receive (the free tiers); set e.g. GEMINI_FLASH_RPM to
+# use a paid quota. Every model gets its own token bucket, so a slow or strict one does not
+# hold back the others.
+GEMINI_FLASH_RPM = float(os.getenv("GEMINI_FLASH_RPM", 10))
+GEMINI_PRO_RPM = float(os.getenv("GEMINI_PRO_RPM", 15))
+OPENAI_RPM = float(os.getenv("OPENAI_RPM", 3))
 
 # --- MODEL SETUP ---
-genai.configure(api_key=GEMINI_API_KEY)
+GEMINI_FLASH_MODEL = 'gemini-2.5-flash'
+GEMINI_PRO_MODEL = 'gemini-2.0-flash'
+OPENAI_MODEL = 'gpt-5-mini'
 
 # Model 1
-gemini_flash = genai.GenerativeModel(
-    'gemini-2.5-flash', generation_config={"response_mime_type": "application/json"})
-
+gemini_flash = None
 # Model 2
-gemini_pro = genai.GenerativeModel(
-    'gemini-2.0-flash', generation_config={"response_mime_type": "application/json"})
-
+gemini_pro = None
 # Model 3
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+openai_client = None
+
+
+def configure_models(gemini_endpoint=None, openai_base_url=None):
+    """
+    Creates the three model clients. The endpoints default to the real APIs; pointing them at
+    scripts/benchmarks/model_stub.py runs the annotator without API keys.
+    """
+    global gemini_flash, gemini_pro, openai_client
+    if gemini_endpoint:
+        # the REST transport is the one that can talk to a plain http:// endpoint
+        genai.configure(api_key=GEMINI_API_KEY or "stub", transport="rest",
+                        client_options={"api_endpoint": gemini_endpoint})
+    else:
+        genai.configure(api_key=GEMINI_API_KEY)
+
+    gemini_flash = genai.GenerativeModel(
+        GEMINI_FLASH_MODEL, generation_config={"response_mime_type": "application/json"})
+    gemini_pro = genai.GenerativeModel(
+        GEMINI_PRO_MODEL, generation_config={"response_mime_type": "application/json"})
+    # retries are done here, where the rate limiter knows about them
+    openai_client = OpenAI(api_key=OPENAI_API_KEY or ("stub" if openai_base_url else None),
+                           base_url=openai_base_url, max_retries=0)
 
 # --- PROMPT ---
 SYSTEM_PROMPT = """
@@ -69,6 +107,8 @@ Output:
   "ex3": "None"
 }
 """
+# cached answers are only reused for the prompt they were given with
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
 
 # --- HELPER FUNCTIONS ---
 
@@ -82,29 +122,111 @@ def clean_json_string(text):
     return text
 
 
-def ask_with_retry(func_name, func, *args, max_retries=3, initial_wait=20):
+class TokenBucket:
     """
-    Tries to execute an API function. If it fails, waits and tries again.
-    Useful for handling 429 Rate Limit errors.
+    Asyncio token bucket allowing rpm requests per minute, spread evenly over the minute.
+    Waiters are served in order. backoff() makes everyone wait out a rate limit answer.
+    """
+
+    def __init__(self, rpm, burst=1):
+        self.rate = rpm / 60
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def backoff(self, seconds):
+        # a negative balance holds back every request to this model, not just the one that failed
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+def retry_after_seconds(error):
+    """
+    How long the API asked us to wait, or None: the Retry-After header of the failed response,
+    else a "retry in 41.7s" hint in the error message (Gemini puts it there).
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    m = re.search(r"retry in (\d+(?:\.\d+)?)\s*s", str(error), re.IGNORECASE)
+    return float(m.group(1)) if m else None
+
+
+class Provider:
+    """
+    One model: how to call it, where its answers go and how fast it may be called.
+
+    name -- shown in the log
+    model -- the model's API name, part of the cache key
+    column -- the prediction column its answers go into
+    call -- blocking function taking the {ID: description} batch and returning {ID: host}
+    rpm -- requests per minute allowed
+    initial_wait -- first wait after an error without a Retry-After, doubled on every retry
+    """
+
+    def __init__(self, name, model, column, call, rpm, initial_wait):
+        self.name = name
+        self.model = model
+        self.column = column
+        self.call = call
+        self.rpm = rpm
+        self.initial_wait = initial_wait
+        self.bucket = TokenBucket(rpm)
+        # requests sent and seconds spent waiting for answers, for the report at the end
+        self.calls = 0
+        self.seconds = 0.0
+
+
+async def ask_with_retry(provider, batch_dict, max_retries=3):
+    """
+    Asks one model about a batch, waiting for its rate limiter first. On an error the wait the
+    API asked for (Retry-After) is honoured, otherwise the wait doubles on every attempt.
+    Returns an empty dict if every attempt failed.
     """
     for attempt in range(max_retries):
+        await provider.bucket.acquire()
+        provider.calls += 1
+        t0 = time.perf_counter()
         try:
-            return func(*args)
+            # the SDKs are blocking, so every call gets a thread of its own
+            return await asyncio.to_thread(provider.call, batch_dict)
         except Exception as e:
-            error_msg = str(e)
             print(
-                f"  Warning: {func_name} failed (Attempt {attempt + 1}/{max_retries}). Error: {error_msg}")
+                f"  Warning: {provider.name} failed (Attempt {attempt + 1}/{max_retries}). Error: {e}")
 
             # If it's the last attempt, return empty dict
             if attempt == max_retries - 1:
                 print(
-                    f"  Error: {func_name} gave up after {max_retries} attempts.")
+                    f"  Error: {provider.name} gave up after {max_retries} attempts.")
                 return {}
 
-            # Wait before retrying (exponential backoff: 20s, 40s...)
-            wait_time = initial_wait * (attempt + 1)
-            print(f"  Waiting {wait_time} seconds before retrying...")
-            time.sleep(wait_time)
+            wait_time = retry_after_seconds(e)
+            if wait_time is None:
+                wait_time = provider.initial_wait * 2 ** attempt
+            print(f"  {provider.name} waits {wait_time:.0f} seconds before retrying...")
+            provider.bucket.backoff(wait_time)
+        finally:
+            provider.seconds += time.perf_counter() - t0
 
     return {}
 
@@ -115,24 +237,16 @@ def _call_gemini_flash(batch_dict):
     return json.loads(clean_json_string(response.text))
 
 
-def ask_gemini_flash_batch(batch_dict):
-    return ask_with_retry("Gemini Flash", _call_gemini_flash, batch_dict, initial_wait=5)
-
-
 def _call_gemini_pro(batch_dict):
     prompt = f"{SYSTEM_PROMPT}\n\nInput Data:\n{json.dumps(batch_dict)}"
     response = gemini_pro.generate_content(prompt)
     return json.loads(clean_json_string(response.text))
 
 
-def ask_gemini_pro_batch(batch_dict):
-    return ask_with_retry("Gemini Pro", _call_gemini_pro, batch_dict, initial_wait=10)
-
-
 def _call_openai(batch_dict):
     prompt = f"Input Data:\n{json.dumps(batch_dict)}"
     response = openai_client.chat.completions.create(
-        model="gpt-5-mini",
+        model=OPENAI_MODEL,
         response_format={"type": "json_object"},
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -142,9 +256,17 @@ def _call_openai(batch_dict):
     return json.loads(response.choices[0].message.content)
 
 
-def ask_openai_batch(batch_dict):
-    # GPT-4o-mini free tier is strict, so we start with a higher wait time
-    return ask_with_retry("OpenAI", _call_openai, batch_dict, initial_wait=20)
+def get_providers():
+    """ The three models, in the order of the model1pred, model2pred and model3pred columns.
+    The cheaper, faster Gemini models come first: they are the ones the cascade asks first """
+    return [
+        Provider("Gemini Flash", GEMINI_FLASH_MODEL, "model1pred", _call_gemini_flash, GEMINI_FLASH_RPM,
+                 initial_wait=5),
+        Provider("Gemini Pro", GEMINI_PRO_MODEL, "model2pred", _call_gemini_pro, GEMINI_PRO_RPM,
+                 initial_wait=10),
+        # the OpenAI free tier is strict, so we start with a higher wait time
+        Provider("OpenAI", OPENAI_MODEL, "model3pred", _call_openai, OPENAI_RPM, initial_wait=20),
+    ]
 
 
 def get_majority_vote(preds):
@@ -155,17 +277,125 @@ def get_majority_vote(preds):
     counts = Counter(clean_preds)
     return counts.most_common(1)[0][0]
 
-# --- MAIN EXECUTION ---
 
+def predictions_agree(preds):
+    """
+    True if every prediction is the same real answer (not empty, not "Error"). When more than
+    half of the models agree like this, the other models can't change the majority vote.
+    """
+    clean_preds = [str(p).strip() for p in preds if p is not None]
+    return (len(clean_preds) == len(preds) and clean_preds[0] not in ("", "Error")
+            and all(p == clean_preds[0] for p in clean_preds))
 
-def main():
-    print(f"Reading CSV from {INPUT_CSV}...")
+
+async def ask_cached(provider, batch_dict, cache=None):
+    """
+    Like ask_with_retry, but descriptions the model already answered with the current prompt
+    come from the cache and only the others are sent. New answers are added to the cache.
+    """
+    if cache is None:
+        return await ask_with_retry(provider, batch_dict)
+    answers, missing = {}, {}
+    for row_id, description in batch_dict.items():
+        answer = cache.get(provider.model, PROMPT_VERSION, description)
+        if answer is None:
+            missing[row_id] = description
+        else:
+            answers[row_id] = answer
+    if missing:
+        result = await ask_with_retry(provider, missing)
+        fresh = {row_id: result[row_id] for row_id in missing if row_id in result}
+        cache.put(provider.model, PROMPT_VERSION, {missing[row_id]: answer for row_id, answer in fresh.items()})
+        answers.update(fresh)
+    return answers
+
+
+async def annotate_batches(batches, providers, max_in_flight=MAX_IN_FLIGHT, cache=None, cascade=False,
+                           batch_tokens=BATCH_TOKENS):
+    """
+    Asks every provider about every batch. The providers of a batch are asked at the same time
+    and up to max_in_flight batches are in progress, so the only waiting is what the rate
+    limits require.
+
+    With cascade, only the first majority of the providers (two of three) is asked about the
+    batches. The IDs those did not agree on (or failed) are collected into new requests of up
+    to batch_tokens for the other providers, so the majority vote comes out the same as if
+    every provider had been asked.
+
+    batches -- list of {ID: description} payloads
+    providers -- see get_providers, the cheapest first
+    cache -- optional ResponseCache, see ask_cached
+
+    yields (IDs, [results of each provider], [IDs each provider was asked about]) as the
+    answers come in, not in order
+    """
+    first = len(providers) // 2 + 1 if cascade else len(providers)
+    head, rest = providers[:first], providers[first:]
+    semaphores = asyncio.Semaphore(max_in_flight), asyncio.Semaphore(max_in_flight)
+
+    async def run(stage, payload):
+        async with semaphores[stage]:
+            return payload, await asyncio.gather(
+                *(ask_cached(provider, payload, cache) for provider in (rest if stage else head)))
+
+    tasks = [asyncio.create_task(run(0, payload)) for payload in batches]
+    followups = []
     try:
-        df = pd.read_csv(INPUT_CSV)
-    except FileNotFoundError:
-        print(f"Error: Could not find file at {INPUT_CSV}")
-        return
+        unsettled, head_answers, used = {}, {}, 0
+        for task in asyncio.as_completed(tasks):
+            payload, results = await task
+            settled = []
+            for row_id, description in payload.items():
+                answers = [result.get(row_id, "Error") for result in results]
+                if not rest or predictions_agree(answers):
+                    settled.append(row_id)
+                    continue
+                # send the IDs left over by several batches together
+                cost = estimate_tokens(description) + 8
+                if unsettled and used + cost > batch_tokens:
+                    followups.append(asyncio.create_task(run(1, unsettled)))
+                    unsettled, used = {}, 0
+                unsettled[row_id] = description
+                head_answers[row_id] = answers
+                used += cost
+            if settled:
+                yield settled, results + [{} for _ in rest], [set(settled)] * first + [set()] * len(rest)
+        if unsettled:
+            followups.append(asyncio.create_task(run(1, unsettled)))
+
+        for task in asyncio.as_completed(followups):
+            payload, results = await task
+            head_results = [{row_id: head_answers[row_id][k] for row_id in payload} for k in range(first)]
+            yield list(payload), head_results + results, [set(payload)] * len(providers)
+    finally:
+        for task in tasks + followups:
+            task.cancel()
+
+
+def save_results(df, output_csv):
+    # Clean up tracking ID before saving; the file is replaced only once it is complete
+    tmp = Path(f"{output_csv}.tmp")
+    df.drop(columns=['temp_id']).to_csv(tmp, index=False, escapechar='\\')
+    os.replace(tmp, output_csv)
+
+# --- MAIN EXECUTION ---
 
+
+async def annotate(df, output_csv, providers, max_in_flight=MAX_IN_FLIGHT, cache=None, progress=None,
+                   batch_tokens=BATCH_TOKENS, near_duplicate_threshold=NEAR_DUPLICATE_THRESHOLD,
+                   cascade=False):
+    """
+    Adds a prediction column per provider, their majority vote (selectedpred) and the
+    columns of the models that were asked (consulted) to df and writes it to output_csv.
+
+    cache -- optional ResponseCache: descriptions a model already answered are not sent again
+    progress -- optional ProgressLog: rows logged there are taken from it, every finished
+                batch is appended to it, so a stopped run picks up where it was
+    batch_tokens -- estimated tokens of descriptions per request
+    near_duplicate_threshold -- near-duplicate descriptions are sent once and share the
+                                answer (see cluster_descriptions); None sends every description
+    cascade -- ask the last provider only where the others disagree (see annotate_batches)
+    """
     # Check if 'id' column exists, if not create a temporary one for tracking
     if 'id' not in df.columns:
         df['temp_id'] = df.index.astype(str)
@@ -173,79 +403,131 @@ def main():
         df['temp_id'] = df['id'].astype(str)
 
     # Initialize result columns
-    df['model1pred'] = ""
-    df['model2pred'] = ""
-    df['model3pred'] = ""
-    df['selectedpred'] = ""  # Majority Vote
+    # selectedpred: Majority Vote, consulted: the models asked about the row
+    pred_columns = [provider.column for provider in providers] + ['selectedpred', 'consulted']
+    for column in pred_columns:
+        df[column] = ""
+    positions = [df.columns.get_loc(column) for column in pred_columns]
 
     rows = df.to_dict('records')
     total_rows = len(rows)
 
-    print(f"Processing {total_rows} rows in batches of {BATCH_SIZE}...")
-
-    for i in range(0, total_rows, BATCH_SIZE):
-        batch = rows[i:i + BATCH_SIZE]
-        print(f"Processing batch {i} to {min(i + BATCH_SIZE, total_rows)}...")
-
-        # Create input payload: {ID: episodeDescription}
-        input_payload = {
-            row['temp_id']: row[DESCRIPTION_COLUMN]
-            for row in batch
-            if pd.notna(row.get(DESCRIPTION_COLUMN))
-        }
-
-        if not input_payload:
+    # rows already finished by an earlier run
+    resumed = 0
+    todo = []
+    for pos, row in enumerate(rows):
+        description = row.get(DESCRIPTION_COLUMN)
+        if pd.isna(description):
+            # nothing to ask the models about
+            for at in positions[:-1]:
+                df.iat[pos, at] = "Error"
             continue
-
-        # Call APIs
-        # Note: The retry logic inside these functions handles the waiting if errors occur
-        flash_results = ask_gemini_flash_batch(input_payload)
-        pro_results = ask_gemini_pro_batch(input_payload)
-        openai_results = ask_openai_batch(input_payload)
-
-        for row in batch:
-            row_id = row['temp_id']
-            row_idx = df.index[df['temp_id'] == row_id].tolist()[0]
-
-            f_val = flash_results.get(row_id, "Error")
-            p_val = pro_results.get(row_id, "Error")
-            o_val = openai_results.get(row_id, "Error")
-
-            # Store in the new column names
-            df.at[row_idx, 'model1pred'] = f_val
-            df.at[row_idx, 'model2pred'] = p_val
-            df.at[row_idx, 'model3pred'] = o_val
-
+        logged = progress.get(row['temp_id'], description) if progress is not None else None
+        if logged is None:
+            todo.append(pos)
+            continue
+        for column, at in zip(pred_columns, positions):
+            df.iat[pos, at] = logged.get(column, "")
+        resumed += 1
+
+    # one representative per group of near-duplicates is sent, its answer goes to the whole group
+    descriptions = [rows[pos][DESCRIPTION_COLUMN] for pos in todo]
+    if near_duplicate_threshold is None:
+        groups = list(range(len(todo)))
+    else:
+        groups = cluster_descriptions(descriptions, near_duplicate_threshold)
+    members = {}
+    for pos, group in zip(todo, groups):
+        members.setdefault(todo[group], []).append(pos)
+    representatives = list(members)
+    by_id = {rows[pos]['temp_id']: pos for pos in representatives}
+
+    batches = []
+    for batch in pack_batches([rows[pos][DESCRIPTION_COLUMN] for pos in representatives], batch_tokens):
+        # Create input payload: {ID: episodeDescription}
+        input_payload = {rows[representatives[i]]['temp_id']: rows[representatives[i]][DESCRIPTION_COLUMN]
+                         for i in batch}
+        batches.append(input_payload)
+
+    print(f"Processing {total_rows} rows: {resumed} done in an earlier run, {len(todo)} left, "
+          f"{len(representatives)} after grouping near-duplicates, in {len(batches)} requests "
+          f"of up to {batch_tokens} tokens, up to {max_in_flight} at a time...")
+
+    done = 0
+    async for row_ids, results, asked in annotate_batches(batches, providers, max_in_flight, cache, cascade,
+                                                          batch_tokens):
+        finished = []
+        for row_id in row_ids:
+            representative = by_id[row_id]
+            consulted = [k for k in range(len(providers)) if row_id in asked[k]]
+            preds = [results[k].get(row_id, "Error") if k in consulted else "" for k in range(len(providers))]
             # Vote
-            df.at[row_idx, 'selectedpred'] = get_majority_vote(
-                [f_val, p_val, o_val])
+            preds.append(get_majority_vote([preds[k] for k in consulted]))
+            preds.append(",".join(providers[k].column for k in consulted))
+            for pos in members[representative]:
+                for at, pred in zip(positions, preds):
+                    df.iat[pos, at] = pred
+                # rows with an error are left out of the log, so the next run asks again
+                if all(preds[k] != "Error" for k in consulted):
+                    finished.append((rows[pos]['temp_id'], rows[pos][DESCRIPTION_COLUMN],
+                                     dict(zip(pred_columns, preds))))
+
+        done += len(row_ids)
+        print(f"{done}/{len(representatives)} descriptions done.")
 
         # --- PROGRESS SAVE ---
-        # We save after EVERY batch so we never lose data again.
-        try:
-            temp_df = df.copy()
-            if 'temp_id' in temp_df.columns and 'id' not in temp_df.columns:
-                temp_df.drop(columns=['temp_id'], inplace=True)
-            elif 'temp_id' in temp_df.columns:
-                temp_df.drop(columns=['temp_id'], inplace=True)
-
-            temp_df.to_csv(OUTPUT_CSV, index=False, escapechar='\\')
-            print("  Progress saved.")
-        except Exception as e:
-            print(f"  Warning: Could not save progress: {e}")
+        # One append per batch, so we never lose data again.
+        if progress is not None:
+            try:
+                progress.mark(finished)
+            except OSError as e:
+                print(f"  Warning: Could not save progress: {e}")
+
+    for provider in providers:
+        print(f"{provider.name}: {provider.calls} requests, {provider.seconds:.0f}s waiting for answers")
+    print("Final save...")
+    save_results(df, output_csv)
+    return df.drop(columns=['temp_id'])
 
-        print("Sleeping 21s to respect strict API rate limits...")
-        time.sleep(21)
 
-    print("Final save...")
-    # Clean up tracking ID before final save
-    if 'temp_id' in df.columns and 'id' not in df.columns:
-        df.drop(columns=['temp_id'], inplace=True)
-    elif 'temp_id' in df.columns:
-        df.drop(columns=['temp_id'], inplace=True)
-
-    df.to_csv(OUTPUT_CSV, index=False, escapechar='\\')
-    print(f"Done! Results saved to {OUTPUT_CSV}")
+def main():
+    ap = argparse.ArgumentParser(description="Find the hosts in episode descriptions with three AI models")
+    ap.add_argument("--input", default=INPUT_CSV)
+    ap.add_argument("--output", default=OUTPUT_CSV)
+    ap.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT,
+                    help="Batches in progress at the same time")
+    ap.add_argument("--batch-tokens", type=int, default=BATCH_TOKENS,
+                    help="Estimated tokens of descriptions per request")
+    ap.add_argument("--near-duplicates", type=float, default=NEAR_DUPLICATE_THRESHOLD,
+                    help="Similarity (0-1) at which descriptions are sent once for the whole group")
+    ap.add_argument("--no-grouping", action="store_true", help="Send every description, even near-duplicates")
+    ap.add_argument("--cascade", action="store_true",
+                    help="Ask OpenAI only about the descriptions the two Gemini models disagree on")
+    ap.add_argument("--cache-dir", default=CACHE_DIR, help="Where model answers are cached")
+    ap.add_argument("--no-cache", action="store_true", help="Ask the models about every description")
+    ap.add_argument("--restart", action="store_true",
+                    help="Ignore the progress log of the output file and annotate every row again")
+    ap.add_argument("--gemini-endpoint", help="Gemini API endpoint, e.g. a local model_stub.py")
+    ap.add_argument("--openai-base-url", help="OpenAI API base URL, e.g. http://127.0.0.1:8000/v1")
+    args = ap.parse_args()
+
+    print(f"Reading CSV from {args.input}...")
+    try:
+        df = pd.read_csv(args.input)
+    except FileNotFoundError:
+        print(f"Error: Could not find file at {args.input}")
+        return
+
+    cache = None if args.no_cache else ResponseCache(Path(args.cache_dir) / "responses.jsonl")
+    # the log belongs to the output file: data/x.csv is logged in data/x.progress.jsonl
+    progress = ProgressLog(Path(args.output).with_suffix(".progress.jsonl"), load=not args.restart)
+
+    configure_models(args.gemini_endpoint, args.openai_base_url)
+    t0 = time.perf_counter()
+    asyncio.run(annotate(df, args.output, get_providers(), args.max_in_flight, cache, progress,
+                         args.batch_tokens, None if args.no_grouping else args.near_duplicates,
+                         args.cascade))
+    print(f"Done in {time.perf_counter() - t0:.0f}s! Results saved to {args.output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+"""
+On-disk response cache and progress log used by AI_annotation.py.
+
+The response cache keeps every answer a model gave, keyed by (model, prompt version, hash of
+the description), so a rerun only asks about descriptions the model has not seen with the
+current prompt. The progress log records finished rows (ID, description hash and all
+predictions); rows listed there are not annotated again. Both are append-only JSONL files:
+saving a batch costs one small append instead of rewriting the whole output.
+"""
+import hashlib
+import json
+import time
+from pathlib import Path
+
+
+def text_hash(text):
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # a torn last line from a crash
+
+
+def _append_jsonl(path, entries):
+    if not entries:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+
+
+class ResponseCache:
+    """
+    Model answers per description.
+
+    path -- the JSONL file, created on the first answer
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.answers = {}
+        if self.path.exists():
+            for e in _read_jsonl(self.path):
+                self.answers[(e["model"], e["prompt"], e["description"])] = e["answer"]
+
+    def __len__(self):
+        return len(self.answers)
+
+    def get(self, model, prompt_version, description):
+        """ Returns the cached answer, or None """
+        return self.answers.get((model, prompt_version, text_hash(description)))
+
+    def put(self, model, prompt_version, answers):
+        """ Stores {description: answer} for one model and prompt version """
+        entries = []
+        for description, answer in answers.items():
+            key = (model, prompt_version, text_hash(description))
+            if self.answers.get(key) != answer:
+                self.answers[key] = answer
+                entries.append({"model": model, "prompt": prompt_version, "description": key[2],
+                                "answer": answer, "at": time.time()})
+        _append_jsonl(self.path, entries)
+
+
+class ProgressLog:
+    """
+    Rows of one output file that are fully annotated, by ID.
+
+    path -- the JSONL file, created on the first finished batch
+    load -- False starts from an empty log (a fresh run) but keeps appending
+    """
+
+    def __init__(self, path, load=True):
+        self.path = Path(path)
+        self.done = {}
+        if load and self.path.exists():
+            for e in _read_jsonl(self.path):
+                self.done[e["id"]] = e
+
+    def __len__(self):
+        return len(self.done)
+
+    def get(self, row_id, description):
+        """ Returns the predictions logged for this ID, or None if there are none for this description """
+        entry = self.done.get(row_id)
+        if entry is None or entry["description"] != text_hash(description):
+            return None
+        return entry["preds"]
+
+    def mark(self, rows):
+        """ Logs (ID, description, {column: prediction}) triples as done """
+        entries = [{"id": row_id, "description": text_hash(description), "preds": preds, "at": time.time()}
+                   for row_id, description, preds in rows]
+        _append_jsonl(self.path, entries)
+        for entry in entries:
+            self.done[entry["id"]] = entry
@@ -0,0 +1,75 @@
+"""
+Regex host extraction for episode descriptions ("Vært: Mo", "værter Oliver Seppo og Thomas
+Bugge!"), used by extracting_host_from_description.ipynb.
+
+Play tables repeat the same description on every track of an episode, so hosts are extracted
+once per distinct description and mapped back onto the rows.
+
+The pattern is built so every character can only be matched one way (names are capitalised
+words, separators are ',', '&' or 'og'), so it runs in linear time instead of backtracking on
+long descriptions. It handles the cases the first notebook version missed, see KNOWN_CASES.
+"""
+import functools
+import re
+
+# a capitalised word, e.g. "Mo", "Hjortshøj", "Aden-Hansen"
+WORD = r"[A-ZÆØÅ][a-zæøåA-ZÆØÅéü'\-]*"
+# a name is one to four capitalised words
+NAME = rf"{WORD}(?: {WORD}){{0,3}}"
+SEPARATOR = r"\s*(?:,|&|\bog\b)\s*"
+HOST_RE = re.compile(
+    # "Vært", "Værter" or "Vaert" as a word of its own, not e.g. "TV-Vært"
+    r"(?<![\w\-])[Vv](?:æ|ae)rt(?:er)?\b"
+    r"[:,]?\s*\(?\s*"
+    rf"(?P<hosts>{NAME}(?:{SEPARATOR}{NAME})*)"
+)
+SPLIT_RE = re.compile(SEPARATOR)
+
+# (description, expected hosts) that the first notebook version got wrong
+KNOWN_CASES = [
+    ("Vært: Julie Rahbek", "Julie Rahbek"),
+    ("Vært: Frederik Birch", "Frederik Birch"),
+    ("værter Thomas Bugge og Oliver Seppo", "Thomas Bugge, Oliver Seppo"),
+    ("værter Oliver Seppo og Thomas Bugge!", "Oliver Seppo, Thomas Bugge"),
+    ("værter (Oliver Seppo og Thomas Bugge), ", "Oliver Seppo, Thomas Bugge"),
+    ("værter, Andrew Moyo og Mo, ", "Andrew Moyo, Mo"),
+    ("Værter: Nikkie Niyibigira & Laila Aden Hjortshøj", "Nikkie Niyibigira, Laila Aden Hjortshøj"),
+    ("værter, Oliver Seppo og Thomas Bugge, Chris Anker", "Oliver Seppo, Thomas Bugge, Chris Anker"),
+    ("Værter: Mathilde Muus og Anton Ringdal", "Mathilde Muus, Anton Ringdal"),
+    ("Værter: Liva Manghezi, Lasse Knudsen og Andreas Kousholt", "Liva Manghezi, Lasse Knudsen, Andreas Kousholt"),
+    # a spelling mistake in a description, "TV-Vært" is not a host cue
+    ("TV-Vært og Melodi Grand Prix", None),
+]
+
+
+def extract_hosts(description):
+    """
+    Returns the hosts named after the first "Vært"/"Værter" in a description, comma
+    separated ("Mo, Laila"), or None.
+    """
+    if not isinstance(description, str):
+        return None
+    return _extract_hosts(description)
+
+
+@functools.lru_cache(maxsize=100_000)
+def _extract_hosts(description):
+    for m in HOST_RE.finditer(description):
+        names = [name for name in SPLIT_RE.split(m.group("hosts")) if name]
+        if names:
+            return ", ".join(names)
+    return None
+
+
+def add_hosts(df, description_column="episodeDescription", host_column="hosts"):
+    """
+    Adds host_column with the hosts of every row's description (see extract_hosts), running
+    the regex once per distinct description.
+
+    df -- a play or episode table
+    returns df
+    """
+    descriptions = df[description_column]
+    hosts = {description: extract_hosts(description) for description in descriptions.dropna().unique()}
+    df[host_column] = descriptions.map(hosts)
+    return df
@@ -0,0 +1,123 @@
+"""
+Pre-stage of AI_annotation.py: groups near-duplicate episode descriptions so only one of each
+group is sent to the models, and packs the descriptions that are sent into requests by an
+estimated token budget instead of a fixed count.
+
+Recurring shows reuse their blurb with another date or guest, so the input (already free of
+exact duplicates) still has many descriptions that would get the same answer. They are found
+with MinHash over word shingles: every description gets a short signature, and descriptions
+whose signatures agree in one band are compared, so the work grows with the number of
+descriptions and not with the number of pairs.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+WORD_RE = re.compile(r"\w+")
+DIGITS_RE = re.compile(r"\d")
+# the words after these are the host, see SYSTEM_PROMPT in AI_annotation.py
+HOST_CUE_RE = re.compile(r"\b(?:Vært|Værter|Med|Præsenteret af|Styret af)\b[:\s]+((?:[A-ZÆØÅ][\w\-]*[\s,&]*(?:og\s+)?)+)")
+
+NUM_PERM = 64
+BANDS = 16
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingles(text, k=3):
+    """ Returns the set of k-word shingles of a description. Digits count as 0, so dates and
+    episode numbers don't make two descriptions different """
+    words = WORD_RE.findall(DIGITS_RE.sub("0", str(text).lower()))
+    if len(words) < k:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def host_cues(text):
+    """ Returns the names following host keywords ("Vært: ...") in a description, as a tuple """
+    return tuple(m.group(1).strip(" ,&") for m in HOST_CUE_RE.finditer(str(text)))
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, seed=1):
+    """ Returns a (len(texts), num_perm) array of MinHash signatures of the texts' shingles """
+    rnd = np.random.default_rng(seed)
+    # a * x + b stays below 2**61 for 32-bit x, so uint64 never overflows
+    a = rnd.integers(1, 1 << 29, size=num_perm, dtype=np.uint64)
+    b = rnd.integers(0, 1 << 29, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        x = np.fromiter((int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+                         for s in shingles(text)), dtype=np.uint64)
+        signatures[i] = ((np.outer(a, x) + b[:, None]) % MERSENNE_PRIME).min(axis=1)
+    return signatures
+
+
+def cluster_descriptions(texts, threshold=0.8, num_perm=NUM_PERM, bands=BANDS):
+    """
+    Groups near-duplicate descriptions.
+
+    Two descriptions are near-duplicates if the estimated Jaccard similarity of their
+    shingles is at least threshold and they name the same hosts after a host keyword, so a
+    recurring show that changed host is not merged with its old episodes.
+
+    texts -- the descriptions
+    threshold -- minimum estimated Jaccard similarity (0-1)
+
+    returns a list with, for every description, the index of its group's representative
+    (the first description of the group)
+    """
+    n = len(texts)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    if n < 2:
+        return parent
+    signatures = minhash_signatures(texts, num_perm)
+    cues = [host_cues(text) for text in texts]
+    rows = num_perm // bands
+    for band in range(bands):
+        buckets = {}
+        for i, key in enumerate(map(bytes, signatures[:, band * rows:(band + 1) * rows])):
+            head = buckets.setdefault(key, i)
+            if head == i or cues[i] != cues[head]:
+                continue
+            # compared with the bucket's first description only, other bands catch the rest
+            if (signatures[i] == signatures[head]).mean() >= threshold:
+                ri, rh = find(i), find(head)
+                if ri != rh:
+                    parent[max(ri, rh)] = min(ri, rh)
+    return [find(i) for i in range(n)]
+
+
+def estimate_tokens(text):
+    """ Rough token count of a text (about 4 characters per token), to avoid a tokenizer dependency """
+    return len(str(text)) // 4 + 1
+
+
+def pack_batches(texts, max_tokens, item_overhead=8):
+    """
+    Splits texts into consecutive batches whose estimated tokens stay within max_tokens.
+    A text over the budget on its own gets a batch of its own.
+
+    texts -- the descriptions, in the order they should be sent
+    max_tokens -- token budget of the input data of one request
+    item_overhead -- tokens per description for its ID and the JSON around it
+
+    returns a list of lists of indexes into texts
+    """
+    batches, current, used = [], [], 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text) + item_overhead
+        if current and used + cost > max_tokens:
+            batches.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
@@ -1,4 +1,5 @@
 import pandas as pd
+import argparse
 import os
 import re
 
@@ -8,6 +9,8 @@ MANUAL_FILE = "data/enriched_with_hosts/Host_manual_annotation-validation.csv"
 
 MANUAL_HOST_COLUMN = "host"
 AI_HOST_COLUMN = "selectedpred"
+# the answer of every model and the vote, scored side by side
+PRED_COLUMNS = ["model1pred", "model2pred", "model3pred", "selectedpred"]
 
 
 def normalize_names(text):
@@ -43,79 +46,129 @@ def normalize_names(text):
     return names
 
 
+def normalize_columns(df, columns):
+    """
+    Returns {column: Series of normalised names} for the given columns, with every distinct
+    value normalised once (see normalize_names) no matter how often or in which column it
+    appears. The names are joined into one sorted string per row so columns compare with ==.
+    """
+    values = pd.concat([df[column].astype(object) for column in columns])
+    keys = {}
+    for value in values.dropna().unique():
+        keys[value] = ",".join(sorted(normalize_names(value)))
+    missing = ",".join(sorted(normalize_names(None)))
+    return {column: df[column].map(keys).fillna(missing) for column in columns}
+
+
+def join_results(df_ai, df_manual, on=None):
+    """
+    Puts every manually annotated row next to the AI results for it, matched on id if both
+    files have one, otherwise on episodeDescription (not on the row position).
+
+    Returns the manual rows with the AI prediction columns added (NaN where the AI file has
+    no row for it) and the column joined on.
+    """
+    if on is None:
+        on = 'id' if 'id' in df_ai.columns and 'id' in df_manual.columns else 'episodeDescription'
+    if on == 'id':
+        # one file may have read the ids as numbers and the other as text
+        df_ai, df_manual = df_ai.assign(id=df_ai['id'].astype(str)), df_manual.assign(id=df_manual['id'].astype(str))
+    ai_columns = [column for column in PRED_COLUMNS + ['consulted'] if column in df_ai.columns]
+    # one AI row per key, the file may hold a description more than once
+    ai = df_ai[[on] + ai_columns].dropna(subset=[on]).drop_duplicates(on)
+    manual = df_manual.drop(columns=[column for column in ai_columns if column in df_manual.columns])
+    joined = manual.merge(ai, on=on, how='left', indicator=True)
+    joined['matched'] = joined.pop('_merge') == 'both'
+    return joined, on
+
+
+def score(joined, pred_columns=None):
+    """
+    Scores every prediction column against the manual hosts in one pass.
+
+    Returns (per row DataFrame of correct flags, summary DataFrame with the rows scored,
+    correct answers and accuracy per column). A model the cascade did not ask about a row
+    (see the consulted column of AI_annotation.py) is not scored on that row.
+    """
+    if pred_columns is None:
+        pred_columns = [column for column in PRED_COLUMNS if column in joined.columns]
+    names = normalize_columns(joined, [MANUAL_HOST_COLUMN] + pred_columns)
+    correct = pd.DataFrame({column: (names[column] == names[MANUAL_HOST_COLUMN]) & joined['matched']
+                            for column in pred_columns})
+
+    summary = []
+    for column in pred_columns:
+        scored = pd.Series(True, index=joined.index)
+        if 'consulted' in joined.columns and column != AI_HOST_COLUMN:
+            scored = joined['consulted'].fillna("").str.contains(column, regex=False) | ~joined['matched']
+        rows = int(scored.sum())
+        hits = int((correct[column] & scored).sum())
+        summary.append({"column": column, "rows": rows, "correct": hits,
+                        "accuracy": hits / rows * 100 if rows else 0.0})
+    return correct, pd.DataFrame(summary).set_index("column")
+
+
 def main():
+    ap = argparse.ArgumentParser(description="Score the AI host annotations against the manual ones")
+    ap.add_argument("--ai", default=AI_RESULTS_FILE)
+    ap.add_argument("--manual", default=MANUAL_FILE)
+    ap.add_argument("--on", choices=["id", "episodeDescription"],
+                    help="Column to match rows on (default: id if both files have it)")
+    ap.add_argument("--max-mismatches", type=int, default=None, help="Mismatches to print (default: all)")
+    args = ap.parse_args()
+
     print("Loading data...")
-    if not os.path.exists(AI_RESULTS_FILE):
-        print(f"Error: Could not find AI results file at {AI_RESULTS_FILE}")
+    if not os.path.exists(args.ai):
+        print(f"Error: Could not find AI results file at {args.ai}")
         return
 
     # Check if manual file exists
-    if not os.path.exists(MANUAL_FILE):
-        print(f"Error: Could not find Manual file at {MANUAL_FILE}")
+    if not os.path.exists(args.manual):
+        print(f"Error: Could not find Manual file at {args.manual}")
         return
 
-    df_ai = pd.read_csv(AI_RESULTS_FILE)
-    df_manual = pd.read_csv(MANUAL_FILE)
+    df_ai = pd.read_csv(args.ai)
+    df_manual = pd.read_csv(args.manual)
 
     # Filter out completely empty rows in manual file
     df_manual = df_manual.dropna(how='all')
 
-    print(f"Comparing {len(df_manual)} rows...")
-
-    correct_count = 0
-    errors = []
-
-    # Iterate through the manual file
-    for i, manual_row in df_manual.iterrows():
-        # Get the corresponding row from AI (assuming index alignment)
-        if i not in df_ai.index:
-            continue
-
-        ai_row = df_ai.iloc[i]
-
-        # Get Raw Values
-        manual_raw = manual_row[MANUAL_HOST_COLUMN]
-        ai_raw = ai_row[AI_HOST_COLUMN]
-        description = str(manual_row.get('episodeDescription', ''))
-
-        # Normalize both sides to sets of names
-        manual_set = normalize_names(manual_raw)
-        ai_set = normalize_names(ai_raw)
-
-        # Compare sets (Order doesn't matter)
-        if manual_set == ai_set:
-            correct_count += 1
-        else:
-            errors.append({
-                "id": i,
-                "desc": description[:50] + "...",
-                "AI": ai_raw,
-                "Manual": manual_raw,
-                "AI_clean": ai_set,
-                "Manual_clean": manual_set
-            })
+    joined, on = join_results(df_ai, df_manual, args.on)
+    print(f"Comparing {len(joined)} rows, matched on {on}...")
+    correct, summary = score(joined)
 
     # --- REPORT ---
-    limit = len(df_manual)
+    limit = len(joined)
+    unmatched = int((~joined['matched']).sum())
+    correct_count = int(correct[AI_HOST_COLUMN].sum()) if AI_HOST_COLUMN in correct else 0
     accuracy = (correct_count / limit) * 100 if limit > 0 else 0
 
     print("\n" + "=" * 60)
     print(f"VALIDATION REPORT")
     print("=" * 60)
     print(f"Rows checked: {limit}")
+    print(f"No AI result: {unmatched}")
     print(f"Correct:      {correct_count}")
-    print(f"Errors:       {len(errors)}")
+    print(f"Errors:       {limit - correct_count}")
     print("-" * 60)
     print(f"ACCURACY SCORE: {accuracy:.2f}%")
     print("=" * 60)
 
-    if errors:
+    print("\n--- PER MODEL ---")
+    for row in summary.itertuples():
+        print(f"{row.Index:<14} {row.correct:>6}/{row.rows:<6} {row.accuracy:6.2f}%")
+
+    errors = joined[~correct[AI_HOST_COLUMN]] if AI_HOST_COLUMN in correct else joined.iloc[0:0]
+    if args.max_mismatches is not None:
+        errors = errors.head(args.max_mismatches)
+    if len(errors):
         print("\n--- MISMATCHES (AI vs Manual) ---")
-        for err in errors:
-            print(f"\n[Row {err['id']}] {err['desc']}")
+        for i, err in zip(errors.index, errors.to_dict('records')):
+            description = str(err.get('episodeDescription', ''))
+            print(f"\n[Row {err.get('id', i)}] {description[:50]}...")
             print(f"🔴 Mismatch:")
-            print(f"   AI Says:     '{err['AI']}'")
-            print(f"   Manual Says: '{err['Manual']}'")
+            print(f"   AI Says:     '{err[AI_HOST_COLUMN] if err['matched'] else '(no AI result)'}'")
+            print(f"   Manual Says: '{err[MANUAL_HOST_COLUMN]}'")
 
 
 if __name__ == "__main__":
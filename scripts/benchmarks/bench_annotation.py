@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark of AI_annotation.py against model_stub.py, with the free-tier quotas of the three
+models enforced by the stub (429 + Retry-After when exceeded).
+
+    sequential -- the old loop: batches of 10, the three models one after another per
+                  batch, linear retry waits of initial_wait * attempt, and a fixed 21s sleep
+                  after every batch
+    async      -- annotate() without grouping near-duplicates: the models concurrently,
+                  several batches in flight, a token bucket per model and requests packed
+                  up to BATCH_TOKENS
+    grouped    -- annotate() as it runs by default: the same, with near-duplicates sent once
+
+About a third of the synthetic descriptions are reruns of a few recurring shows whose blurb
+only differs by the guest and the date.
+
+``--speedup 10`` runs everything ten times faster than real time (the stub's quota minute,
+its latency and every wait are divided by 10), so the numbers are for quota-bound runs
+without waiting for real minutes.
+
+    python scripts/benchmarks/bench_annotation.py --descriptions 200 --speedup 10
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "annotation"))
+
+import AI_annotation  # noqa: E402
+import model_stub  # noqa: E402
+
+HOSTS = ["Mo", "Laila", "Marie Hobitz", "Nicolas", "Sara", "Anders"]
+WORDS = ["musik", "historier", "lyttere", "plader", "koncert", "album", "sange", "aften", "gæster", "nyheder",
+         "klassikere", "elektronisk", "rock", "jazz", "interview", "festival", "debut", "single", "turné", "studie"]
+RECURRING = [
+    "Et musikalsk portrætprogram, hvor kendte musikere vælger 8 sange, én bog og én luksusting til turen til en "
+    "øde ø. I dag er gæsten {guest}. Vært: Camilla Jane Lea. (Sendt første gang {day}. {month}).",
+    "Hver fredag spiller vi de bedste nye plader og taler med {guest} om ugens udgivelser. Med Mo og Laila. "
+    "Sendt {day}. {month}.",
+    "Klubben er åben: nye navne og udgivelser under kærlig behandling, denne gang med besøg af {guest}. "
+    "Vært: Marie Hobitz.",
+]
+GUESTS = ["Tina Dickow", "Lukas Graham", "Mø", "Rasmus Seebach", "Agnes Obel", "Medina", "Kim Larsen", "Svea S"]
+MONTHS = ["januar", "februar", "marts", "april", "maj", "juni", "juli", "august"]
+OLD_BATCH_SIZE = 10
+MODEL_RPM = {AI_annotation.GEMINI_FLASH_MODEL: AI_annotation.GEMINI_FLASH_RPM,
+             AI_annotation.GEMINI_PRO_MODEL: AI_annotation.GEMINI_PRO_RPM,
+             AI_annotation.OPENAI_MODEL: AI_annotation.OPENAI_RPM}
+
+
+def make_descriptions(n, seed=0):
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(n):
+        if rnd.random() < 0.35:
+            text = rnd.choice(RECURRING).format(guest=rnd.choice(GUESTS), day=rnd.randint(1, 28),
+                                                month=rnd.choice(MONTHS))
+        else:
+            text = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(20, 60))).capitalize() + "."
+            if rnd.random() < 0.7:
+                text += f" Vært: {rnd.choice(HOSTS)}."
+        rows.append({"id": i, "episodeDescription": text})
+    # the input file has no exact duplicates
+    return pd.DataFrame(rows).drop_duplicates("episodeDescription")
+
+
+def run_sequential(df, providers, speedup, max_retries=3):
+    """The loop AI_annotation.main() used to run, with its waits divided by speedup.
+    Returns the number of descriptions some model gave no answer for."""
+    ids = df["id"].astype(str).tolist()
+    descriptions = df["episodeDescription"].tolist()
+    failed = 0
+    for i in range(0, len(df), OLD_BATCH_SIZE):
+        payload = dict(zip(ids[i:i + OLD_BATCH_SIZE], descriptions[i:i + OLD_BATCH_SIZE]))
+        for provider in providers:
+            for attempt in range(max_retries):
+                try:
+                    provider.call(payload)
+                    break
+                except Exception:
+                    if attempt == max_retries - 1:
+                        failed += len(payload)
+                        break
+                    time.sleep(provider.initial_wait * (attempt + 1) / speedup)
+        time.sleep(21 / speedup)
+    return failed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--descriptions", type=int, default=200)
+    ap.add_argument("--speedup", type=float, default=10, help="How much faster than real time to run")
+    ap.add_argument("--latency", type=float, default=4.0, help="Seconds a model takes to answer (real time)")
+    ap.add_argument("--max-in-flight", type=int, default=AI_annotation.MAX_IN_FLIGHT)
+    args = ap.parse_args()
+
+    df = make_descriptions(args.descriptions)
+    print(f"{len(df)} descriptions; quotas per minute: "
+          + ", ".join(f"{model} {rpm:g}" for model, rpm in MODEL_RPM.items())
+          + f"; latency {args.latency:g}s; {args.speedup:g}x real time")
+    print(f"{'variant':<11} {'seconds':>8} {'real time':>10} {'requests':>9} {'429s':>6} {'failed':>7}")
+
+    for variant in ["sequential", "async", "grouped"]:
+        server, url = model_stub.serve(latency=args.latency / args.speedup, rpm=MODEL_RPM,
+                                       window=60 / args.speedup)
+        AI_annotation.configure_models(url, url + "/v1")
+        providers = AI_annotation.get_providers()
+        for provider in providers:
+            provider.bucket = AI_annotation.TokenBucket(provider.rpm * args.speedup)
+            provider.initial_wait /= args.speedup
+
+        t0 = time.perf_counter()
+        if variant == "sequential":
+            failed = run_sequential(df, providers, args.speedup)
+        else:
+            options = {"near_duplicate_threshold": None} if variant == "async" else {}
+            with tempfile.TemporaryDirectory() as tmp:
+                out = asyncio.run(AI_annotation.annotate(df.copy(), Path(tmp) / "out.csv", providers,
+                                                         args.max_in_flight, **options))
+            failed = int((out[[p.column for p in providers]] == "Error").any(axis=1).sum())
+        seconds = time.perf_counter() - t0
+        server.shutdown()
+
+        requests = sum(server.config["requests"].values())
+        rejected = sum(server.config["rejected"].values())
+        print(f"{variant:<11} {seconds:>8.1f} {seconds * args.speedup / 60:>8.1f}min {requests:>9} "
+              f"{rejected:>6} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
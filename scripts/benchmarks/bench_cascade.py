@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Replays recorded model answers through model_stub.py and annotates them twice: asking all
+three models about every description, and with --cascade, where OpenAI is only asked about
+the descriptions the two Gemini models disagree on. Reports the requests and the model time
+(seconds spent waiting for answers) each run used, and checks that both runs select the same
+host for every description.
+
+The answers come from an AI_annotation.py output (its model1pred, model2pred and model3pred
+columns), or are made up for synthetic descriptions where each model is wrong now and then.
+
+    python scripts/benchmarks/bench_cascade.py --replay data/radio_programs_annotated-ai.csv
+    python scripts/benchmarks/bench_cascade.py --descriptions 500
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "annotation"))
+
+import AI_annotation  # noqa: E402
+import bench_annotation  # noqa: E402
+import model_stub  # noqa: E402
+
+MODELS = {"model1pred": AI_annotation.GEMINI_FLASH_MODEL,
+          "model2pred": AI_annotation.GEMINI_PRO_MODEL,
+          "model3pred": AI_annotation.OPENAI_MODEL}
+# real-time seconds per answer: the Gemini Flash models are quicker than OpenAI's reasoning model
+LATENCY = {AI_annotation.GEMINI_FLASH_MODEL: 3.0, AI_annotation.GEMINI_PRO_MODEL: 2.0,
+           AI_annotation.OPENAI_MODEL: 8.0}
+ERROR_RATE = {"model1pred": 0.08, "model2pred": 0.12, "model3pred": 0.06}
+
+
+def synthetic_answers(n, seed=0):
+    """Synthetic descriptions with answers that are right except for each model's error rate."""
+    rnd = random.Random(seed)
+    df = bench_annotation.make_descriptions(n, seed)
+    truth = [model_stub.annotate({0: d})[0] for d in df["episodeDescription"]]
+    for column, rate in ERROR_RATE.items():
+        df[column] = [rnd.choice(bench_annotation.HOSTS + ["None"]) if rnd.random() < rate else t for t in truth]
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--replay", help="AI_annotation.py output to replay the answers of")
+    ap.add_argument("--descriptions", type=int, default=500, help="Synthetic descriptions, without --replay")
+    ap.add_argument("--speedup", type=float, default=10, help="How much faster than real time to run")
+    args = ap.parse_args()
+
+    df = pd.read_csv(args.replay) if args.replay else synthetic_answers(args.descriptions)
+    df = df.dropna(subset=[AI_annotation.DESCRIPTION_COLUMN]).drop_duplicates(AI_annotation.DESCRIPTION_COLUMN)
+    answers = {model: dict(zip(df[AI_annotation.DESCRIPTION_COLUMN], df[column].fillna("None").astype(str)))
+               for column, model in MODELS.items()}
+    latency = {model: seconds / args.speedup for model, seconds in LATENCY.items()}
+    print(f"{len(df)} descriptions; latency " + ", ".join(f"{m} {s:g}s" for m, s in LATENCY.items())
+          + f"; no quotas; {args.speedup:g}x real time")
+
+    runs = {}
+    for mode in ["all models", "cascade"]:
+        server, url = model_stub.serve(latency=latency, answers=answers)
+        AI_annotation.configure_models(url, url + "/v1")
+        providers = AI_annotation.get_providers()
+        for provider in providers:
+            provider.bucket = AI_annotation.TokenBucket(6000 * args.speedup)
+        t0 = time.perf_counter()
+        with tempfile.TemporaryDirectory() as tmp:
+            out = asyncio.run(AI_annotation.annotate(
+                df[["id", AI_annotation.DESCRIPTION_COLUMN]].copy() if "id" in df else
+                df[[AI_annotation.DESCRIPTION_COLUMN]].copy(),
+                Path(tmp) / "out.csv", providers, cascade=mode == "cascade"))
+        seconds = time.perf_counter() - t0
+        server.shutdown()
+        runs[mode] = (out, providers, seconds)
+
+    print(f"\n{'mode':<11} {'requests':>9} {'model time':>11} {'run time':>9}   per model")
+    for mode, (out, providers, seconds) in runs.items():
+        per_model = ", ".join(f"{p.name} {p.calls}" for p in providers)
+        print(f"{mode:<11} {sum(p.calls for p in providers):>9} "
+              f"{sum(p.seconds for p in providers) * args.speedup:>10.0f}s {seconds * args.speedup:>8.0f}s   {per_model}")
+
+    full, cascade = runs["all models"][0], runs["cascade"][0]
+    asked_third = cascade["consulted"].str.contains("model3pred").sum()
+    same = (full["selectedpred"].astype(str).values == cascade["selectedpred"].astype(str).values).all()
+    print(f"\nOpenAI was asked about {asked_third} of {len(cascade)} descriptions")
+    print(f"same selected host for every description: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the tables behind the experiments.ipynb plots: computed from the raw play logs
+as the notebook did (read and concatenate the CSVs, parse localTime, one groupby per plot)
+against queries on count_cube.CountCube. Also times building the cube and adding one newly
+scraped day to it, and checks that both paths give the same tables.
+
+Runs on synthetic tables of the 2024 size (about 140k plays per channel) unless a folder with
+p3_2024.csv, p4_2024.csv and p6_2024.csv is given.
+
+    python scripts/benchmarks/bench_count_cube.py
+    python scripts/benchmarks/bench_count_cube.py --data data
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scraped_processing"))
+
+import synthetic  # noqa: E402
+from count_cube import CountCube, normalise_shows  # noqa: E402
+
+FILES = ["p3_2024.csv", "p4_2024.csv", "p6_2024.csv"]
+GENDERS = ["male", "female", "other"]
+
+
+def raw_tables(folder):
+    """ The plot tables the way experiments.ipynb computed them """
+    tables = {name: pd.read_csv(Path(folder) / name) for name in FILES}
+    all_data = pd.concat(tables.values(), ignore_index=True)
+    all_data["localTime"] = pd.to_datetime(all_data["localTime"], utc=True).dt.tz_convert("Europe/Copenhagen")
+    p3 = tables["p3_2024.csv"].copy()
+    p3["localTime"] = pd.to_datetime(p3["localTime"], utc=True).dt.tz_convert("Europe/Copenhagen")
+    p3["weekday"] = p3["localTime"].dt.weekday
+    p3["hour"] = p3["localTime"].dt.hour
+    fridays = p3[p3["weekday"] == 4].copy()
+    fridays["episodeTitle"] = normalise_shows(fridays["episodeTitle"])
+    return {
+        "by channel": all_data[all_data["gender"].isin(GENDERS)].groupby(["channel", "gender"]).size().unstack(fill_value=0),
+        "p3 weekly": p3[p3["gender"].isin(GENDERS)].groupby(["weekday", "gender"]).size().unstack(fill_value=0),
+        "p3 hourly": p3[p3["gender"].isin(GENDERS[:2])].groupby(["hour", "gender"]).size().unstack(fill_value=0),
+        "p3 total": len(p3),
+        "p3 friday shows": fridays.groupby(["episodeTitle", "gender"]).size().unstack().reindex(columns=["female", "male", "other"]),
+    }
+
+
+def cube_tables(cube):
+    """ The same tables from the count cube """
+    p3 = ["p3_2024.csv"]
+    return {
+        "by channel": cube.query(["channel", "gender"], sources=FILES, genders=GENDERS).unstack(fill_value=0),
+        "p3 weekly": cube.query(["weekday", "gender"], sources=p3, genders=GENDERS).unstack(fill_value=0),
+        "p3 hourly": cube.query(["hour", "gender"], sources=p3, genders=GENDERS[:2]).unstack(fill_value=0),
+        "p3 total": cube.query(sources=p3),
+        "p3 friday shows": cube.query(["show", "gender"], sources=p3, weekdays=[4]).unstack()
+                           .reindex(columns=["female", "male", "other"]),
+    }
+
+
+def same(a, b):
+    if isinstance(a, int):
+        return a == b
+    return a.shape == b.shape and (a.fillna(-1).to_numpy() == b.fillna(-1).to_numpy()).all() and list(a.index) == list(b.index)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", help="Folder with the 2024 tables; default synthetic tables")
+    ap.add_argument("--plays-per-day", type=int, default=380, help="Synthetic plays per channel and day")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(args.data) if args.data else Path(tmp) / "data"
+        if not args.data:
+            folder.mkdir()
+            days = pd.date_range("2024-01-01", "2024-12-31").strftime("%Y-%m-%d")
+            for name in FILES:
+                synthetic.make_plays(name[:2], days, args.plays_per_day).to_csv(folder / name, index=False)
+            print(f"synthetic 2024 tables, {args.plays_per_day} plays per channel and day")
+        raw_bytes = sum((folder / name).stat().st_size for name in FILES)
+
+        t0 = time.perf_counter()
+        raw = raw_tables(folder)
+        t_raw = time.perf_counter() - t0
+
+        cube = CountCube(Path(tmp) / "cube")
+        t0 = time.perf_counter()
+        cube.update(folder, FILES)
+        t_build = time.perf_counter() - t0
+        cube_bytes = sum(path.stat().st_size for path in cube.root.glob("*.parquet"))
+
+        t0 = time.perf_counter()
+        queried = cube_tables(cube)
+        t_query = time.perf_counter() - t0
+
+        day = folder / "p3_2025-01-01.csv"
+        synthetic.make_plays("p3", ["2025-01-01"], args.plays_per_day).to_csv(day, index=False)
+        t0 = time.perf_counter()
+        cube.update(folder, FILES + [day.name])
+        t_day = time.perf_counter() - t0
+        day.unlink()
+        sources = cube.sources()
+
+    plays = sum(sources[Path(name).stem]["plays"] for name in FILES)
+    cells = sum(sources[Path(name).stem]["cells"] for name in FILES)
+    print(f"{plays:,} plays in {cells:,} cube cells\n")
+    print(f"{'path':<30} {'read':>9} {'time':>8}")
+    print(f"{'raw play logs (notebook)':<30} {raw_bytes / 1024:>7,.0f}KB {t_raw:>7.2f}s")
+    print(f"{'count cube queries':<30} {cube_bytes / 1024:>7,.0f}KB {t_query:>7.2f}s")
+    print(f"{'building the cube':<30} {raw_bytes / 1024:>7,.0f}KB {t_build:>7.2f}s")
+    print(f"{'adding one scraped day':<30} {'':>9} {t_day:>7.2f}s")
+
+    mismatches = [name for name in raw if not same(raw[name], queried[name])]
+    print(f"\nsame tables: {not mismatches}" + (f" (differ: {', '.join(mismatches)})" if mismatches else ""))
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark of host extraction on full-year play tables: the first notebook version
+(``str.extract`` with its regex on every row) against host_extraction.add_hosts (a linear-time
+pattern run once per distinct description).
+
+Runs on the 2024 tables when they are given, otherwise on synthetic tables of their size
+(about 140k plays per channel, 500-1400 distinct descriptions, 40% of plays without one).
+
+    python scripts/benchmarks/bench_host_extraction.py data/p3_2024.csv data/p4_2024.csv data/p6_2024.csv
+    python scripts/benchmarks/bench_host_extraction.py
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "annotation"))
+
+import host_extraction  # noqa: E402
+
+OLD_PATTERN = (r'\b[Vv](?:æ|ae)rt(?:er)?[:,]? +(?![Vv](?:æ|ae)rt(?:er)?)'
+               r'((?:\(? *[A-ZÆØÅ][a-zæøå]*\)?,?)*(?: *(?:og|\&)(?:\(? *[A-ZÆØÅ][a-zæøå]*\)?,?)+)?)')
+# distinct descriptions per channel in 2024, from extracting_host_from_description.ipynb
+DISTINCT_2024 = {"p3": 1374, "p4": 501, "p6": 517}
+PLAYS_PER_CHANNEL = 140_000
+
+FIRST = ["Mo", "Laila", "Marie", "Oliver", "Thomas", "Andrew", "Nikkie", "Mathilde", "Anton", "Liva", "Kajsa"]
+LAST = ["Hobitz", "Seppo", "Bugge", "Moyo", "Niyibigira", "Muus", "Ringdal", "Manghezi", "Aden Hjortshøj"]
+FILLER = ("Dagens program byder på ny musik, gode historier og lyttere der ringer ind med deres "
+          "bedste minder om sommeren, koncerter og de plader der har betydet mest").split()
+CUES = ["Vært: {0}.", "Værter: {0} og {1}.", "værter {0} og {1}!", "værter ({0} og {1}),",
+        "Værter: {0} & {1}", "Værter: {0}, {1} og {2}.", "Med {0} og {1}."]
+
+
+def make_description(rnd):
+    names = [f"{rnd.choice(FIRST)} {rnd.choice(LAST)}" for _ in range(3)]
+    text = " ".join(rnd.choice(FILLER) for _ in range(rnd.randint(30, 70))).capitalize() + "."
+    if rnd.random() < 0.6:
+        text += " " + rnd.choice(CUES).format(*names)
+    return text
+
+
+def make_table(channel, seed=0):
+    rnd = random.Random(f"{seed}-{channel}")
+    descriptions = [make_description(rnd) for _ in range(DISTINCT_2024[channel])]
+    plays = [rnd.choice(descriptions) if rnd.random() < 0.6 else None for _ in range(PLAYS_PER_CHANNEL)]
+    return pd.DataFrame({"channel": channel, "episodeDescription": plays})
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("files", nargs="*", help="Play tables with an episodeDescription column")
+    args = ap.parse_args()
+
+    if args.files:
+        tables = {Path(f).stem: pd.read_csv(f, usecols=["episodeDescription"]) for f in args.files}
+    else:
+        tables = {channel: make_table(channel) for channel in DISTINCT_2024}
+        print("no tables given, using synthetic tables of the 2024 size")
+
+    print(f"{'table':<10} {'plays':>8} {'distinct':>9} {'str.extract':>12} {'add_hosts':>10} {'found old/new':>14}")
+    total_old = total_new = 0
+    for name, df in tables.items():
+        t0 = time.perf_counter()
+        old = df["episodeDescription"].str.extract(OLD_PATTERN)[0]
+        t_old = time.perf_counter() - t0
+
+        host_extraction._extract_hosts.cache_clear()
+        t0 = time.perf_counter()
+        new = host_extraction.add_hosts(df.copy())["hosts"]
+        t_new = time.perf_counter() - t0
+
+        total_old += t_old
+        total_new += t_new
+        found_old = old.replace("", None).notna().sum()
+        print(f"{name:<10} {len(df):>8} {df['episodeDescription'].nunique():>9} {t_old:>11.3f}s {t_new:>9.3f}s "
+              f"{found_old:>7}/{new.notna().sum()}")
+    print(f"{'total':<10} {'':>8} {'':>9} {total_old:>11.3f}s {total_new:>9.3f}s")
+
+    print("\nknown cases:")
+    for description, expected in host_extraction.KNOWN_CASES:
+        m = re.search(OLD_PATTERN, description)
+        got = host_extraction.extract_hosts(description)
+        print(f"  {'ok ' if got == expected else 'BAD'} {description!r}: {got!r} (was {m.group(1) if m else None!r})")
+
+
+if __name__ == "__main__":
+    main()
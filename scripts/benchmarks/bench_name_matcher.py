@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the trigram NameMatcher used for offline artist lookups: index build time, time
+to resolve ~10k distinct artist strings, and agreement with an exhaustive SequenceMatcher scan
+(what name_similarity would give if every known name were a candidate).
+
+Names are synthetic; queries are known names with typos, punctuation and case changes, plus
+names that are not in the list at all.
+
+    python scripts/benchmarks/bench_name_matcher.py --names 500000 --queries 10000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scraped_processing"))
+
+from name_matcher import NameMatcher, normalize_artist_name  # noqa: E402
+
+SYLLABLES = ["an", "be", "ca", "da", "el", "fi", "ga", "ha", "in", "jo", "ka", "li", "ma", "ne", "ol", "pa",
+             "ri", "sa", "te", "ul", "va", "wo", "xe", "yo", "za", "ør", "æs", "ån", "sh", "th", "ck", "ly",
+             "mon", "key", "ish", "son", "sen", "ber", "lin", "ton", "ric", "dor", "mus", "tek", "vin", "jar"]
+
+
+def make_word(rnd):
+    return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.choice([2, 2, 3, 3, 4])))
+
+
+def make_names(n, rnd):
+    """Artist-like names: one to three made-up words, sometimes with a leading "The"."""
+    names = set()
+    while len(names) < n:
+        words = [make_word(rnd) for _ in range(rnd.choice([1, 2, 2, 2, 3]))]
+        if rnd.random() < 0.15:
+            words.insert(0, "the")
+        names.add(" ".join(words).title())
+    return sorted(names)
+
+
+def perturb(name, rnd):
+    chars = list(name)
+    kind = rnd.random()
+    i = rnd.randrange(len(chars))
+    if kind < 0.3:
+        del chars[i]
+    elif kind < 0.5 and i + 1 < len(chars):
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    elif kind < 0.7:
+        chars.insert(i, rnd.choice(string.ascii_lowercase))
+    elif kind < 0.85:
+        return name.upper() + "."
+    return "".join(chars)
+
+
+def brute_force(norms, query, threshold):
+    query = normalize_artist_name(query)
+    best, best_i = 0, None
+    for i, norm in enumerate(norms):
+        ratio = SequenceMatcher(None, query, norm).ratio()
+        if ratio > best:
+            best, best_i = ratio, i
+    return (best, best_i) if best >= threshold else None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--names", type=int, default=500_000, help="Known names and aliases")
+    ap.add_argument("--queries", type=int, default=10_000, help="Distinct artist strings to resolve")
+    ap.add_argument("--threshold", type=float, default=0.85)
+    ap.add_argument("--check", type=int, default=50, help="Queries compared against an exhaustive scan")
+    args = ap.parse_args()
+
+    rnd = random.Random(0)
+    names = make_names(args.names, rnd)
+    queries = [perturb(rnd.choice(names), rnd) if rnd.random() < 0.9 else f"Unknown Artist {i}"
+               for i in range(args.queries)]
+
+    t0 = time.perf_counter()
+    matcher = NameMatcher(names)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results = [matcher.search(q, limit=1, similarity_threshold=args.threshold) for q in queries]
+    search = time.perf_counter() - t0
+    found = sum(1 for r in results if r)
+
+    agree = 0
+    sample = rnd.sample(range(len(queries)), min(args.check, len(queries)))
+    for k in sample:
+        expected = brute_force(matcher.norms, queries[k], args.threshold)
+        got = results[k][0] if results[k] else None
+        # the same similarity counts as agreement, several names can tie
+        agree += (expected is None and got is None) or (expected and got and abs(expected[0] - got[0]) < 1e-9)
+
+    print(f"names={len(names)} queries={len(queries)} threshold={args.threshold}")
+    print(f"index build: {build:6.2f}s")
+    print(f"search:      {search:6.2f}s ({len(queries) / search:.0f} queries/s), {found} matched")
+    print(f"same best similarity as an exhaustive scan: {agree}/{len(sample)}")
+
+
+if __name__ == "__main__":
+    main()
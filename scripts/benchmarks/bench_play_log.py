@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark of time-range queries on the play logs: the way the notebooks do them (parse
+localTime, mask with boolean Series, groupby) against play_log.PlayLog (binary search on
+sorted, memory-mapped timestamps and a bincount of the integer codes).
+
+The queries compare October 2024 with October 2025 on P3, by hour and gender and by weekday.
+Both paths must give the same counts. Runs on a synthetic P3 year (about 140k plays) and a
+synthetic October 2025 unless a folder with p3_2024.csv and p3_oct_2025.csv is given.
+
+    python scripts/benchmarks/bench_play_log.py
+    python scripts/benchmarks/bench_play_log.py --data data
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scraped_processing"))
+
+import synthetic  # noqa: E402
+from play_log import PlayLog  # noqa: E402
+
+FILES = ["p3_2024.csv", "p3_oct_2025.csv"]
+RANGES = [("2024-10-01", "2024-11-01"), ("2025-10-01", "2025-11-01")]
+
+
+def pandas_queries(tables):
+    """ The comparison the way the notebooks compute it, from the tables as read by read_csv """
+    results = []
+    for df, (start, end) in zip(tables, RANGES):
+        local = pd.to_datetime(df["localTime"], utc=True).dt.tz_convert("Europe/Copenhagen")
+        in_range = (local >= pd.Timestamp(start, tz="Europe/Copenhagen")) & \
+                   (local < pd.Timestamp(end, tz="Europe/Copenhagen"))
+        plays = df[in_range & df["channel"].str.lower().str.startswith("p3")]
+        hours = local[plays.index].dt.hour
+        results.append(plays[plays["gender"].isin(["male", "female"])]
+                       .groupby([hours, "gender"]).size())
+        results.append(local[plays.index].dt.weekday.value_counts().sort_index())
+    return results
+
+
+def play_log_queries(log):
+    results = []
+    for start, end in RANGES:
+        results.append(log.count(["hour", "gender"], channels="p3", start=start, end=end, genders=["male", "female"]))
+        results.append(log.count("weekday", channels="p3", start=start, end=end))
+    return results
+
+
+def timed(f, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = f()
+    return result, (time.perf_counter() - t0) / repeat
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--data", help="Folder with p3_2024.csv and p3_oct_2025.csv; default synthetic tables")
+    ap.add_argument("--repeat", type=int, default=20, help="Times to run the play log queries")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(args.data) if args.data else Path(tmp) / "data"
+        if not args.data:
+            folder.mkdir()
+            synthetic.make_plays("p3", pd.date_range("2024-01-01", "2024-12-31").strftime("%Y-%m-%d")) \
+                .to_csv(folder / FILES[0], index=False)
+            synthetic.make_plays("p3", pd.date_range("2025-10-01", "2025-10-31").strftime("%Y-%m-%d")) \
+                .to_csv(folder / FILES[1], index=False)
+            print("synthetic P3 tables for 2024 and October 2025")
+
+        t0 = time.perf_counter()
+        tables = [pd.read_csv(folder / name) for name in FILES]
+        t_read = time.perf_counter() - t0
+        expected, t_pandas = timed(lambda: pandas_queries(tables), 3)
+
+        log = PlayLog(Path(tmp) / "playlog")
+        t0 = time.perf_counter()
+        log.update(folder, FILES)
+        t_build = time.perf_counter() - t0
+        # a fresh PlayLog opens the memory maps again, as a new session would
+        first, t_first = timed(lambda: play_log_queries(PlayLog(log.root)), 1)
+        got, t_log = timed(lambda: play_log_queries(log), args.repeat)
+        plays = sum(entry["plays"] for entry in log.sources().values())
+
+    print(f"{plays:,} plays; Oct 2024 vs Oct 2025 on P3, by hour and gender and by weekday\n")
+    print(f"{'path':<40} {'time':>10}")
+    print(f"{'read_csv of both tables':<40} {t_read * 1000:>8.0f}ms")
+    print(f"{'parse localTime, mask, groupby':<40} {t_pandas * 1000:>8.0f}ms")
+    print(f"{'building the play log':<40} {t_build * 1000:>8.0f}ms")
+    print(f"{'play log, first query of a session':<40} {t_first * 1000:>8.1f}ms")
+    print(f"{'play log query':<40} {t_log * 1000:>8.1f}ms")
+
+    same = all(list(a.items()) == list(b.items()) for a, b in zip(expected, got))
+    print(f"\nsame counts: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of playlist page parsing: the old two-pass path (regex + json.loads for
+the buildId, then BeautifulSoup for the anchors) against the single __NEXT_DATA__ pass.
+
+Pages are read from ``--pages`` (e.g. bodies saved in data/.scrape_cache/http/**/*.body);
+without it a synthetic page is generated.
+
+    python scripts/benchmarks/bench_playlist_parse.py --pages "saved/*.html" --channel p3 --date 2025-10-30
+"""
+import argparse
+import glob
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "web_scraper"))
+
+import dr_scraper  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def old_parse(html, channel, date):
+    return dr_scraper.extract_build_id(html), dr_scraper.find_episode_slugs_from_html(html, channel, date)
+
+
+def new_parse(html, channel, date):
+    page = dr_scraper.parse_playlist_page(html, channel, date)
+    return page.build_id, page.slugs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", help="Glob of saved playlist pages")
+    ap.add_argument("--channel", default="p3")
+    ap.add_argument("--date", default="2025-10-30")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    if args.pages:
+        pages = [Path(p).read_text(encoding="utf-8", errors="replace") for p in sorted(glob.glob(args.pages))]
+    else:
+        slugs = synthetic.episode_slugs(40, args.date)
+        pages = [synthetic.make_playlist_html(args.channel, args.date, slugs)]
+    if not pages:
+        sys.exit(f"No pages match {args.pages}")
+
+    for html in pages:
+        old, new = old_parse(html, args.channel, args.date), new_parse(html, args.channel, args.date)
+        if sorted(old[1]) != sorted(new[1]) or old[0] != new[0]:
+            print(f"Warning: results differ on a {len(html)}-byte page: {old[0]}/{len(old[1])} vs {new[0]}/{len(new[1])}")
+
+    size = sum(len(h) for h in pages)
+    for name, fn in [("old (regex + BeautifulSoup)", old_parse), ("new (single __NEXT_DATA__ pass)", new_parse)]:
+        seconds = min(timeit.repeat(lambda: [fn(h, args.channel, args.date) for h in pages],
+                                    number=1, repeat=args.repeat))
+        print(f"{name:<34} {seconds / len(pages) * 1000:8.2f} ms/page  ({len(pages)} pages, {size / 1e3:.0f} kB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark of turning scraped CSV files into the minimal format: the in-memory path
+(merge_datasets + reform_datasets_to_minimal + to_csv) against the chunked write_minimal.
+
+Synthetic scraped files are generated for 3 channels × 31 days; ``--scale 1`` is roughly the
+size of the October 2025 scrape, ``--scale 10`` ten times that. Every variant runs in its own
+process so its peak RSS can be measured, and both output files must be byte-identical.
+
+    python scripts/benchmarks/bench_reform_minimal.py --scale 10
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scraped_processing"))
+
+import synthetic  # noqa: E402
+
+CHANNELS = ["p3", "p4kbh", "p6beat"]
+EPISODES_PER_DAY = 25  # × 15 tracks ≈ the rows per channel/day in the October 2025 scrape
+
+
+def generate(folder, scale):
+    """One scraped CSV per channel and block of 31 days; returns (filenames, rows)."""
+    filenames, rows = [], 0
+    first = date(2025, 10, 1)
+    for block in range(scale):
+        dates = [(first + timedelta(days=31 * block + d)).isoformat() for d in range(31)]
+        for channel in CHANNELS:
+            name = f"{channel}_{dates[0]}.csv"
+            rows += synthetic.write_scraped_csv(folder / name, channel, dates, EPISODES_PER_DAY)
+            filenames.append(name)
+    return filenames, rows
+
+
+def run(variant, folder, filenames, out_path, chunksize):
+    """Runs one variant in this process and returns its measurements."""
+    import dataset_store
+    import data_preprocessing
+
+    store = folder / "store"
+    if variant == "sync":
+        dataset_store.sync(folder, store, filenames)
+        return {}
+    t0 = time.perf_counter()
+    if variant == "in-memory":
+        # what merge_datasets does, against the benchmark folder instead of /data
+        df = dataset_store.load(store, sources=filenames)
+        minimal = data_preprocessing.reform_datasets_to_minimal(df)
+        minimal.to_csv(out_path, index=False)
+        rows = len(minimal)
+    else:
+        rows = data_preprocessing.write_minimal(filenames, out_path, chunksize=chunksize, folder=folder)
+    seconds = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    return {"rows": rows, "seconds": seconds, "peak_mb": peak_mb}
+
+
+def spawn(variant, folder, filenames, out_path, chunksize):
+    cmd = [sys.executable, __file__, "--run", variant, "--folder", str(folder), "--out", str(out_path),
+           "--chunksize", str(chunksize), "--files", *filenames]
+    return json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", type=int, default=10, help="Months of data per channel")
+    ap.add_argument("--chunksize", type=int, default=100_000)
+    ap.add_argument("--run", help=argparse.SUPPRESS)
+    ap.add_argument("--folder", help=argparse.SUPPRESS)
+    ap.add_argument("--out", help=argparse.SUPPRESS)
+    ap.add_argument("--files", nargs="*", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.run:
+        print(json.dumps(run(args.run, Path(args.folder), args.files, args.out, args.chunksize)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        t0 = time.perf_counter()
+        filenames, rows = generate(folder, args.scale)
+        size_mb = sum((folder / f).stat().st_size for f in filenames) / 2**20
+        print(f"scale={args.scale}: {len(filenames)} files, {rows} rows, {size_mb:.0f} MB "
+              f"(generated in {time.perf_counter() - t0:.1f}s)")
+
+        spawn("sync", folder, filenames, folder / "unused.csv", args.chunksize)  # the store is built once, up front
+        results = {}
+        for variant in ["in-memory", "streaming"]:
+            results[variant] = spawn(variant, folder, filenames, folder / f"{variant}.csv", args.chunksize)
+        same = (folder / "in-memory.csv").read_bytes() == (folder / "streaming.csv").read_bytes()
+
+    print(f"{'variant':<10} {'rows':>9} {'seconds':>8} {'rows/s':>10} {'peak RSS':>10}")
+    for variant, r in results.items():
+        print(f"{variant:<10} {r['rows']:>9} {r['seconds']:>8.2f} {r['rows'] / r['seconds']:>10.0f} "
+              f"{r['peak_mb']:>8.0f}MB")
+    print(f"identical output: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Wall-clock comparison of the old sequential episode loop against the pooled, concurrent
+fetch in dr_scraper.py, both run against the local stand-in server.
+
+    python scripts/benchmarks/bench_scraper_concurrency.py --episodes 40 --latency 0.1
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "web_scraper"))
+
+import dr_scraper  # noqa: E402
+import dr_standin  # noqa: E402
+
+
+def legacy_scrape(base, channel, date, sleep):
+    """The pre-concurrency loop: fresh connection per request and a fixed sleep after each."""
+    html = dr_scraper.http_get(f"{base}/lyd/playlister/{channel}/{date}/").text
+    build_id = dr_scraper.extract_build_id(html)
+    slugs = dr_scraper.find_episode_slugs_from_html(html, channel, date)
+    rows = []
+    for slug in slugs:
+        ep_url = f"{base}/lyd/_next/data/{build_id}/da/playlister/{channel}/{date}/{slug}.json"
+        pp = dr_scraper.page_props(dr_scraper.http_get_json(ep_url))
+        ep_meta = pp.get("episode") or {}
+        rows.extend(dr_scraper.episode_tracks_to_rows(
+            date, channel, ep_meta, pp.get("playlistIndexPoints") or [],
+            dr_scraper.get_program_description(ep_meta, pp), ep_url))
+        time.sleep(sleep)
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--episodes", type=int, default=40)
+    ap.add_argument("--latency", type=float, default=0.1, help="Stand-in response delay (s)")
+    ap.add_argument("--sleep", type=float, default=0.5, help="Legacy per-request sleep (s)")
+    ap.add_argument("--max-in-flight", type=int, default=8)
+    ap.add_argument("--rate", type=float, default=20.0, help="Token-bucket rate for the new path")
+    args = ap.parse_args()
+
+    server, base = dr_standin.serve(latency=args.latency, episodes=args.episodes)
+    channel, date = "p3", "2025-10-30"
+    dr_scraper.log = lambda msg: None  # keep the timing free of console I/O
+
+    t0 = time.perf_counter()
+    legacy_rows = legacy_scrape(base, channel, date, args.sleep)
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    rows = dr_scraper.scrape_channel_date(
+        channel, date,
+        session=dr_scraper.make_session(args.max_in_flight),
+        limiter=dr_scraper.TokenBucket(args.rate),
+        max_in_flight=args.max_in_flight,
+        base=base,
+    )
+    concurrent = time.perf_counter() - t0
+    server.shutdown()
+
+    assert rows == legacy_rows, "concurrent fetch changed the rows or their order"
+    print(f"episodes={args.episodes} latency={args.latency}s rows={len(rows)}")
+    print(f"legacy     (sequential, sleep={args.sleep}s): {legacy:7.2f}s")
+    print(f"concurrent (max_in_flight={args.max_in_flight}, rate={args.rate}/s): {concurrent:7.2f}s")
+    print(f"speed-up: {legacy / concurrent:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
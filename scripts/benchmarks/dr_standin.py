@@ -0,0 +1,184 @@
+"""
+Local stand-in for the two dr.dk endpoints dr_scraper.py talks to:
+
+    /lyd/playlister/{channel}/{date}/
+    /lyd/_next/data/{buildId}/da/playlister/{channel}/{date}/{slug}.json
+
+Pages are generated by synthetic.py, or replayed from a scrape cache recorded by an earlier
+run against dr.dk (``recorded``, e.g. data/.scrape_cache), which also keeps playlists DR no
+longer serves. Every response is delayed by ``latency`` seconds (plus an exponential tail of
+mean ``jitter``) to imitate the round trip to DR, and faults can be injected:
+
+    error_rate     fraction of requests answered with 503
+    throttle_rate  fraction of requests answered with 429 and a Retry-After
+    rate_limit     requests per second above which every request gets a 429, as DR does
+
+Which requests fail depends only on ``seed``, the path and how often it was requested, not
+on thread timing, so a run with the same settings sees the same faults.
+
+    python scripts/benchmarks/dr_standin.py --port 8000 --latency 0.1 --error-rate 0.02
+    python scripts/web_scraper/dr_scraper.py --channel p3 --date 2025-10-30 --base-url http://127.0.0.1:8000
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "web_scraper"))
+
+import synthetic  # noqa: E402
+from scrape_cache import HttpCache  # noqa: E402
+
+DR_BASE = "https://www.dr.dk"
+BUILD_ID = "synthetic-build"
+PAGE_RE = re.compile(r"^/lyd/playlister/([^/]+)/(\d{4}-\d{2}-\d{2})/?$")
+EPISODE_RE = re.compile(r"^/lyd/_next/data/([^/]+)/da/playlister/([^/]+)/(\d{4}-\d{2}-\d{2})/([^/]+)\.json$")
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection pooling is measurable
+
+    def do_GET(self):
+        cfg = self.server.config
+        path = unquote(self.path.split("?", 1)[0])
+        with self.server.lock:
+            cfg["requests"] += 1
+            self.server.seen[path] += 1
+            attempt = self.server.seen[path]
+            limited = self.server.over_rate_limit()
+        rnd = random.Random(f"{cfg['seed']}-{path}-{attempt}")
+        time.sleep(cfg["latency"] + (rnd.expovariate(1 / cfg["jitter"]) if cfg["jitter"] else 0))
+
+        if limited or rnd.random() < cfg["throttle_rate"]:
+            return self._send(429, "text/plain", b"too many requests", {"Retry-After": str(cfg["retry_after"])})
+        if rnd.random() < cfg["error_rate"]:
+            return self._send(503, "text/plain", b"service unavailable")
+        if cfg["recorded"]:
+            return self._send_recorded(path)
+
+        m = PAGE_RE.match(path)
+        if m:
+            channel, date = m.groups()
+            slugs = synthetic.episode_slugs(cfg["episodes"], date)
+            return self._send(200, "text/html; charset=utf-8",
+                              synthetic.make_playlist_html(channel, date, slugs, BUILD_ID).encode())
+        m = EPISODE_RE.match(path)
+        if m and m.group(1) == BUILD_ID:
+            _, channel, date, slug = m.groups()
+            body = json.dumps(synthetic.make_episode_json(channel, date, slug, cfg["tracks"]))
+            return self._send(200, "application/json", body.encode())
+        self._send(404, "text/plain", b"not found")
+
+    def _send_recorded(self, path):
+        # the cache key leaves out the buildId, so episode URLs of any build hit the recording
+        cached = self.server.config["recorded"].get(DR_BASE + path)
+        if cached is None:
+            return self._send(404, "text/plain", b"not recorded")
+        body, meta = cached
+        self._send(200, meta.get("content_type") or "application/octet-stream", body)
+
+    def _send(self, status, content_type, body, headers=None):
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        with self.server.lock:
+            self.server.config["status"][status] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status in (200, 304):
+            self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def over_rate_limit(self):
+        """Sliding one-second window of accepted requests; call with the lock held."""
+        limit = self.config["rate_limit"]
+        if not limit:
+            return False
+        now = time.monotonic()
+        while self.window and self.window[0] <= now - 1:
+            self.window.pop(0)
+        if len(self.window) >= limit:
+            return True
+        self.window.append(now)
+        return False
+
+
+def serve(port=0, latency=0.1, episodes=40, tracks=15, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+          rate_limit=None, retry_after=1, recorded=None, seed=0):
+    """Start the stand-in on a daemon thread. Returns ``(server, base_url)``.
+
+    ``recorded`` is the folder of a scrape cache to replay instead of synthetic pages.
+    ``server.config`` holds the settings (they can be changed while it runs) and counts of
+    the requests and of the statuses sent.
+    """
+    server = StandinServer(("127.0.0.1", port), StandinHandler)
+    server.lock = threading.Lock()
+    server.seen = Counter()
+    server.window = []
+    server.config = {"latency": latency, "jitter": jitter, "episodes": episodes, "tracks": tracks,
+                     "error_rate": error_rate, "throttle_rate": throttle_rate, "rate_limit": rate_limit,
+                     "retry_after": retry_after, "recorded": HttpCache(Path(recorded)) if recorded else None,
+                     "seed": seed, "requests": 0, "status": Counter()}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def add_fault_arguments(ap):
+    """The stand-in settings as command-line options (shared with load_test.py)."""
+    ap.add_argument("--latency", type=float, default=0.1, help="Delay of every response (s)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="Mean of an extra exponential delay (s)")
+    ap.add_argument("--episodes", type=int, default=40, help="Synthetic episodes per channel/day")
+    ap.add_argument("--tracks", type=int, default=15, help="Synthetic tracks per episode")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    ap.add_argument("--rate-limit", type=float, help="Requests per second above which every request gets a 429")
+    ap.add_argument("--retry-after", type=int, default=1, help="Retry-After of the 429s (s)")
+    ap.add_argument("--recorded", help="Scrape cache folder to replay (e.g. data/.scrape_cache) instead of "
+                                       "synthetic pages")
+    ap.add_argument("--seed", type=int, default=0, help="Seed of the injected faults")
+
+
+def standin_kwargs(args):
+    return dict(latency=args.latency, jitter=args.jitter, episodes=args.episodes, tracks=args.tracks,
+                error_rate=args.error_rate, throttle_rate=args.throttle_rate, rate_limit=args.rate_limit,
+                retry_after=args.retry_after, recorded=args.recorded, seed=args.seed)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serves DR playlist pages and episode JSON locally")
+    ap.add_argument("--port", type=int, default=8000)
+    add_fault_arguments(ap)
+    args = ap.parse_args()
+
+    server, base = serve(port=args.port, **standin_kwargs(args))
+    print(f"DR stand-in on {base} ({'recorded ' + args.recorded if args.recorded else 'synthetic pages'}); "
+          f"Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        cfg = server.config
+        print(f"\n{cfg['requests']} requests: " + ", ".join(f"{k}: {v}" for k, v in sorted(cfg["status"].items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Load test of the scraper against the DR stand-in (dr_standin.py): crawls a grid of channels and
+days once per --max-in-flight value, the way scrape_all_channels.py does, and reports episodes
+per second, request tail latency, 429s, 5xx, retries and episodes lost.
+
+The stand-in runs in-process with the given latency and faults, unless --base-url points at
+one that is already running (e.g. dr_standin.py --recorded data/.scrape_cache).
+
+    python scripts/benchmarks/load_test.py --max-in-flight 1 4 8 16 --latency 0.1 --jitter 0.05
+    python scripts/benchmarks/load_test.py --rate 50 --rate-limit 30 --error-rate 0.02
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "web_scraper"))
+
+import dr_scraper  # noqa: E402
+import dr_standin  # noqa: E402
+from scrape_all_channels import Job, date_range, parse_date, run_job  # noqa: E402
+from scrape_metrics import ScrapeMetrics  # noqa: E402
+
+
+def crawl(base, channels, days, workers, max_in_flight, rate, out_dir, retries=0, breaker_threshold=0):
+    """One crawl without cache; returns its metrics, jobs, request latencies and wall-clock time."""
+    latencies = []
+    session = dr_scraper.make_session(pool_size=workers * max_in_flight)
+    # time to the response headers of every request, as seen by the scraper
+    session.hooks["response"].append(lambda r, *args, **kwargs: latencies.append(r.elapsed.total_seconds()))
+    limiter = dr_scraper.TokenBucket(rate) if rate else None
+    build_ids = dr_scraper.BuildIdCache()
+    metrics = ScrapeMetrics()
+    retry, breaker = dr_scraper.open_retry(retries, breaker_threshold)
+    jobs = [Job(ch, d, Path(out_dir) / f"dr_{ch}_{d}.csv") for d in days for ch in channels]
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda job: run_job(job, session, limiter, build_ids, None, None, max_in_flight, base,
+                                          metrics=metrics, retry=retry, breaker=breaker), jobs))
+    return metrics, jobs, latencies, time.perf_counter() - t0
+
+
+def summarize(metrics, jobs, latencies, seconds):
+    status = {}
+    retries = 0
+    for stats in metrics.requests.values():
+        retries += stats.retries
+        for code, n in stats.status.items():
+            status[code] = status.get(code, 0) + n
+    # an episode is built once its row_build phase ran without an exception
+    built = sum(h.count for (_, _, phase), h in metrics.phases.items() if phase == "row_build")
+    built -= sum(n for (_, _, phase, _), n in metrics.errors.items() if phase == "row_build")
+    failed = sum(n for (_, _, phase, _), n in metrics.errors.items() if phase == "episode_fetch")
+    lat = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "seconds": round(seconds, 3),
+        "episodes": built,
+        "episodes_per_second": round(built / seconds, 2),
+        "rows": sum(job.rows for job in jobs),
+        "requests": len(latencies),
+        "p50": round(float(np.percentile(lat, 50)), 4),
+        "p95": round(float(np.percentile(lat, 95)), 4),
+        "p99": round(float(np.percentile(lat, 99)), 4),
+        "max": round(float(lat.max()), 4),
+        "429": status.get(429, 0),
+        "5xx": sum(n for code, n in status.items() if code >= 500),
+        "retries": retries,
+        "failed_episodes": failed,
+        "failed_days": sum(1 for job in jobs if job.error),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base-url", help="A running stand-in; default start one with the options below")
+    ap.add_argument("--channels", nargs="+", default=["p3", "p4kbh", "p6beat"])
+    ap.add_argument("--date", default="2025-10-27", help="First day")
+    ap.add_argument("--days", type=int, default=2)
+    ap.add_argument("--workers", type=int, default=2, help="(channel, date) jobs running at once")
+    ap.add_argument("--max-in-flight", type=int, nargs="+", default=[1, 4, 8, 16],
+                    help="Concurrent episode requests per job; one crawl per value")
+    ap.add_argument("--rate", type=float, default=50.0, help="Scraper rate limit (requests/s); 0 for none")
+    ap.add_argument("--retries", type=int, default=3, help="Scraper retries per request (0 = none)")
+    ap.add_argument("--breaker-threshold", type=int, default=5, help="Scraper circuit breaker (0 = none)")
+    ap.add_argument("--out", help="Write the results to this JSON file")
+    dr_standin.add_fault_arguments(ap)
+    args = ap.parse_args()
+
+    server = None
+    base = args.base_url.rstrip("/") if args.base_url else None
+    if base is None:
+        server, base = dr_standin.serve(**dr_standin.standin_kwargs(args))
+    first = parse_date(args.date)
+    days = date_range(first, first + timedelta(days=args.days - 1))
+    dr_scraper.log = lambda msg: None  # keep the timing free of console I/O
+
+    print(f"{len(args.channels)} channels × {len(days)} days, {args.workers} workers, "
+          f"rate {args.rate or 'unlimited'}/s"
+          + (f"; stand-in latency {args.latency}s + {args.jitter}s jitter, error rate {args.error_rate:.0%}, "
+             f"429 rate {args.throttle_rate:.0%}, rate limit {args.rate_limit or 'none'}" if server else f"; {base}"))
+    print(f"\n{'in flight':>9} {'seconds':>8} {'episodes':>8} {'eps/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} "
+          f"{'max':>7} {'429':>5} {'5xx':>5} {'retries':>7} {'lost':>5}")
+    results = []
+    for max_in_flight in args.max_in_flight:
+        if server:
+            server.seen.clear()  # every crawl sees the same faults
+        with tempfile.TemporaryDirectory() as tmp:
+            result = summarize(*crawl(base, args.channels, days, args.workers, max_in_flight, args.rate, tmp,
+                                      args.retries, args.breaker_threshold))
+        result["max_in_flight"] = max_in_flight
+        results.append(result)
+        print(f"{max_in_flight:>9} {result['seconds']:>8.2f} {result['episodes']:>8} "
+              f"{result['episodes_per_second']:>7.1f} {result['p50']:>6.3f}s {result['p95']:>6.3f}s "
+              f"{result['p99']:>6.3f}s {result['max']:>6.3f}s {result['429']:>5} {result['5xx']:>5} "
+              f"{result['retries']:>7} {result['failed_episodes']:>5}")
+    if server:
+        server.shutdown()
+
+    if args.out:
+        Path(args.out).write_text(json.dumps({"settings": vars(args), "results": results}, indent=1))
+        print(f"\nresults → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Local stand-in for the two model APIs AI_annotation.py talks to:
+
+    POST /v1beta/models/{model}:generateContent     (Gemini, REST transport)
+    POST /v1/chat/completions                        (OpenAI)
+
+Every model answers after ``latency`` seconds and has its own requests-per-minute quota, like
+the free tiers: a request over quota gets a 429 with a Retry-After header. ``window`` shortens
+the quota's minute so benchmarks can run the real quotas faster. The answer is a
+JSON object with a host name for every ID in the prompt's "Input Data", so the annotator can
+be run end to end without API keys. ``answers`` replays recorded answers instead, e.g. the
+model columns of an earlier AI_annotation.py output.
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GEMINI_RE = re.compile(r"^/v1beta/models/([^/:]+):generateContent$")
+OPENAI_PATH = "/v1/chat/completions"
+HOST_RE = re.compile(r"(?:Vært|Værter|Med|Præsenteret af)[:\s]+([A-ZÆØÅ][\wæøå]+(?:\s+[A-ZÆØÅ][\wæøå]+)?)")
+
+
+def annotate(payload, answers=None):
+    """The stub's 'model': the recorded answer for a description if there is one, otherwise
+    the name after a host keyword, or "None"."""
+    result = {}
+    for key, description in payload.items():
+        if answers and description in answers:
+            result[key] = answers[description]
+            continue
+        m = HOST_RE.search(str(description))
+        result[key] = m.group(1) if m else "None"
+    return result
+
+
+def input_payload(prompt):
+    """The JSON object after "Input Data:" in a prompt."""
+    _, _, data = prompt.rpartition("Input Data:")
+    return json.loads(data)
+
+
+class Quota:
+    """Fixed-window request counter for one model: rpm requests per window seconds."""
+
+    def __init__(self, rpm, window=60):
+        self.rpm = rpm
+        self.length = window
+        self.lock = threading.Lock()
+        self.window = time.monotonic()
+        self.used = 0
+
+    def take(self):
+        """Returns 0 if the request may go ahead, otherwise the seconds until the window resets."""
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window >= self.length:
+                self.window, self.used = now, 0
+            if self.rpm and self.used >= self.rpm:
+                return self.length - (now - self.window)
+            self.used += 1
+            return 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        cfg = self.server.config
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        path = self.path.split("?", 1)[0]
+        m = GEMINI_RE.match(path)
+        if m:
+            model = m.group(1)
+            prompt = "".join(part.get("text", "") for content in body.get("contents", [])
+                             for part in content.get("parts", []))
+        elif path == OPENAI_PATH:
+            model = body.get("model", "")
+            prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        else:
+            return self._send(404, {"error": {"code": 404, "message": "not found"}})
+
+        with cfg["lock"]:
+            cfg["requests"][model] = cfg["requests"].get(model, 0) + 1
+            quota = cfg["quotas"].setdefault(model, Quota(cfg["rpm"].get(model, cfg["default_rpm"]),
+                                                                    cfg["window"]))
+        wait = quota.take()
+        if wait:
+            with cfg["lock"]:
+                cfg["rejected"][model] = cfg["rejected"].get(model, 0) + 1
+            return self._send(429, {"error": {"code": 429, "message": "Resource has been exhausted",
+                                              "status": "RESOURCE_EXHAUSTED"}},
+                              {"Retry-After": f"{wait:.2f}"})
+
+        latency = cfg["latency"]
+        time.sleep(latency.get(model, 0) if isinstance(latency, dict) else latency)
+        answer = json.dumps(annotate(input_payload(prompt), cfg["answers"].get(model)), ensure_ascii=False)
+        if m:
+            self._send(200, {
+                "candidates": [{"content": {"parts": [{"text": answer}], "role": "model"},
+                                "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(answer) // 4,
+                                  "totalTokenCount": (len(prompt) + len(answer)) // 4},
+                "modelVersion": model,
+            })
+        else:
+            self._send(200, {
+                "id": f"chatcmpl-stub-{cfg['requests'][model]}", "object": "chat.completion",
+                "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(answer) // 4,
+                          "total_tokens": (len(prompt) + len(answer)) // 4},
+            })
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=0, latency=0.5, rpm=None, default_rpm=0, window=60, answers=None):
+    """Start the stub on a daemon thread. Returns ``(server, base_url)``.
+
+    ``latency`` is seconds per answer, or a dict of seconds per model name.
+    ``rpm`` maps model names to their requests-per-minute quota; ``default_rpm`` applies to
+    other models (0 means no quota). Quotas reset every ``window`` seconds. ``answers`` maps
+    model names to {description: answer} to replay.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.config = {"latency": latency, "rpm": dict(rpm or {}), "default_rpm": default_rpm, "window": window,
+                     "answers": dict(answers or {}),
+                     "quotas": {}, "requests": {}, "rejected": {}, "lock": threading.Lock()}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
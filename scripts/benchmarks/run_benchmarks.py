@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the pipeline, from scraped episode JSON to the plot tables, on a synthetic
+dataset (see synthetic.write_dataset) of a given scale.
+
+Every case is timed a few times and its best time is compared with the baseline stored in
+baselines.json for that scale. A fixed reference workload is timed in every run and the
+baselines are scaled by how its time changed, so a busier or slower machine does not show up
+as a regression. A case more than --tolerance slower than its (scaled) baseline is a
+regression, and the run exits with status 1, so a nightly job can stop before the slow
+change reaches the real runs. --save stores the current times as the new baselines.
+
+    python scripts/benchmarks/run_benchmarks.py
+    python scripts/benchmarks/run_benchmarks.py --scale 10x --only host_extraction normalize_names
+    python scripts/benchmarks/run_benchmarks.py --save
+
+Baselines are best stored on the machine that runs the comparison.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import pandas as pd
+
+SCRIPTS = Path(__file__).resolve().parents[1]
+for folder in ["web_scraper", "scraped_processing", "annotation", ""]:
+    sys.path.insert(0, str(SCRIPTS / folder))
+
+import synthetic  # noqa: E402
+
+BASELINES_FILE = Path(__file__).with_name("baselines.json")
+
+
+def case_episode_tracks_to_rows(data):
+    import dr_scraper
+
+    pages = [page for path in sorted((data / "pages").glob("*.jsonl")) for page in synthetic.read_pages(path)]
+
+    def run():
+        for channel, date, slug, page in pages:
+            props = page["pageProps"]
+            ep = props["episode"]
+            dr_scraper.episode_tracks_to_rows(date, channel, ep, props["playlistIndexPoints"], ep["description"],
+                                              f"https://www.dr.dk/lyd/playlister/{channel}/{date}/{slug}")
+    return run
+
+
+def case_reform_datasets_to_minimal(data):
+    import data_preprocessing
+    import dataset_store
+
+    filenames = sorted(path.name for path in (data / "scraped").glob("*.csv"))
+    dataset_store.sync(data / "scraped", data / "store", filenames)
+    df = dataset_store.load(data / "store", sources=filenames)
+    return lambda: data_preprocessing.reform_datasets_to_minimal(df)
+
+
+def _enriched(data):
+    return pd.concat([pd.read_csv(path) for path in sorted((data / "enriched").glob("*.csv"))], ignore_index=True)
+
+
+def case_host_extraction(data):
+    import host_extraction
+
+    df = _enriched(data)[["episodeDescription"]]
+
+    def run():
+        host_extraction._extract_hosts.cache_clear()
+        host_extraction.add_hosts(df)
+    return run
+
+
+def case_artist_gender_aggregation(data):
+    import artist_gender
+
+    artist_strings = _enriched(data)["artistString"]
+    artists = artist_gender.split_artist_strings(artist_strings)["artist"].unique()
+    # every individual artist is already known, so only splitting and aggregating is timed, no lookups
+    known = {artist: synthetic.GENDERS[zlib.crc32(artist.encode()) % 4] for artist in artists}
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            artist_gender.resolve_artist_genders(artist_strings, dict(known))
+    return run
+
+
+def case_normalize_names(data):
+    import validator
+
+    plays = sum(1 for _ in open(data / "enriched" / "p3_2024.csv", encoding="utf-8")) - 1
+    hosts = synthetic.make_host_strings(plays)
+    return lambda: [validator.normalize_names(host) for host in hosts]
+
+
+def case_count_cube_build(data):
+    from count_cube import CountCube
+
+    filenames = sorted(path.name for path in (data / "enriched").glob("*.csv"))
+
+    def run():
+        cube = CountCube(data / "cube-build")
+        for filename in filenames:
+            cube.add(filename, pd.read_csv(data / "enriched" / filename, usecols=["localTime", "channel",
+                                                                                 "episodeTitle", "gender"]))
+    return run
+
+
+def case_plot_tables(data):
+    import render_plots
+    from count_cube import CountCube
+
+    cube = CountCube(data / "cube")
+    cube.update(data / "enriched", render_plots.FILES_2024)
+    return lambda: [query(cube) for query, _ in render_plots.FIGURES.values()]
+
+
+# name -> setup function taking the dataset folder and returning the function to time
+CASES = {
+    "episode_tracks_to_rows": case_episode_tracks_to_rows,
+    "reform_datasets_to_minimal": case_reform_datasets_to_minimal,
+    "host_extraction": case_host_extraction,
+    "artist_gender_aggregation": case_artist_gender_aggregation,
+    "normalize_names": case_normalize_names,
+    "count_cube_build": case_count_cube_build,
+    "plot_tables": case_plot_tables,
+}
+
+
+def measure(run, repeat, min_seconds=1.0):
+    """ Returns the best timing of run(), in seconds. It runs at least repeat times, and quick
+    cases are run again until min_seconds have passed, so their best time is stable """
+    times = []
+    while len(times) < repeat or sum(times) < min_seconds and len(times) < 100:
+        t0 = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def calibrate():
+    """ Returns the best time of a fixed workload (Python string handling and a pandas groupby),
+    measured next to the cases so times of runs on a busier or slower machine can be compared """
+    df = pd.DataFrame({"key": [f"k{i % 997}" for i in range(200_000)], "value": range(200_000)})
+
+    def run():
+        ",".join(sorted({s.upper() for s in df["key"]}))
+        df.groupby("key")["value"].sum()
+    return measure(run, 5, 1.0)
+
+
+def machine():
+    return {"machine": platform.machine(), "processor": platform.processor(), "python": platform.python_version(),
+            "pandas": pd.__version__}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scale", choices=list(synthetic.SCALES), default="1x")
+    ap.add_argument("--only", nargs="+", choices=list(CASES), help="Only these cases")
+    ap.add_argument("--repeat", type=int, default=3, help="Timings per case, the best one counts")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="Slowdown over the baseline that is a regression")
+    ap.add_argument("--save", action="store_true", help="Store the times as the baselines of this scale")
+    ap.add_argument("--data", help="Dataset written by synthetic.py at this scale; default generate one")
+    args = ap.parse_args()
+
+    try:
+        baselines = json.loads(BASELINES_FILE.read_text())
+    except (OSError, ValueError):
+        baselines = {}
+    stored = baselines.get(args.scale, {})
+    if stored and stored.get("machine") != machine():
+        print(f"note: the {args.scale} baselines were stored on another setup: {stored.get('machine')}")
+
+    results = {}
+    reference = calibrate()
+    # the baselines, scaled by how much slower or faster the reference workload runs now
+    speed = reference / stored["reference"] if stored.get("reference") else 1.0
+    with tempfile.TemporaryDirectory() as tmp:
+        data = Path(args.data) if args.data else Path(tmp)
+        if not args.data:
+            t0 = time.perf_counter()
+            counts = synthetic.write_dataset(data, args.scale)
+            print(f"{args.scale}: " + ", ".join(f"{n:,} {what}" for what, n in counts.items())
+                  + f" (generated in {time.perf_counter() - t0:.1f}s)")
+        print(f"reference workload: {reference:.3f}s" + (f", {speed:.2f}x its baseline" if stored else ""))
+
+        print(f"\n{'case':<28} {'seconds':>9} {'baseline':>9} {'change':>8}")
+        regressions = []
+        for name in args.only or CASES:
+            run = CASES[name](data)
+            seconds = measure(run, args.repeat)
+            baseline = stored.get("cases", {}).get(name)
+            if baseline is None:
+                results[name] = seconds
+                print(f"{name:<28} {seconds:>9.3f} {'':>9} {'':>8}  new")
+                continue
+            if seconds > baseline * speed * (1 + args.tolerance):
+                # a slow timing is measured once more before it counts, to rule out a busy moment
+                seconds = min(seconds, measure(run, args.repeat))
+            results[name] = seconds
+            change = seconds / (baseline * speed) - 1
+            status = "REGRESSION" if change > args.tolerance else ""
+            if status:
+                regressions.append(name)
+            print(f"{name:<28} {seconds:>9.3f} {baseline * speed:>9.3f} {change:>+7.0%}  {status}")
+
+    if args.save:
+        if stored.get("machine") == machine() and args.only:
+            # keep the other cases, on the scale of the new reference time
+            results = {**{name: t * speed for name, t in stored["cases"].items()}, **results}
+        baselines[args.scale] = {"machine": machine(), "reference": reference, "cases": results}
+        BASELINES_FILE.write_text(json.dumps(baselines, indent=1) + "\n")
+        print(f"\nstored the {args.scale} baselines in {BASELINES_FILE.name}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Synthetic DR playlist pages and episode JSON, shaped like the responses dr_scraper.py parses,
+and synthetic play logs shaped like the scraped and the enriched CSV files.
+
+Used by the benchmarks and the local stand-in server so scraper changes can be measured
+without hitting dr.dk. Run on its own, it writes a whole dataset at a given scale, where 1x
+is about the October 2025 scrape (3 channels × 31 days):
+
+    python scripts/benchmarks/synthetic.py /tmp/synthetic --scale 10
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import zlib
+import time
+from datetime import date as Date, datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "web_scraper"))
+
+ARTISTS = [
+    "Arctic Monkeys", "Florence + The Machine", "Svea S", "Billie Eilish", "Harry Styles",
+    "The Minds Of 99", "Tobias Rahim", "Dua Lipa", "Kendrick Lamar", "Rosalía",
+    "Lukas Graham", "MØ", "Fred again..", "Jada", "Benjamin Hav", "Kesi",
+]
+TITLES = ["Go' Morgen P3", "Drømmeholdet", "Musikchefen", "P3 Guld", "Bangers med Ena", "Lågsus"]
+# DR's pages are in Danish time
+DR_TZ = ZoneInfo("Europe/Copenhagen")
+
+
+def episode_slugs(n, date, seed=0):
+    """Return ``n`` unique slugs in the ``{title}-{production number}`` shape DR uses."""
+    rnd = random.Random(f"{seed}-{date}")
+    return [f"{slugify(rnd.choice(TITLES))}-{11802500000 + i}" for i in range(n)]
+
+
+def slugify(title):
+    title = title.lower().translate(str.maketrans({"æ": "ae", "ø": "oe", "å": "aa", "'": None}))
+    return title.replace(" ", "-")
+
+
+def make_playlist_html(channel, date, slugs, build_id="synthetic-build", filler=400, embed_episodes=True):
+    """Render a Next.js-style playlist page: ``__NEXT_DATA__`` blob plus one anchor per episode.
+
+    ``filler`` adds unrelated markup so the page has roughly the weight of the real one.
+    With ``embed_episodes`` the episode list is also part of the page props, as on dr.dk.
+    """
+    page_props = {"channel": channel, "date": date}
+    if embed_episodes:
+        page_props["episodes"] = [
+            {
+                "slug": slug,
+                "title": slug.rsplit("-", 1)[0].replace("-", " ").title(),
+                "productionNumber": slug.rsplit("-", 1)[-1],
+                "href": f"/lyd/playlister/{channel}/{date}/{slug}",
+            }
+            for slug in slugs
+        ]
+    next_data = {
+        "props": {"pageProps": page_props},
+        "page": "/playlister/[channel]/[date]",
+        "query": {"channel": channel, "date": date},
+        "buildId": build_id,
+    }
+    anchors = "\n".join(
+        f'<li><a class="episode" href="/lyd/playlister/{channel}/{date}/{slug}">'
+        f'<span>{slug}</span></a></li>'
+        for slug in slugs
+    )
+    noise = "\n".join(
+        f'<div class="card" data-i="{i}"><a href="/lyd/program/{i}">Program {i}</a>'
+        f'<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p></div>'
+        for i in range(filler)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Playlister</title>"
+        f'<script src="/lyd/_next/static/{build_id}/_buildManifest.js" defer></script></head>'
+        f"<body><div id=\"__next\">{noise}<ul>{anchors}</ul></div>"
+        f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'
+        "</body></html>"
+    )
+
+
+def make_episode_json(channel, date, slug, n_tracks=15, seed=0):
+    """Episode JSON as served from ``/lyd/_next/data/{buildId}/da/playlister/...``.
+
+    Like on dr.dk, ``playedTime`` is Copenhagen time with its UTC offset (+01:00 or +02:00)
+    and ``startTime`` is UTC.
+    """
+    rnd = random.Random(f"{seed}-{channel}-{date}-{slug}")
+    # the episode starts on a half hour of the day in Copenhagen; the rest is counted in UTC so
+    # the track times stay right across a daylight saving change
+    start = datetime.fromisoformat(f"{date}T00:00:00").replace(tzinfo=DR_TZ) \
+        + timedelta(minutes=rnd.randrange(0, 24 * 60, 30))
+    start = start.astimezone(timezone.utc)
+    points = []
+    played = start
+    for t in range(n_tracks):
+        played += timedelta(seconds=rnd.randint(150, 330))
+        artists = rnd.sample(ARTISTS, rnd.choice([1, 1, 1, 2]))
+        points.append({
+            "playedTime": played.astimezone(DR_TZ).isoformat(timespec="seconds"),
+            "title": f"Track {t} {rnd.randint(0, 9999)}",
+            "durationMilliseconds": rnd.randint(120000, 300000),
+            "classical": False,
+            "description": None,
+            "trackUrn": f"urn:dr:music:track:{rnd.getrandbits(48):x}",
+            "roles": [
+                {"name": a, "role": "Hovedkunstner", "artistUrn": f"urn:dr:music:artist:{zlib.crc32(a.encode())}"}
+                for a in artists
+            ],
+        })
+    return {
+        "pageProps": {
+            "episode": {
+                "title": slug.rsplit("-", 1)[0].replace("-", " ").title(),
+                "slug": slug,
+                "productionNumber": slug.rsplit("-", 1)[-1],
+                "startTime": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "description": "Værter: Oliver Seppo og Thomas Bugge. Musik, snak og gæster hele vejen.",
+            },
+            "playlistIndexPoints": points,
+        },
+        "__N_SSP": True,
+    }
+
+
+def write_scraped_csv(path, channel, dates, episodes_per_day=25, n_tracks=15, seed=0, pages=None):
+    """Write a dr_scraper.py output file for ``channel`` over ``dates`` built from synthetic episodes.
+
+    With ``pages`` (an open text file), every episode JSON is also written to it, one per line.
+    Returns the number of rows written.
+    """
+    import dr_scraper
+
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=dr_scraper.HEADERS)
+        w.writeheader()
+        for date in dates:
+            for slug in episode_slugs(episodes_per_day, date, seed):
+                page = make_episode_json(channel, date, slug, n_tracks, seed)
+                if pages is not None:
+                    pages.write(json.dumps({"channel": channel, "date": date, "slug": slug, "page": page}) + "\n")
+                props = page["pageProps"]
+                ep = props["episode"]
+                url = f"https://www.dr.dk/lyd/playlister/{channel}/{date}/{slug}"
+                batch = dr_scraper.episode_tracks_to_rows(date, channel, ep, props["playlistIndexPoints"],
+                                                          ep["description"], url)
+                w.writerows(batch)
+                rows += len(batch)
+    return rows
+
+
+# the Friday plot in experiments.ipynb merges these into one show each
+TITLE_VARIANTS = {
+    "Bangers med Ena": ["Bangers med Ena", "Bangers med Ena - fredagsudgaven", "Sommerbangers", "P3 med Ena Cosovic"],
+    "Drømmeholdet": ["Drømmeholdet", "Drømmeholdet: Fredagsfest"],
+    "Musikchefen": ["Musikchefen", "Musikchefen - årets bedste"],
+    "P3 Guld": ["P3 Guld", "P3 Guld: 90'erne"],
+}
+GENDERS = ["male", "female", "other", None]
+GENDER_WEIGHTS = [0.45, 0.2, 0.25, 0.1]
+FIRST_NAMES = ["Mo", "Laila", "Marie", "Oliver", "Thomas", "Andrew", "Nikkie", "Mathilde", "Anton", "Liva", "Kajsa",
+               "Frederik", "Julie", "Chris", "Mathias"]
+LAST_NAMES = ["Hobitz", "Seppo", "Bugge", "Moyo", "Niyibigira", "Muus", "Ringdal", "Manghezi", "Jensen",
+              "Rahbek", "Birch", "Anker", "Kousholt", "Knudsen"]
+SYLLABLES = ["ka", "lo", "mi", "ra", "ne", "to", "sa", "vi", "du", "el", "yn", "or", "ba", "ze", "qu", "an"]
+# one artist, or a collaboration in one of the forms artist_gender.parse_artist_string splits
+COLLABORATIONS = ["{0}", "{0}", "{0}", "{0}", "{0} & {1}", "{0} feat. {1}", "{0}, {1}", "{0} ft. {1} & {2}"]
+
+
+def artist_pool(n, seed=0):
+    """``n`` made-up artist names, on top of the well-known ``ARTISTS``."""
+    rnd = random.Random(f"artists-{seed}")
+    names = list(ARTISTS)
+    while len(names) < n:
+        names.append(" ".join("".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3))).capitalize()
+                              for _ in range(rnd.choice([1, 2]))))
+    return names[:n]
+
+
+def make_host_strings(n, seed=0):
+    """``n`` host annotations written the ways people do ("Mo og Laila", "Laila, Mo", "Mathias,")."""
+    rnd = random.Random(f"hosts-{seed}")
+    forms = ["{0}", "{0} og {1}", "{1}, {0}", "{0} & {1}", "{0},", "{0} and {1}", "{0}, {1} og {2}", ""]
+    return [rnd.choice(forms).format(*(f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}" for _ in range(3)))
+            for _ in range(n)]
+
+
+def make_plays(channel, dates, plays_per_day=380, seed=0):
+    """Enriched plays (the columns of the ``{channel}_2024.csv`` tables) of ``channel`` over ``dates``.
+
+    Each hour of a day belongs to one show, titles sometimes carry a suffix or a summer name,
+    every episode has its own description (with a guest and the hosts), about a third of
+    the artist strings are collaborations, and every play gets a gender like the MusicBrainz
+    enrichment would.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(zlib.crc32(f"{seed}-{channel}".encode()))
+    days = pd.DatetimeIndex(pd.to_datetime(list(dates))).tz_localize("Europe/Copenhagen")
+    n = len(days) * plays_per_day
+    day = np.repeat(np.arange(len(days)), plays_per_day)
+    seconds = np.sort(rng.integers(0, 24 * 3600, size=(len(days), plays_per_day)), axis=1).ravel()
+    local = (days[day] + pd.to_timedelta(seconds, unit="s")).tz_convert("Europe/Copenhagen")
+    hour = local.hour.to_numpy()
+    show = np.array(TITLES)[(hour // 3 + days[day].weekday.to_numpy()) % len(TITLES)]
+    variants = rng.integers(0, 12, size=n)  # 12 is divisible by the number of variants of every title
+    titles = [TITLE_VARIANTS.get(s, [s])[k % len(TITLE_VARIANTS.get(s, [s]))] for s, k in zip(show, variants)]
+    episode_start = local.tz_convert("UTC").floor("h").astype(str)
+    descriptions = {}
+    for title, start in zip(titles, episode_start):
+        if (title, start[:10]) not in descriptions:
+            guest, host1, host2 = (f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(3))
+            descriptions[title, start[:10]] = (f"{title}: {guest} er gæst i dag. Værter: {host1} og {host2}. "
+                                               "Musik, snak og gæster hele vejen.")
+    pool = artist_pool(3000, seed)
+    forms = rng.integers(0, len(COLLABORATIONS), size=n)
+    picks = rng.integers(0, len(pool), size=(n, 3))
+    artists = [COLLABORATIONS[f].format(pool[a], pool[b], pool[c]) for f, (a, b, c) in zip(forms, picks)]
+    return pd.DataFrame({
+        "localTime": local.astype(str),
+        "channel": channel.upper(),
+        "episodeTitle": titles,
+        "episodeStartTime": episode_start,
+        "episodeDescription": [descriptions[title, start[:10]] for title, start in zip(titles, episode_start)],
+        "trackTitle": [f"Track {i}" for i in rng.integers(0, 5000, size=n)],
+        "artistString": artists,
+        "gender": rng.choice(np.array(GENDERS, dtype=object), size=n, p=GENDER_WEIGHTS),
+        "hosts": None,
+    })
+
+
+# scale -> months (blocks of 31 days) per channel
+SCALES = {"1x": 1, "10x": 10, "100x": 100}
+SCRAPED_CHANNELS = ["p3", "p4kbh", "p6beat"]
+ENRICHED_CHANNELS = ["p3", "p4", "p6"]
+EPISODES_PER_DAY = 25  # × 15 tracks ≈ the rows per channel/day in the October 2025 scrape
+PLAYS_PER_DAY = 380
+
+
+def write_dataset(folder, scale="1x", seed=0):
+    """Write a synthetic dataset of ``scale`` (see ``SCALES``) into ``folder``:
+
+    - ``scraped/{channel}_{first day}.csv``: dr_scraper.py output, one file per channel and 31 days
+    - ``pages/{channel}_{first day}.jsonl``: the episode JSON those files were built from
+    - ``enriched/{p3,p4,p6}_2024.csv``: enriched plays from 2024-01-01 on, named like the
+      inputs of experiments.ipynb
+
+    Returns a dict with the number of scraped rows, episode pages and enriched plays.
+    """
+    folder = Path(folder)
+    for sub in ["scraped", "pages", "enriched"]:
+        (folder / sub).mkdir(parents=True, exist_ok=True)
+    counts = {"scraped rows": 0, "episode pages": 0, "enriched plays": 0}
+    first = Date(2025, 10, 1)
+    for block in range(SCALES[scale]):
+        dates = [(first + timedelta(days=31 * block + d)).isoformat() for d in range(31)]
+        for channel in SCRAPED_CHANNELS:
+            name = f"{channel}_{dates[0]}"
+            with open(folder / "pages" / f"{name}.jsonl", "w", encoding="utf-8") as pages:
+                counts["scraped rows"] += write_scraped_csv(folder / "scraped" / f"{name}.csv", channel, dates,
+                                                            EPISODES_PER_DAY, seed=seed, pages=pages)
+            counts["episode pages"] += len(dates) * EPISODES_PER_DAY
+    days = [(Date(2024, 1, 1) + timedelta(days=d)).isoformat() for d in range(31 * SCALES[scale])]
+    for channel in ENRICHED_CHANNELS:
+        plays = make_plays(channel, days, PLAYS_PER_DAY, seed)
+        plays.to_csv(folder / "enriched" / f"{channel}_2024.csv", index=False)
+        counts["enriched plays"] += len(plays)
+    return counts
+
+
+def read_pages(path):
+    """Yield ``(channel, date, slug, page)`` for every episode JSON written by ``write_dataset``."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            yield entry["channel"], entry["date"], entry["slug"], entry["page"]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Writes a synthetic dataset (scraped CSVs, episode JSON, enriched plays)")
+    ap.add_argument("folder")
+    ap.add_argument("--scale", choices=list(SCALES), default="1x")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    counts = write_dataset(args.folder, args.scale, args.seed)
+    print(", ".join(f"{n:,} {what}" for what, n in counts.items()) + f" in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Renders the report plots of experiments.ipynb to plots/ without a notebook kernel.
+
+Every figure is a query on the count cube (see scraped_processing/count_cube.py) and a draw
+function of the query's result. The figures are drawn in a process pool, and a figure is
+skipped when neither its input data nor its draw function changed since the SVG was last
+written (the hashes are kept in plots/.render_manifest.json).
+
+    python scripts/render_plots.py
+    python scripts/render_plots.py --force --only p3_hourly_gender_distribution
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from matplotlib.lines import Line2D  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "scraped_processing"))
+
+from count_cube import CountCube  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+FILES_2024 = ["p3_2024.csv", "p4_2024.csv", "p6_2024.csv"]
+P3 = ["p3_2024.csv"]
+MANIFEST_FILE = ".render_manifest.json"
+
+facecolor = '#F5F5F5'
+# Standard gender color mapping for consistency across all plots
+gender_color_map = {
+    'male': '#3498db',      # Blue
+    'female': '#e74c3c',    # Red
+    'other': '#95a5a6'      # Gray
+}
+
+
+def set_style():
+    """ The plot style of experiments.ipynb, with SVGs that are the same for the same figure """
+    import seaborn as sns
+
+    sns.set_style('whitegrid')
+    plt.rcParams['figure.figsize'] = (12, 6)
+    plt.rcParams['svg.hashsalt'] = 'report'
+
+
+# --- inputs: cube queries -------------------------------------------------------------------
+
+def channel_counts(cube):
+    return cube.query(['channel', 'gender'], sources=FILES_2024,
+                      genders=['male', 'female', 'other']).unstack(fill_value=0)
+
+
+def weekly_counts(cube):
+    return cube.query(['weekday', 'gender'], sources=P3, genders=['male', 'female', 'other']).unstack(fill_value=0)
+
+
+def hourly_counts(cube):
+    return {
+        'counts': cube.query(['hour', 'gender'], sources=P3, genders=['male', 'female']).unstack(fill_value=0),
+        'total': cube.query(sources=P3),
+    }
+
+
+def friday_show_counts(cube):
+    return (
+        cube.query(['show', 'gender'], sources=P3, weekdays=[4])
+        .unstack()
+        .reindex(columns=['female', 'male', 'other'])
+    )
+
+
+# --- figures: functions of their input --------------------------------------------------------
+
+def draw_gender_by_channel(gender_by_channel):
+    fig, ax = plt.subplots(1, 1, figsize=(10, 6))
+
+    gender_by_channel_pct = gender_by_channel.div(gender_by_channel.sum(axis=1), axis=0) * 100
+    channel_totals = gender_by_channel.sum(axis=1)
+
+    bar_colors = [gender_color_map.get(gender.lower(), '#95a5a6') for gender in gender_by_channel_pct.columns]
+    gender_by_channel_pct.plot(kind='bar', ax=ax, color=bar_colors, width=0.7)
+    ax.set_title('Gender Distribution by Channel (%)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Channel', fontsize=12)
+    ax.set_ylabel('Percentage', fontsize=12)
+    ax.legend(title='Gender')
+
+    new_labels = [f"{channel}\n(n={channel_totals[channel]:,})" for channel in channel_totals.index]
+    ax.set_xticklabels(new_labels, rotation=0, fontsize=12)
+    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda y, _: f'{int(y)}%'))
+    ax.set_facecolor(facecolor)
+    return fig
+
+
+def draw_weekly(p3_grouped_dayofweek):
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.set_facecolor(facecolor)
+
+    for gender in ['female', 'male', 'other']:
+        ax.plot(p3_grouped_dayofweek.index, p3_grouped_dayofweek[gender],
+                color=gender_color_map[gender], linewidth=2.5, marker='o', markersize=8, label=gender.capitalize())
+
+    # lines on Friday (day 4) showing the difference between male/other and female
+    friday_idx = 4
+    friday_female = p3_grouped_dayofweek.loc[friday_idx, 'female']
+    friday_male = p3_grouped_dayofweek.loc[friday_idx, 'male']
+    friday_other = p3_grouped_dayofweek.loc[friday_idx, 'other']
+    ax.plot([friday_idx, friday_idx], [friday_female, friday_male],
+            color='gray', linestyle='--', linewidth=2, alpha=0.7, zorder=1)
+    ax.plot([friday_idx, friday_idx], [friday_female, friday_other],
+            color='gray', linestyle='--', linewidth=2, alpha=0.7, zorder=1)
+
+    male_diff = friday_male - friday_female
+    other_diff = friday_other - friday_female
+    male_pct_diff = (male_diff / friday_female) * 100
+    other_pct_diff = (other_diff / friday_female) * 100
+
+    mid_male = (friday_male + friday_female) / 2 + 100
+    ax.text(friday_idx + 0.15, mid_male, f'Δ Male-Female\n{male_diff:,.0f} (+{male_pct_diff:.1f}%)',
+            fontsize=9, va='center', ha='left', color='dimgray')
+    mid_other = (friday_other + friday_female) / 2 + 50
+    ax.text(friday_idx - 0.05, mid_other, f'Δ Other-Female\n{other_diff:,.0f} (+{other_pct_diff:.1f}%)',
+            fontsize=9, va='center', ha='right', color='dimgray')
+
+    ax.text(friday_idx - 0.15, friday_female, f'{friday_female:,.0f}',
+            fontsize=10, va='center', ha='right', fontweight='bold', color=gender_color_map['female'])
+    ax.text(friday_idx + 0.15, friday_male, f'{friday_male:,.0f}',
+            fontsize=10, va='center', ha='left', fontweight='bold', color=gender_color_map['male'])
+    ax.text(friday_idx - 0.15, friday_other, f'{friday_other:,.0f}',
+            fontsize=10, va='center', ha='right', fontweight='bold', color=gender_color_map['other'])
+
+    ax.set_xticks(np.arange(0, 7, 1))
+    ax.set_xticklabels(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+    ax.set_title('P3: Gender Distribution Over Days of the Week (2024)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Day of the Week', fontsize=12)
+    ax.set_ylabel('Number of Tracks Played', fontsize=12)
+    ax.spines[['top', 'right']].set_visible(False)
+    ax.legend(title='Gender')
+    ax.grid(True, alpha=0.3)
+    return fig
+
+
+def draw_hourly(data):
+    hourly_gender_counts, total_tracks = data['counts'], data['total']
+    fig, ax = plt.subplots(figsize=(20, 8))
+
+    hourly_gender_pct = hourly_gender_counts.div(hourly_gender_counts.sum(axis=1), axis=0) * 100
+
+    ax.set_facecolor(facecolor)
+    fig.patch.set_facecolor('white')
+
+    # off-peak hours (0:00-3:00) in red, peak hours in yellow
+    ax.axvspan(0, 3, alpha=0.15, color='red', zorder=1)
+    for start, end in [(6, 9), (12, 18)]:
+        ax.axvspan(start, end, alpha=0.15, color='yellow', zorder=1)
+
+    hours = hourly_gender_pct.index
+    ax.plot(hours, hourly_gender_pct['male'], marker='o', linewidth=3,
+            color=gender_color_map['male'], label='Male %', markersize=8, zorder=3)
+    ax.plot(hours, hourly_gender_pct['female'], marker='o', linewidth=3,
+            color=gender_color_map['female'], label='Female %', markersize=8, zorder=3)
+    ax.axhline(y=50, color='gray', linestyle='--', linewidth=1.5, alpha=0.5, label='50% (Equal)', zorder=2)
+
+    for start, end in [(0, 3), (6, 9), (12, 18)]:
+        peak_counts = hourly_gender_counts[(hourly_gender_counts.index >= start) & (hourly_gender_counts.index < end)]
+        total = int(peak_counts.to_numpy().sum())
+        if total > 0:
+            male_pct = peak_counts['male'].sum() / total * 100
+            female_pct = peak_counts['female'].sum() / total * 100
+            stats_text = f"{start:02d}:00-{end:02d}:00\n♂ {male_pct:.1f}%\n♀ {female_pct:.1f}%\nn={total:,}"
+            ax.text((start + end) / 2, 70, stats_text,
+                    ha='center', va='center', fontsize=13, fontweight='bold',
+                    bbox=dict(boxstyle='round,pad=0.7', facecolor='white', edgecolor='gray', alpha=0.95),
+                    zorder=4)
+
+    fig.text(0.99, 0.01, 'Peak/off-peak hours source: dr.dk/presse/flertallet-hoerer-radio-om-morgenen',
+             ha='right', va='bottom', fontsize=8, style='italic', color='gray')
+
+    ax.set_xlabel('Hour of Day', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Percentage (%)', fontsize=14, fontweight='bold')
+    ax.set_title(f'P3 Full Year 2024 - Gender Distribution by Hour with Peak & Off-Peak Hours Highlighted\n'
+                 f'(n={total_tracks:,} total tracks)', fontsize=16, fontweight='bold', pad=20)
+    ax.set_xlim(-0.5, 23.5)
+    ax.set_xticks(range(0, 24, 2))
+    ax.set_xticklabels([f'{h:02d}:00' for h in range(0, 24, 2)], rotation=45, fontsize=12)
+    ax.set_ylim(0, 100)
+    ax.set_yticks(range(0, 101, 10))
+    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda y, _: f'{int(y)}%'))
+
+    legend_elements = [
+        Line2D([0], [0], marker='o', color=gender_color_map['male'], linewidth=3, markersize=8, label='Male %'),
+        Line2D([0], [0], marker='o', color=gender_color_map['female'], linewidth=3, markersize=8, label='Female %'),
+        Line2D([0], [0], color='gray', linestyle='--', linewidth=1.5, label='50% (Equal)'),
+        Line2D([0], [0], marker='s', color='w', markerfacecolor='red', markersize=10, alpha=0.3,
+               label='Off Peak (00:00-03:00)', markeredgecolor='gray'),
+        Line2D([0], [0], marker='s', color='w', markerfacecolor='yellow', markersize=10, alpha=0.3,
+               label='Peak Hours (06:00-09:00, 12:00-18:00)', markeredgecolor='gray'),
+    ]
+    ax.legend(handles=legend_elements, title='Gender Distribution', loc='upper right', fontsize=10, framealpha=0.95)
+    ax.grid(True, alpha=0.3, zorder=0)
+    return fig
+
+
+def draw_friday_shows(grouped_gender):
+    grouped_norm = grouped_gender.div(grouped_gender.sum(axis=1), axis=0)
+    grouped_norm = grouped_norm.sort_values(by=['female', 'male', 'other'], ascending=False)
+
+    # the 4 shows with the lowest female share, and the shows discussed in the report
+    top_4 = grouped_norm.tail(4)
+    specific_shows = ['Go\' Morgen P3', 'Drømmeholdet', 'Musikchefen']
+    specific_data = grouped_norm.loc[grouped_norm.index.isin(specific_shows)]
+    selected_shows = pd.concat([top_4, specific_data])
+    selected_shows = selected_shows[~selected_shows.index.duplicated(keep='first')]
+    selected_shows = selected_shows.sort_values(by='female', ascending=False)
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.set_facecolor(facecolor)
+    selected_shows.plot(
+        kind='barh',
+        ax=ax,
+        width=0.8,
+        color=[gender_color_map['female'], gender_color_map['male'], gender_color_map['other']]
+    )
+    for container in ax.containers:
+        labels = [f'{v.get_width()*100:.0f}%' if v.get_width() > 0 else '' for v in container]
+        ax.bar_label(container, labels=labels, padding=3, fontsize=9)
+
+    ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: f'{x*100:.0f}%'))
+    ax.set_xlabel("Gender Distribution (%)", fontsize=12)
+    ax.set_ylabel("Radio Shows", fontsize=12)
+    ax.set_title("P3: Gender Distribution by Radio Show on Fridays (2024)\nSelected Shows",
+                 fontsize=14, fontweight='bold')
+    ax.spines[['top', 'right']].set_visible(False)
+    ax.legend(title="Gender", loc='lower right', fontsize=10)
+    return fig
+
+
+# name of the SVG in plots/ -> (query, draw function)
+FIGURES = {
+    "gender_distribution_by_channel": (channel_counts, draw_gender_by_channel),
+    "p3_gender_distribution_weekly": (weekly_counts, draw_weekly),
+    "p3_hourly_gender_distribution": (hourly_counts, draw_hourly),
+    "p3_friday_shows_gender_distribution": (friday_show_counts, draw_friday_shows),
+}
+
+
+# --- rendering --------------------------------------------------------------------------------
+
+def data_hash(data):
+    """ Returns a hash of a figure's input: a DataFrame, a number or a dict of those """
+    h = hashlib.sha256()
+    items = sorted(data.items()) if isinstance(data, dict) else [("", data)]
+    for key, value in items:
+        h.update(key.encode())
+        h.update(value.to_json(orient="split").encode() if isinstance(value, pd.DataFrame) else repr(value).encode())
+    return h.hexdigest()
+
+
+def code_hash(draw):
+    """ Returns a hash of what a figure's look depends on: its draw function, the colours and the library versions """
+    import seaborn as sns
+
+    source = inspect.getsource(draw) + inspect.getsource(set_style)
+    return hashlib.sha256(f"{source}{facecolor}{gender_color_map}{matplotlib.__version__}{sns.__version__}"
+                          .encode()).hexdigest()
+
+
+def render(name, data, out_dir):
+    """ Draws one figure and saves it as out_dir/name.svg; runs in a worker process
+
+    returns (name, seconds)
+    """
+    t0 = time.perf_counter()
+    set_style()
+    fig = FIGURES[name][1](data)
+    fig.tight_layout()
+    path = Path(out_dir) / f"{name}.svg"
+    tmp = path.with_suffix(".tmp")
+    fig.savefig(tmp, format='svg', bbox_inches='tight', metadata={'Date': None})
+    plt.close(fig)
+    os.replace(tmp, path)
+    return name, time.perf_counter() - t0
+
+
+def render_all(cube, out_dir, names=None, workers=None, force=False):
+    """ Renders the figures whose input or code changed since they were last rendered
+
+    cube -- the CountCube with the 2024 files
+    out_dir -- folder of the SVGs and the render manifest
+    names (list, optional): -- figures to consider; default all of FIGURES
+    workers (int, optional): -- processes to draw with; default one per figure, up to the CPU count
+    force (bool, optional): -- render even if nothing changed
+
+    returns the names of the figures that were rendered
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / MANIFEST_FILE
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    todo = {}
+    for name in names or FIGURES:
+        query, draw = FIGURES[name]
+        data = query(cube)
+        key = {"input": data_hash(data), "code": code_hash(draw)}
+        if not force and manifest.get(name) == key and (out_dir / f"{name}.svg").exists():
+            print(f"{name}: unchanged")
+            continue
+        todo[name] = (data, key)
+
+    if todo:
+        workers = workers or min(len(todo), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render, name, data, out_dir) for name, (data, _) in todo.items()]
+            for future in as_completed(futures):
+                name, seconds = future.result()
+                manifest[name] = todo[name][1]
+                print(f"{name}: rendered in {seconds:.2f}s")
+        tmp = manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp, manifest_path)
+    return list(todo)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Renders the report plots from the count cube")
+    ap.add_argument("--data", default=str(ROOT / "data"), help="Folder with the 2024 CSV files")
+    ap.add_argument("--cube", default=str(ROOT / "data" / "store" / "cube"), help="Folder of the count cube")
+    ap.add_argument("--out", default=str(ROOT / "plots"), help="Folder to write the SVGs to")
+    ap.add_argument("--only", nargs="+", choices=list(FIGURES), help="Only these figures")
+    ap.add_argument("--workers", type=int, help="Processes to draw with")
+    ap.add_argument("--force", action="store_true", help="Render even if input and code are unchanged")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    cube = CountCube(args.cube)
+    cube.update(args.data, FILES_2024)
+    rendered = render_all(cube, args.out, args.only, args.workers, args.force)
+    print(f"rendered {len(rendered)} of {len(args.only or FIGURES)} figures in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+"""
+Artist gender lookup for the gender enrichment notebook: parsing of artist strings,
+MusicBrainz queries (live API or a local index, see musicbrainz_index.py) and the
+aggregation rules for groups and collaborations.
+"""
+import functools
+import os
+import re
+import time
+from difflib import SequenceMatcher
+
+import musicbrainzngs
+import pandas as pd
+
+from name_matcher import normalize_artist_name
+
+# featuring / feat. / ft. (any case), " & " and ", " all separate artists, matched in a single pass
+ARTIST_SEPARATOR = re.compile(r'\s+(?i:featuring|feat\.|ft\.)\s+|\s+&\s+|,\s+')
+MULTIPLE_ARTISTS = re.compile(r'(?i:featuring|feat\.|ft\.)| & |, ')
+
+
+def parse_artist_string(artist_string):
+    """
+    Parse an artist string to extract individual artist names.
+    
+    Handles:
+    - "Artist1 featuring Artist2"
+    - "Artist1 feat. Artist2"
+    - "Artist1 ft. Artist2"
+    - "Artist1 & Artist2"
+    - "Artist1, Artist2"
+    - Combinations of the above
+    
+    Args:
+        artist_string (str): The artist name(s)
+    
+    Returns:
+        list: List of individual artist names, or single item list if no collaboration detected
+    """
+    if pd.isna(artist_string):
+        return []
+    
+    artist_string = str(artist_string)
+    
+    # Split on the collaboration indicators and clean up
+    artists = [name.strip() for name in ARTIST_SEPARATOR.split(artist_string) if name.strip()]
+    
+    return artists if artists else [artist_string]
+
+
+def is_multiple_artists(artist_string):
+    """
+    Detect if the artist string contains multiple artists.
+    
+    Returns True if:
+    - Contains 'featuring', 'feat.', 'ft.'
+    - Contains ' & ' (ampersand with spaces)
+    - Contains ', ' (comma with space)
+    
+    Args:
+        artist_string (str): The artist name(s)
+    
+    Returns:
+        bool: True if multiple artists detected
+    """
+    if pd.isna(artist_string):
+        return False
+    
+    # Check for collaboration indicators: 'featuring', 'feat.', 'ft.', ' & ', ', '
+    return MULTIPLE_ARTISTS.search(str(artist_string)) is not None
+
+
+def load_gender_cache(csv_path):
+    """
+    Load existing artist→gender mappings from CSV file.
+    
+    Args:
+        csv_path (Path): Path to cache CSV file
+    
+    Returns:
+        dict: Dictionary mapping artist names to genders
+    """
+    if not os.path.exists(csv_path):
+        print(f"No existing cache found at {csv_path}")
+        return {}
+    
+    try:
+        cache_df = pd.read_csv(csv_path)
+        cache_dict = dict(zip(cache_df['artist'], cache_df['gender']))
+        print(f"Loaded {len(cache_dict)} cached artist→gender mappings")
+        return cache_dict
+    except Exception as e:
+        print(f"Error loading cache: {e}")
+        return {}
+
+
+def save_gender_cache(cache_dict, csv_path):
+    """
+    Save artist→gender mappings to CSV file.
+    
+    Args:
+        cache_dict (dict): Dictionary mapping artist names to genders
+        csv_path (Path): Path to save cache CSV file
+    """
+    try:
+        cache_df = pd.DataFrame([
+            {'artist': artist, 'gender': gender}
+            for artist, gender in cache_dict.items()
+        ])
+        cache_df.to_csv(csv_path, index=False)
+        print(f"Saved {len(cache_dict)} mappings to {csv_path}")
+    except Exception as e:
+        print(f"Error saving cache: {e}")
+
+
+def name_similarity(name1, name2):
+    """
+    Calculate similarity ratio between two artist names.
+    
+    Args:
+        name1 (str): First name
+        name2 (str): Second name
+    
+    Returns:
+        float: Similarity ratio between 0 and 1
+    """
+    norm1 = _normalized(name1)
+    norm2 = _normalized(name2)
+    return SequenceMatcher(None, norm1, norm2).ratio()
+
+
+# the same names are compared over and over, so each one is normalised only once
+_normalized = functools.lru_cache(maxsize=100_000)(normalize_artist_name)
+
+
+def aggregate_genders(genders):
+    """
+    Aggregate a list of genders according to the rules:
+    - All male → 'male'
+    - All female → 'female'
+    - Any mix, non-binary, or other → 'other'
+    
+    Args:
+        genders (list): List of gender strings
+    
+    Returns:
+        str: Aggregated gender
+    """
+    # Filter out None values
+    valid_genders = [g for g in genders if g is not None]
+    
+    if not valid_genders:
+        return 'other'
+    
+    # Get unique genders
+    unique_genders = set(valid_genders)
+    
+    # All male → 'male'
+    if unique_genders == {'male'}:
+        return 'male'
+    
+    # All female → 'female'
+    if unique_genders == {'female'}:
+        return 'female'
+    
+    # Everything else → 'other'
+    return 'other'
+
+
+def get_single_artist_gender(artist_name, cache, similarity_threshold=0.85, debug=False, max_retries=3, index=None):
+    """
+    Query MusicBrainz for a single artist's gender (no features/collaborations).
+    
+    For groups, checks member genders and aggregates them.
+    Now includes name matching to avoid incorrect results and retry logic for network errors.
+    
+    Args:
+        artist_name (str): Name of a single artist
+        cache (dict): Cache dictionary
+        similarity_threshold (float): Minimum similarity ratio for name matching (0-1)
+        debug (bool): If True, print debug information
+        max_retries (int): Maximum number of retry attempts for network errors
+        index (ArtistIndex): Local MusicBrainz index to resolve against instead of the API (no network)
+    
+    Returns:
+        str or None: 'male', 'female', 'other', or None if not found
+    """
+    retry_count = 0
+    last_error = None
+    
+    while retry_count <= max_retries:
+        try:
+            # Search for multiple results to find best match
+            if index is not None:
+                result = {'artist-list': index.fuzzy_search(artist_name, limit=5,
+                                                            similarity_threshold=similarity_threshold)}
+            else:
+                result = musicbrainzngs.search_artists(artist=artist_name, limit=5)
+            
+            if not result['artist-list']:
+                if debug:
+                    print(f"  No results found for '{artist_name}'")
+                return None
+            
+            # Find the best matching artist
+            best_match = None
+            best_similarity = 0
+            
+            for artist in result['artist-list']:
+                # the local index also matches aliases and has already scored the name that matched
+                artist_mb_name = artist.get('matched_name') or artist.get('name', '')
+                similarity = artist.get('similarity')
+                if similarity is None:
+                    similarity = name_similarity(artist_name, artist_mb_name)
+                
+                if debug:
+                    print(f"  Candidate: '{artist_mb_name}' (similarity: {similarity:.2f})")
+                
+                if similarity > best_similarity:
+                    best_similarity = similarity
+                    best_match = artist
+            
+            # Check if best match meets threshold
+            if best_similarity < similarity_threshold:
+                if debug:
+                    print(f"  ❌ Best match '{best_match.get('name', '')}' below threshold "
+                          f"({best_similarity:.2f} < {similarity_threshold})")
+                return None
+            
+            artist = best_match
+            if debug:
+                print(f"  ✓ Matched: '{artist.get('name', '')}' (similarity: {best_similarity:.2f})")
+            
+            artist_type = (artist.get('type') or '').lower()
+            
+            # If it's a group, check member genders
+            if artist_type == 'group':
+                artist_id = artist.get('id')
+                if artist_id:
+                    return get_group_gender(artist_id, cache, max_retries=max_retries, index=index)
+                else:
+                    return 'other'
+            else:
+                # Individual artist - return their gender
+                gender = artist.get('gender', None)
+                if gender:
+                    gender = gender.lower()
+                if debug:
+                    print(f"  Gender: {gender}")
+                return gender
+                
+        except musicbrainzngs.NetworkError as e:
+            last_error = e
+            retry_count += 1
+            if retry_count <= max_retries:
+                wait_time = 2 ** retry_count  # Exponential backoff: 2s, 4s, 8s
+                print(f"  ⚠️ Network error for '{artist_name}': {e}")
+                print(f"     Retrying in {wait_time}s... (attempt {retry_count}/{max_retries})")
+                time.sleep(wait_time)
+            else:
+                print(f"  ❌ Failed after {max_retries} retries for '{artist_name}': {e}")
+                return None
+                
+        except Exception as e:
+            print(f"Error querying single artist '{artist_name}': {e}")
+            return None
+    
+    # If we've exhausted retries
+    print(f"❌ Max retries exceeded for '{artist_name}': {last_error}")
+    return None
+
+
+def get_group_gender(artist_id, cache, max_retries=3, index=None):
+    """
+    Query MusicBrainz for group members and determine aggregate gender.
+    Now includes retry logic for network errors.
+    
+    Args:
+        artist_id (str): MusicBrainz artist ID
+        cache (dict): Cache dictionary
+        max_retries (int): Maximum number of retry attempts for network errors
+        index (ArtistIndex): Local MusicBrainz index to read the members from instead of the API
+    
+    Returns:
+        str: 'male' if all members are male, 'female' if all female, 'other' otherwise
+    """
+    if index is not None:
+        member_genders = [(member['gender'] or '').lower() for member in index.members(artist_id)]
+        member_genders = [gender for gender in member_genders if gender]
+        return aggregate_genders(member_genders) if member_genders else 'other'
+
+    retry_count = 0
+    last_error = None
+    
+    while retry_count <= max_retries:
+        try:
+            # Get artist details including members
+            artist_details = musicbrainzngs.get_artist_by_id(
+                artist_id,
+                includes=['artist-rels']
+            )
+            
+            # Extract member relationships
+            artist_info = artist_details.get('artist', {})
+            relations = artist_info.get('artist-relation-list', [])
+            
+            # Get members' genders
+            member_genders = []
+            
+            for relation in relations:
+                if relation.get('type') in ['member of band', 'member']:
+                    member = relation.get('artist', {})
+                    member_gender = member.get('gender', '').lower()
+                    
+                    if member_gender:
+                        member_genders.append(member_gender)
+            
+            # If no members found, return 'other'
+            if not member_genders:
+                return 'other'
+            
+            # Aggregate member genders
+            return aggregate_genders(member_genders)
+            
+        except musicbrainzngs.NetworkError as e:
+            last_error = e
+            retry_count += 1
+            if retry_count <= max_retries:
+                wait_time = 2 ** retry_count  # Exponential backoff
+                print(f"  ⚠️ Network error getting group members for ID {artist_id}: {e}")
+                print(f"     Retrying in {wait_time}s... (attempt {retry_count}/{max_retries})")
+                time.sleep(wait_time)
+            else:
+                print(f"  ❌ Failed after {max_retries} retries for group ID {artist_id}")
+                return 'other'
+                
+        except Exception as e:
+            print(f"Error getting group members for ID {artist_id}: {e}")
+            return 'other'
+    
+    # If we've exhausted retries
+    print(f"❌ Max retries exceeded for group ID {artist_id}")
+    return 'other'
+
+
+def query_musicbrainz_gender(artist_name, cache, similarity_threshold=0.85, debug=False, max_retries=3, index=None):
+    """
+    Query MusicBrainz API for artist gender with caching.
+    
+    Handles:
+    - Single artists: Returns their gender
+    - Groups: Aggregates member genders
+    - Collaborations/Features: Parses artists and aggregates their genders
+    - Network errors: Retries with exponential backoff
+    
+    Aggregation rules:
+    - All male → 'male'
+    - All female → 'female'
+    - Mixed/non-binary/other → 'other'
+    
+    Args:
+        artist_name (str): Name of the artist(s)
+        cache (dict): Cache dictionary to check/update
+        similarity_threshold (float): Minimum similarity ratio for name matching (0-1)
+        debug (bool): If True, print debug information
+        max_retries (int): Maximum number of retry attempts for network errors
+        index (ArtistIndex): Local MusicBrainz index to resolve against instead of the API (no network)
+    
+    Returns:
+        str or None: 'male', 'female', 'other', or None if not found
+    """
+    # Check cache first
+    if artist_name in cache:
+        return cache[artist_name]
+    
+    # Check if this is a collaboration/feature
+    if is_multiple_artists(artist_name):
+        # Parse individual artists
+        individual_artists = parse_artist_string(artist_name)
+        
+        # Query each individual artist
+        individual_genders = []
+        for artist in individual_artists:
+            # Check if individual artist is in cache
+            if artist in cache:
+                gender = cache[artist]
+            else:
+                # Query and cache individual artist
+                gender = get_single_artist_gender(artist, cache, similarity_threshold, debug, max_retries, index)
+                cache[artist] = gender
+            
+            individual_genders.append(gender)
+        
+        # Aggregate the genders
+        aggregated_gender = aggregate_genders(individual_genders)
+        cache[artist_name] = aggregated_gender
+        return aggregated_gender
+    
+    else:
+        # Single artist (or group)
+        gender = get_single_artist_gender(artist_name, cache, similarity_threshold, debug, max_retries, index)
+        cache[artist_name] = gender
+        return gender
+
+
+def split_artist_strings(artist_strings):
+    """
+    Split every distinct artist string into its individual artists, once per string.
+    
+    Args:
+        artist_strings (Series or list): Artist strings, usually heavily repeated (e.g. a play table's artistString)
+    
+    Returns:
+        DataFrame: One row per (artistString, artist) pair, with a multiple column telling
+        whether the string is a collaboration (is_multiple_artists)
+    """
+    unique = pd.Series(pd.unique(pd.Series(artist_strings).dropna().astype(str)), dtype=object)
+    multiple = unique.str.contains(MULTIPLE_ARTISTS)
+    parts = unique[multiple].str.split(ARTIST_SEPARATOR)
+    pairs = pd.DataFrame({'artistString': unique[multiple], 'artist': parts, 'multiple': True}).explode('artist')
+    pairs['artist'] = pairs['artist'].str.strip()
+    pairs = pairs[pairs['artist'] != '']
+    singles = pd.DataFrame({'artistString': unique[~multiple], 'artist': unique[~multiple], 'multiple': False})
+    pairs = pd.concat([pairs, singles]).sort_index(kind='stable')
+    # a string made of separators only is kept as a single artist, like parse_artist_string does
+    missing = unique[~unique.isin(pairs['artistString'])]
+    fallback = pd.DataFrame({'artistString': missing, 'artist': missing, 'multiple': multiple[missing.index]})
+    return pd.concat([pairs, fallback]).reset_index(drop=True)
+
+
+def resolve_artist_genders(artist_strings, cache, similarity_threshold=0.85, debug=False, max_retries=3, index=None,
+                           cache_path=None, save_interval=50):
+    """
+    Resolve the gender of every distinct artist string, looking up each individual artist only once.
+    
+    Gives the same result and fills the cache the same way as calling query_musicbrainz_gender on
+    every distinct string, but strings are split once (split_artist_strings) and an artist that
+    appears in many collaborations is queried once.
+    
+    Args:
+        artist_strings (Series or list): Artist strings, duplicates allowed
+        cache (dict): Cache dictionary to check/update
+        similarity_threshold, debug, max_retries, index: see get_single_artist_gender
+        cache_path (Path): If given, the cache is saved there every save_interval queries and at the end
+        save_interval (int): Queries between cache saves
+    
+    Returns:
+        dict: artistString → gender for every distinct string
+    """
+    pairs = split_artist_strings(artist_strings)
+    pairs = pairs[~pairs['artistString'].isin(cache.keys())]
+    to_query = [artist for artist in pd.unique(pairs['artist']) if artist not in cache]
+    print(f"Artist strings to resolve: {pairs['artistString'].nunique()}, individual artists to query: {len(to_query)}")
+    
+    for i, artist in enumerate(to_query, 1):
+        cache[artist] = get_single_artist_gender(artist, cache, similarity_threshold, debug, max_retries, index)
+        if i % 10 == 0:
+            print(f"Progress: {i}/{len(to_query)} ({i/len(to_query)*100:.1f}%) - Last: {artist[:50]} → {cache[artist]}")
+        if cache_path is not None and i % save_interval == 0:
+            save_gender_cache(cache, cache_path)
+    
+    # collaborations are aggregated over their artists, a single artist (or group) keeps its own gender
+    pairs = pairs.assign(gender=[cache[artist] for artist in pairs['artist']])
+    collaborations = pairs[pairs['multiple']]
+    aggregated = collaborations.groupby('artistString', sort=False)['gender'].agg(list).map(aggregate_genders)
+    singles = pairs[~pairs['multiple']].drop_duplicates('artistString').set_index('artistString')['gender']
+    cache.update(aggregated.to_dict())
+    cache.update(singles.to_dict())
+    if cache_path is not None:
+        save_gender_cache(cache, cache_path)
+    
+    unique = pd.unique(pd.Series(artist_strings).dropna().astype(str))
+    return {artist_string: cache[artist_string] for artist_string in unique}
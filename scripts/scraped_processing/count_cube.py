@@ -0,0 +1,214 @@
+"""
+A materialised count cube of the enriched plays: number of plays per channel, date, hour,
+weekday, show (episodeTitle normalised with SHOW_REPLACEMENTS) and gender.
+
+Every plot in experiments.ipynb is a sum over a few of these dimensions, so the plots query
+the cube instead of re-reading and re-parsing the play logs. A year of three channels is a
+few hundred thousand plays but only tens of thousands of cube cells.
+
+The counts of every source CSV are kept in a Parquet file of their own, named after it, so
+adding a newly scraped day only counts that file, and a changed file replaces exactly its
+own counts. Which files are in the cube is tracked by size and mtime, as in dataset_store.
+
+    python scripts/scraped_processing/count_cube.py data data/store/cube p3_2024.csv p4_2024.csv p6_2024.csv
+"""
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dataset_store import LOCAL_TZ
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ["channel", "date", "hour", "weekday", "show", "gender"]
+SOURCE_COLUMNS = ["localTime", "channel", "episodeTitle", "gender"]
+SOURCES_FILE = "_sources.json"
+
+# the same show under different titles, as cleaned up for the Friday plot in experiments.ipynb
+SHOW_REPLACEMENTS = {
+    r"^Bangers med Ena.*": "Bangers med Ena",
+    r"^Sommerbangers.*": "Bangers med Ena",
+    r"P3 med Ena Cosovic.*": "Bangers med Ena",
+    r"^Drømmeholdet.*": "Drømmeholdet",
+    r"^Carte Blanche.*": "Carte Blanche",
+    r"^Lågsus.*": "Lågsus",
+    r"^Musikchefen.*": "Musikchefen",
+    r"^P3 Pulten.*": "P3 Pulten",
+    r"^Tættere på himlen.*": "Tættere på himlen",
+    r"P3 Guld.*": "P3 Guld",
+    r"P3 Morgen.*": "P3 Morgen",
+    r"Residensen.*": "Residensen",
+    r"SommerMorgen.*": "SommerMorgen",
+}
+
+
+def normalise_shows(titles):
+    """ Returns the episode titles with SHOW_REPLACEMENTS applied, running them once per distinct title """
+    distinct = pd.Series(titles.dropna().unique())
+    shows = distinct.copy()
+    for pattern, replacement in SHOW_REPLACEMENTS.items():
+        shows = shows.str.replace(pattern, replacement, regex=True)
+    return titles.map(dict(zip(distinct, shows)))
+
+
+def count_plays(df):
+    """ Returns the cube cells of a play table: one row per combination of DIMENSIONS with its
+    number of plays. Missing shows and genders are kept as their own (missing) value.
+
+    df -- plays with localTime, channel, episodeTitle and gender columns
+    """
+    local = pd.to_datetime(df["localTime"], utc=True, errors="coerce", format="ISO8601").dt.tz_convert(LOCAL_TZ)
+    keep = local.notna()
+    if not keep.all():
+        logger.warning(f"Skipping {(~keep).sum()} plays without a valid localTime")
+    local = local[keep]
+    dims = pd.DataFrame({
+        "channel": df.loc[keep, "channel"].astype(str),
+        "date": local.dt.tz_localize(None).dt.normalize(),
+        "hour": local.dt.hour.astype("int8"),
+        "weekday": local.dt.weekday.astype("int8"),
+        "show": normalise_shows(df.loc[keep, "episodeTitle"]),
+        "gender": df.loc[keep, "gender"],
+    })
+    return dims.groupby(DIMENSIONS, dropna=False).size().rename("plays").astype("int64").reset_index()
+
+
+class CountCube:
+    """
+    Play counts by DIMENSIONS, kept per source CSV in a folder.
+
+    root -- folder of the cube, e.g. data/store/cube
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def sources(self):
+        """ Returns the entries (mtime, size, plays) of the CSV files in the cube, by file stem """
+        try:
+            return json.loads((self.root / SOURCES_FILE).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_sources(self, sources):
+        path = self.root / SOURCES_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(sources, indent=1))
+        os.replace(tmp, path)
+
+    def add(self, source, df):
+        """ Counts a play table and stores it as the counts of source, replacing earlier ones
+
+        returns the number of cube cells written
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        cells = count_plays(df)
+        path = self.root / f"{Path(source).stem}.parquet"
+        tmp = path.with_suffix(".tmp")
+        pq.write_table(pa.Table.from_pandas(cells, preserve_index=False), tmp)
+        os.replace(tmp, path)
+        return len(cells)
+
+    def update(self, folder, filenames):
+        """ Counts every file of filenames (inside folder) that is new or changed since it was last counted,
+        and drops the counts of files that are no longer in filenames
+
+        folder -- the folder holding the enriched CSV files
+        filenames -- the CSV file names to keep in the cube
+
+        returns the names of the files that were counted
+        """
+        sources = self.sources()
+        keep = {Path(filename).stem for filename in filenames}
+        gone = {stem for stem in sources if stem not in keep}
+        gone |= {path.stem for path in self.root.glob("*.parquet") if path.stem not in keep}
+        if gone:
+            logger.info(f"Dropping {', '.join(sorted(gone))} from {self.root}")
+            # the entries go first, so an interrupted update never lists counts that are gone
+            sources = {stem: entry for stem, entry in sources.items() if stem in keep}
+            self._write_sources(sources)
+            for stem in gone:
+                (self.root / f"{stem}.parquet").unlink(missing_ok=True)
+        updated = []
+        for filename in filenames:
+            stat = (Path(folder) / filename).stat()
+            key = {"mtime": stat.st_mtime, "size": stat.st_size}
+            stem = Path(filename).stem
+            if {k: sources.get(stem, {}).get(k) for k in key} == key:
+                continue
+            logger.info(f"Counting {filename} into {self.root}")
+            df = pd.read_csv(Path(folder) / filename, usecols=SOURCE_COLUMNS)
+            cells = self.add(stem, df)
+            sources[stem] = {**key, "plays": len(df), "cells": cells}
+            self._write_sources(sources)
+            updated.append(filename)
+        return updated
+
+    def query(self, by=(), channels=None, sources=None, start=None, end=None, weekdays=None, hours=None,
+              genders=None, shows=None, dropna=True):
+        """ Returns the number of plays grouped by some of the DIMENSIONS, like
+        plays.groupby(by).size() on the play logs. Filters are pushed down into the Parquet reader.
+
+        by (list, optional): -- dimensions to group by; default none, which returns the total as an int
+        channels (str or list, optional): -- channel prefixes, case-insensitive ("p4" matches P4KBH)
+        sources (list, optional): -- source CSV names (or stems) to count; default all
+        start, end (str, optional): -- date range [start, end), local dates
+        weekdays, hours, genders, shows (list, optional): -- only these values (weekday 0 is Monday)
+        dropna (bool, optional): -- leave out plays with a missing show or gender in by, as groupby does
+
+        returns a Series named plays, with by as its index (unstack it for a table)
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        if isinstance(channels, str):
+            channels = [channels]
+        stems = [Path(s).stem for s in sources] if sources is not None else None
+        filters = []
+        if start is not None:
+            filters.append(("date", ">=", pd.Timestamp(start)))
+        if end is not None:
+            filters.append(("date", "<", pd.Timestamp(end)))
+        for column, values in [("weekday", weekdays), ("hour", hours), ("gender", genders), ("show", shows)]:
+            if values is not None:
+                filters.append((column, "in", list(values)))
+        columns = sorted(set(by) | ({"channel"} if channels else set())) + ["plays"]
+
+        frames = []
+        for path in sorted(self.root.glob("*.parquet")):
+            if stems is not None and path.stem not in stems:
+                continue
+            frames.append(pq.read_table(path, columns=columns, filters=filters or None).to_pandas())
+        cells = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        if channels:
+            prefixes = tuple(c.lower() for c in channels)
+            cells = cells[cells["channel"].str.lower().str.startswith(prefixes)]
+        if not by:
+            return int(cells["plays"].sum())
+        return cells.groupby(by, dropna=dropna)["plays"].sum().astype("int64")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Brings the count cube up to date with enriched play CSVs")
+    ap.add_argument("folder", help="Folder with the enriched CSV files")
+    ap.add_argument("root", help="Folder of the cube, e.g. data/store/cube")
+    ap.add_argument("filenames", nargs="*", help="CSV files to count; default all files in folder with a gender column")
+    args = ap.parse_args()
+
+    filenames = args.filenames or [
+        path.name for path in sorted(Path(args.folder).glob("*.csv"))
+        if set(SOURCE_COLUMNS) <= set(pd.read_csv(path, nrows=0).columns)
+    ]
+    cube = CountCube(args.root)
+    updated = cube.update(args.folder, filenames)
+    size = sum(path.stat().st_size for path in Path(args.root).glob("*.parquet"))
+    print(f"counted {len(updated)} of {len(filenames)} files; cube holds {cube.query():,} plays in {size / 1024:,.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
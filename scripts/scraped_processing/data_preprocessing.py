@@ -1,75 +1,134 @@
 from datetime import datetime
-from fileinput import filename
+import functools
 import os
-from IPython.core.display_functions import display
 import pandas as pd
 import re
 from pyprojroot.here import here
+import dataset_store
+from dataset_catalog import DatasetCatalog
+from play_log import PlayLog
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-datafolder = here()/'data'  # here() is the root of the project's folder, makes routing between folders easier (DIW-DR-PROJECT)
-csv_files = os.listdir(datafolder)  # a list of all the names of the files in the /data folder
+# nothing is read from disk when this module is imported; the folders and catalogs are resolved on first use
+
+@functools.cache
+def get_datafolder():
+    """ Returns the /data folder. here() is the root of the project's folder, makes routing between folders easier (DIW-DR-PROJECT) """
+    return here()/'data'
+
+def get_storefolder():
+    """ Returns the folder with the columnar (Parquet) copies of the CSV files, partitioned by channel and month """
+    return get_datafolder()/'store'
+
+@functools.cache
+def get_catalog(subfolder = ""):
+    """ Returns the catalog of the CSV files in /data (or in /data/subfolder).
+    it is cached next to the columnar store and only refreshed for files that changed.
+
+    subfolder (str, optional): -- e.g. "enriched_final"
+    """
+    folder = get_datafolder()/subfolder if subfolder else get_datafolder()
+    return DatasetCatalog(folder, get_storefolder()/(subfolder or 'scraped')/'catalog.json')
+
+def load_plays(channel = "", start = None, end = None, columns = None):
+    """ loads the plays of /data/enriched_final from the columnar store, reading only what is asked for.
+    the catalog prunes the CSV files by channel and time range first, and the store is refreshed
+    only for the remaining files that are new or have changed.
+
+    channel (str, optional): -- Channel prefix, case-insensitive (e.g., "p4" matches P4KBH).
+    start, end (str, optional): -- Time range [start, end) on localTime (e.g., "2024-06-01").
+    columns (list, optional): -- Only read these columns.
+
+    returns a single dataframe with localTime as Europe/Copenhagen timestamps
+    """
+    catalog = get_catalog('enriched_final')
+    filenames = catalog.filenames(channel=channel, start=start, end=end)
+    dataset_store.sync(catalog.folder, get_storefolder()/'enriched_final', filenames)
+    return dataset_store.load(get_storefolder()/'enriched_final', channels=channel or None, start=start, end=end,
+                              columns=columns, sources=filenames)
+
+def get_play_log(subfolder = 'enriched_final'):
+    """ Returns the memory-mapped play log (see play_log.py) of the CSV files in /data/subfolder.
+    segments are only rebuilt for files that are new or have changed.
+
+    subfolder (str, optional): -- e.g. "enriched_final" (default) or "" for /data
+    """
+    catalog = get_catalog(subfolder)
+    log = PlayLog(get_storefolder()/'playlog'/(subfolder or 'scraped'))
+    log.update(catalog.folder, list(catalog.refresh()))
+    return log
 
 def get_all_dataframes(channel = "", year = ""):
     """ loads all CSV files in /data/enriched_final as pandas DataFrames.
-    optional arguments are channel and year to filter filenames.
+    optional arguments are channel and year, files are selected through the catalog without opening them.
 
-    channel (str, optional): -- Channel keyword to filter filenames (e.g., "p3").
-    year (str, optional): -- Year keyword to filter filenames (e.g., "2024").
+    channel (str, optional): -- Channel prefix of the plays in the file (e.g., "p3").
+    year (str, optional): -- Only files with plays in this year (e.g., "2024").
 
     returns all the dataframes as a tuple, which can be unpacked to individual variables.
     """
-    final_datafolder = here()/'data/enriched_final' 
-    csv_files = os.listdir(final_datafolder)  # a list of all the names of the files in the /data/enriched_final folder
+    catalog = get_catalog('enriched_final')
+    start, end = (f"{year}-01-01", f"{int(year) + 1}-01-01") if year else (None, None)
+    csv_files = catalog.filenames(channel=channel, start=start, end=end)
     dfs = []
 
-    csv_files.sort()
-    if year:
-        csv_files = [f for f in csv_files if year in f]
-    if channel:
-        csv_files = [f for f in csv_files if channel in f]
-
+    # the CSV files are read through the columnar store, so localTime is only parsed once per file
+    dataset_store.sync(catalog.folder, get_storefolder()/'enriched_final', csv_files)
     for filename in csv_files:
-        df = pd.read_csv(final_datafolder/filename, parse_dates=["localTime"])
+        df = dataset_store.load(get_storefolder()/'enriched_final', sources=[filename])
         dfs.append(df)
 
     # returns them as a tuple of dataframes, which essentially can be unpacked when called
     return tuple(dfs)
 
-def load_df_from_channel(channel):
+def load_df_from_channel(channel, start = None, end = None):
     """ Get the data from a specific channel as a pandas dataframe
     valid DR channels are: p2, p3, p4, p5, p6 or p8 
 
     channel -- a valid DR channel, such as p2
+    start, end (str, optional): -- only files with plays in [start, end)
     """
-    df = merge_datasets(get_filenames_for_channel(channel))
+    df = merge_datasets(get_filenames_for_channel(channel, start, end))
     return df
 
-def get_filenames_for_channel(channel):
-    """ Returns a list of all the filenames of a specific channel using the global variable csv_files 
+def get_filenames_for_channel(channel, start = None, end = None):
+    """ Returns a list of all the filenames in /data of a specific channel, using the catalog
     valid DR channels are: p2, p3, p4, p5, p6 or p8 
 
     channel -- a valid DR channel, such as p2
+    start, end (str, optional): -- only files with plays in [start, end)
     """
-    filenames = [filename for filename in csv_files if filename.startswith(channel)]
-    return filenames
+    return get_catalog().filenames(start=start, end=end, name_prefix=channel)
 
 def merge_datasets(filenames):
     """ Reads all the .csv files of the filenames and merges them into a single pandas dataframe
     
     filenames -- a list of all the filenames to be read
     """
-    dfs = []
-    for filename in filenames:
-        logger.debug(f"Loading {filename}")
-        df = pd.read_csv(datafolder/filename)
-        dfs.append(df)
-
-    df = pd.concat(dfs, axis=0, ignore_index=True)
+    logger.debug(f"Loading {filenames}")
+    dataset_store.sync(get_datafolder(), get_storefolder()/'scraped', filenames)
+    df = dataset_store.load(get_storefolder()/'scraped', sources=filenames)
     return df
 
+# scraped column -> minimal column, and the minimal columns in order
+SCRAPED_TO_MINIMAL = {
+    'track_played_time': 'localTime',
+    'channel': 'channel',
+    'programme_title': 'episodeTitle',
+    'programme_start_time': 'episodeStartTime',
+    'programme_description': 'episodeDescription',
+    'track_title': 'trackTitle',
+    'artist_names': 'artistString'
+}
+MINIMAL_COLUMNS = [
+    'localTime', 'channel', 'episodeTitle', 'episodeStartTime',
+    'episodeDescription', 'trackTitle', 'artistString'
+]
+# DR writes all times as ISO 8601 (e.g. 2025-10-29T05:03:04+01:00 and 2025-10-29T04:03:00Z)
+SCRAPED_TIME_FORMAT = 'ISO8601'
+
 def reform_datasets_to_minimal(df):
     """
     Reforms scraped dataset to minimal structure matching the DR dataset format.
@@ -88,38 +147,176 @@ def reform_datasets_to_minimal(df):
     Returns:
         DataFrame with minimal structure (without gender column)
     """
-    df = df.copy()
-
-    # Rename columns to match minimal format
-    column_mapping = {
-        'track_played_time': 'localTime',
-        'programme_title': 'episodeTitle',
-        'programme_start_time': 'episodeStartTime',
-        'programme_description': 'episodeDescription',
-        'track_title': 'trackTitle',
-        'artist_names': 'artistString'
-    }
-
-    df = df.rename(columns=column_mapping)
+    # only the columns that are kept are copied
+    existing = [col for col in SCRAPED_TO_MINIMAL if col in df.columns]
+    df = df[existing].rename(columns=SCRAPED_TO_MINIMAL)
 
     # Convert channel to uppercase (e.g., 'p3' -> 'P3')
     if 'channel' in df.columns:
         df['channel'] = df['channel'].str.upper()
 
-    # Convert datetime columns
+    # Convert datetime columns, localTime in Danish time like the columnar store returns it
     if 'localTime' in df.columns:
-        df['localTime'] = pd.to_datetime(df['localTime'], errors='coerce')
+        df['localTime'] = pd.to_datetime(df['localTime'], errors='coerce', utc=True, format=SCRAPED_TIME_FORMAT)
+        df['localTime'] = df['localTime'].dt.tz_convert(dataset_store.LOCAL_TZ)
     if 'episodeStartTime' in df.columns:
-        df['episodeStartTime'] = pd.to_datetime(df['episodeStartTime'], errors='coerce')
+        df['episodeStartTime'] = pd.to_datetime(df['episodeStartTime'], errors='coerce', format=SCRAPED_TIME_FORMAT)
+
+    # Only keep columns that exist in the dataframe, in the correct order
+    return df[[col for col in MINIMAL_COLUMNS if col in df.columns]]
+
+def iter_minimal_chunks(filenames, chunksize = 100_000, folder = None):
+    """ Reads the scraped CSV files in chunks of at most chunksize rows and yields each chunk in the minimal format.
+    only the columns of the minimal format are read, and no more than one chunk is held in memory.
+
+    filenames -- the scraped CSV files, in order
+    chunksize -- rows per chunk
+    folder -- folder of the files; default /data
+    """
+    folder = folder or get_datafolder()
+    for filename in filenames:
+        logger.debug(f"Reforming {filename}")
+        reader = pd.read_csv(os.path.join(folder, filename), usecols=lambda col: col in SCRAPED_TO_MINIMAL,
+                             dtype=str, chunksize=chunksize)
+        for chunk in reader:
+            yield reform_datasets_to_minimal(chunk)
+
+def format_times(times):
+    """ Formats a column of timezone-aware times as text, exactly like to_csv would (e.g. 2025-10-29 05:03:04+01:00),
+    but vectorised instead of one Timestamp at a time. columns that to_csv would format differently
+    (no timezone, mixed offsets, fractions of a second) are returned unchanged.
+
+    times -- a pandas Series
+    """
+    if not isinstance(times.dtype, pd.DatetimeTZDtype) or (times.dt.microsecond + times.dt.nanosecond > 0).any():
+        return times
+    local = times.dt.tz_localize(None)
+    minutes = (local - times.dt.tz_convert(None)) // pd.Timedelta(minutes=1)
+    offsets = {m: f"{'-' if m < 0 else '+'}{int(abs(m)) // 60:02d}:{int(abs(m)) % 60:02d}" for m in minutes.dropna().unique()}
+    return (local.dt.strftime('%Y-%m-%d %H:%M:%S') + minutes.map(offsets)).where(times.notna())
 
-    # Select only the minimal columns (in the correct order)
-    minimal_columns = [
-        'localTime', 'channel', 'episodeTitle', 'episodeStartTime',
-        'episodeDescription', 'trackTitle', 'artistString'
-    ]
+def write_minimal(filenames, out_path, chunksize = 100_000, folder = None):
+    """ Streams the scraped CSV files to out_path in the minimal format, one chunk at a time.
+    gives the same file as reform_datasets_to_minimal(merge_datasets(filenames)).to_csv(out_path, index=False).
+    rows go to a temporary file that replaces out_path only once everything is written.
 
-    # Only keep columns that exist in the dataframe
-    existing_columns = [col for col in minimal_columns if col in df.columns]
-    df = df[existing_columns]
+    filenames -- the scraped CSV files, in order
+    out_path -- the minimal CSV file to write
+    chunksize -- rows per chunk
+    folder -- folder of the files; default /data
 
+    returns the number of rows written
+    """
+    tmp_path = f"{out_path}.part"
+    rows = 0
+    header = True
+    try:
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in iter_minimal_chunks(filenames, chunksize, folder):
+                for col in ['localTime', 'episodeStartTime']:
+                    if col in chunk.columns:
+                        chunk[col] = format_times(chunk[col])
+                chunk.to_csv(f, index=False, header=header)
+                header = False
+                rows += len(chunk)
+            if header:
+                f.write(','.join(MINIMAL_COLUMNS) + '\n')
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return rows
+
+# columns of the flat play table, in order, and the ones that belong to the episode rather than the play
+FLAT_COLUMNS = [
+    'localTime', 'channel', 'episodeTitle', 'episodeStartTime',
+    'episodeDescription', 'trackTitle', 'artistString', 'gender', 'hosts'
+]
+EPISODE_COLUMNS = ['channel', 'episodeTitle', 'episodeStartTime', 'episodeDescription', 'hosts']
+CATEGORICAL_COLUMNS = ['channel', 'gender', 'artistString']
+
+def normalise_plays(df):
+    """
+    Splits a flat play table into an episodes table and a plays table keyed by episode_id,
+    so the episode title, start time, description and hosts are stored once per episode
+    instead of on every track row.
+
+    episode_id is a hash of the episode columns, so the same episode gets the same id in
+    every file. channel, gender and artistString are stored as categoricals.
+
+    Args:
+        df: DataFrame in the minimal/enriched format
+
+    Returns:
+        (episodes, plays) DataFrames
+    """
+    episode_columns = [col for col in EPISODE_COLUMNS if col in df.columns]
+    episode_id = pd.util.hash_pandas_object(df[episode_columns], index=False).astype('int64')
+
+    episodes = df[episode_columns].assign(episode_id=episode_id.values)
+    episodes = episodes.drop_duplicates('episode_id').reset_index(drop=True)
+    episodes = episodes[['episode_id'] + episode_columns]
+
+    play_columns = [col for col in df.columns if col not in episode_columns]
+    plays = df[play_columns].assign(episode_id=episode_id.values).reset_index(drop=True)
+
+    for table in (episodes, plays):
+        for col in CATEGORICAL_COLUMNS:
+            if col in table.columns:
+                table[col] = table[col].astype('category')
+    return episodes, plays
+
+def join_plays(episodes, plays, categorical=False):
+    """
+    Joins episodes back onto plays and returns the flat play table, in the original
+    row and column order.
+
+    Args:
+        episodes, plays: DataFrames from normalise_plays (or load_normalised)
+        categorical: keep channel, gender and artistString as categoricals (uses less memory)
+
+    Returns:
+        DataFrame in the flat format
+    """
+    df = plays.merge(episodes, on='episode_id', how='left', sort=False)
+    columns = [col for col in FLAT_COLUMNS if col in df.columns]
+    columns += [col for col in df.columns if col not in columns and col != 'episode_id']
+    df = df[columns]
+    if not categorical:
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object).where(df[col].notna(), None)
     return df
+
+def save_normalised(df, folder):
+    """ Writes the normalised layout of a flat play table as episodes.parquet and plays.parquet in folder
+
+    df -- DataFrame in the minimal/enriched format
+    folder -- output folder, created if missing
+    """
+    os.makedirs(folder, exist_ok=True)
+    episodes, plays = normalise_plays(df)
+    episodes.to_parquet(os.path.join(folder, 'episodes.parquet'), index=False)
+    plays.to_parquet(os.path.join(folder, 'plays.parquet'), index=False)
+
+def load_normalised(folder, flat=False, columns=None):
+    """ Loads a layout written by save_normalised
+
+    folder -- folder with episodes.parquet and plays.parquet
+    flat -- if True, join the tables and return the flat play table
+    columns -- only read these columns, from either table (episode_id is always read, and only
+        these columns are returned when flat is True)
+
+    returns (episodes, plays), or a single flat DataFrame when flat is True
+    """
+    episode_columns = play_columns = None
+    if columns is not None:
+        episode_columns = [col for col in columns if col in EPISODE_COLUMNS] + ['episode_id']
+        play_columns = [col for col in columns if col not in EPISODE_COLUMNS and col != 'episode_id'] + ['episode_id']
+    episodes = pd.read_parquet(os.path.join(folder, 'episodes.parquet'), columns=episode_columns)
+    plays = pd.read_parquet(os.path.join(folder, 'plays.parquet'), columns=play_columns)
+    if flat:
+        df = join_plays(episodes, plays)
+        return df if columns is None else df[[col for col in df.columns if col in columns]]
+    return episodes, plays
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from dataset_store import time_column, to_utc
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """ Returns the blake2b hex digest of a file's content """
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def describe_csv(path):
+    """ Reads the channel and play-time columns of a CSV file and returns its catalog entry fields """
+    columns = list(pd.read_csv(path, nrows=0).columns)
+    tcol = time_column(columns)
+    usecols = [c for c in [tcol, "channel"] if c in columns]
+    df = pd.read_csv(path, usecols=usecols) if usecols else pd.read_csv(path, usecols=[0])
+    entry = {"columns": columns, "rows": len(df), "channels": [], "start": None, "end": None}
+    if "channel" in df.columns:
+        entry["channels"] = sorted(df["channel"].dropna().astype(str).unique().tolist())
+    if tcol:
+        times = pd.to_datetime(df[tcol], utc=True, errors="coerce", format="ISO8601").dropna()
+        if len(times):
+            entry["start"], entry["end"] = times.min().isoformat(), times.max().isoformat()
+    return entry
+
+
+class DatasetCatalog:
+    """
+    A cached manifest of the CSV files in a data folder: channels, date span, row count,
+    columns and content hash of every file.
+
+    Nothing is read until the catalog is first used. Each refresh only stats the files;
+    a file is hashed again only if its size or mtime changed, and re-described only if
+    its content hash changed.
+
+    folder -- the folder holding the CSV files
+    path -- where the catalog is cached as JSON
+    """
+
+    def __init__(self, folder, path):
+        self.folder = Path(folder)
+        self.path = Path(path)
+        self._entries = None
+
+    def _load(self):
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._entries, indent=1))
+        os.replace(tmp, self.path)
+
+    def refresh(self):
+        """ Brings the catalog up to date with the folder and returns all entries by file name """
+        entries = self._entries if self._entries is not None else self._load()
+        fresh = {}
+        changed = False
+        for name in sorted(os.listdir(self.folder)):
+            if not name.endswith(".csv"):
+                continue
+            stat = (self.folder / name).stat()
+            old = entries.get(name)
+            if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime:
+                fresh[name] = old
+                continue
+            digest = file_hash(self.folder / name)
+            if old and old["hash"] == digest:
+                fresh[name] = {**old, "size": stat.st_size, "mtime": stat.st_mtime}
+            else:
+                logger.info(f"Cataloguing {name}")
+                fresh[name] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": digest,
+                               **describe_csv(self.folder / name)}
+            changed = True
+        changed = changed or set(fresh) != set(entries)
+        self._entries = fresh
+        if changed:
+            self._save()
+        return fresh
+
+    def filenames(self, channel="", start=None, end=None, name_prefix=""):
+        """ Returns the (sorted) file names matching all given filters, without opening any file
+
+        channel (str, optional): -- keep files holding a channel with this prefix, case-insensitive
+        start, end (str, optional): -- keep files whose date span overlaps [start, end)
+        name_prefix (str, optional): -- keep files whose name starts with this
+        """
+        start = to_utc(start)
+        end = to_utc(end)
+        selected = []
+        for name, entry in self.refresh().items():
+            if name_prefix and not name.startswith(name_prefix):
+                continue
+            if channel and not any(ch.lower().startswith(channel.lower()) for ch in entry["channels"]):
+                continue
+            if entry["start"] is not None:
+                if end is not None and pd.Timestamp(entry["start"]) >= end:
+                    continue
+                if start is not None and pd.Timestamp(entry["end"]) < start:
+                    continue
+            selected.append(name)
+        return selected
+
+    def to_frame(self):
+        """ Returns the catalog as a DataFrame, one row per file """
+        return pd.DataFrame.from_dict(self.refresh(), orient="index")
+
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TZ = "Europe/Copenhagen"
+TIME_COLUMNS = ["localTime", "track_played_time"]  # enriched/minimal format, raw scraped format
+SOURCES_FILE = "_sources.json"
+ROW_COLUMN = "_row"  # position of the row in its source CSV, restores the CSV order on load
+
+
+def time_column(columns):
+    """ Returns the play-time column of a dataset (localTime or track_played_time), or None """
+    return next((c for c in TIME_COLUMNS if c in columns), None)
+
+
+def _read_sources(store_root):
+    try:
+        return json.loads((Path(store_root) / SOURCES_FILE).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_sources(store_root, sources):
+    path = Path(store_root) / SOURCES_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(sources, indent=1))
+    os.replace(tmp, path)
+
+
+def _partition_files(store_root):
+    """ Yields (channel, month, source, path) for every Parquet file in the store """
+    for channel_dir in sorted(Path(store_root).glob("channel=*")):
+        for month_dir in sorted(channel_dir.glob("month=*")):
+            for path in sorted(month_dir.glob("*.parquet")):
+                yield channel_dir.name[8:], month_dir.name[6:], path.stem, path
+
+
+def ingest_csv(csv_path, store_root):
+    """ Reads a CSV once and writes it to the store, partitioned by channel and month.
+
+    The play-time column is parsed here (stored as UTC) so loaders never parse text again.
+    Every partition file is named after the source CSV, so re-ingesting a file replaces
+    exactly its own rows.
+
+    csv_path -- the CSV file to ingest
+    store_root -- root folder of the store
+
+    returns the number of rows ingested
+    """
+    csv_path, store_root = Path(csv_path), Path(store_root)
+    source = csv_path.stem
+    df = pd.read_csv(csv_path)
+    df[ROW_COLUMN] = range(len(df))
+    tcol = time_column(df.columns)
+    if tcol:
+        df[tcol] = pd.to_datetime(df[tcol], utc=True, errors="coerce", format="ISO8601")
+        month = df[tcol].dt.tz_convert(LOCAL_TZ).dt.strftime("%Y-%m").fillna("unknown")
+    else:
+        month = pd.Series("unknown", index=df.index)
+    channel = df["channel"].astype(str) if "channel" in df.columns else pd.Series("unknown", index=df.index)
+
+    for _, _, stem, path in list(_partition_files(store_root)):
+        if stem == source:
+            path.unlink()
+    for (ch, m), part in df.groupby([channel, month], sort=False):
+        folder = store_root / f"channel={ch}" / f"month={m}"
+        folder.mkdir(parents=True, exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(part, preserve_index=False), folder / f"{source}.parquet")
+    return len(df)
+
+
+def sync(folder, store_root, filenames):
+    """ Ingests every file of filenames (inside folder) that is new or changed since it was last ingested
+
+    folder -- the folder holding the CSV files
+    store_root -- root folder of the store
+    filenames -- the CSV file names to keep in sync
+    """
+    store_root = Path(store_root)
+    store_root.mkdir(parents=True, exist_ok=True)
+    sources = _read_sources(store_root)
+    changed = False
+    for filename in filenames:
+        stat = (Path(folder) / filename).stat()
+        key = {"mtime": stat.st_mtime, "size": stat.st_size}
+        if {k: sources.get(Path(filename).stem, {}).get(k) for k in key} == key:
+            continue
+        logger.info(f"Ingesting {filename} into {store_root}")
+        rows = ingest_csv(Path(folder) / filename, store_root)
+        sources[Path(filename).stem] = {**key, "rows": rows}
+        changed = True
+    if changed:
+        _write_sources(store_root, sources)
+
+
+def load(store_root, channels=None, start=None, end=None, columns=None, sources=None):
+    """ Loads plays from the store, reading only what the filters select.
+
+    Channel and month filters prune whole partition files, the time range and column
+    selection are pushed down into the Parquet reader.
+
+    store_root -- root folder of the store
+    channels (str or list, optional): -- channel prefixes, case-insensitive ("p4" matches P4KBH)
+    start, end (str or Timestamp, optional): -- time range [start, end), local time if naive
+    columns (list, optional): -- columns to read; default all
+    sources (list, optional): -- source CSV names (or stems) to read; default all
+
+    returns a single DataFrame with the time column as Europe/Copenhagen timestamps
+    """
+    if isinstance(channels, str):
+        channels = [channels]
+    prefixes = [c.lower() for c in channels] if channels else None
+    start, end = to_utc(start), to_utc(end)
+    first_month = start.tz_convert(LOCAL_TZ).strftime("%Y-%m") if start is not None else None
+    last_month = end.tz_convert(LOCAL_TZ).strftime("%Y-%m") if end is not None else None
+    stems = [Path(s).stem for s in sources] if sources is not None else None
+
+    selected = []
+    for ch, month, stem, path in _partition_files(store_root):
+        if prefixes and not any(ch.lower().startswith(p) for p in prefixes):
+            continue
+        if stems is not None and stem not in stems:
+            continue
+        if month != "unknown":
+            if first_month and month < first_month or last_month and month > last_month:
+                continue
+        elif start is not None or end is not None:
+            continue
+        selected.append((stems.index(stem) if stems is not None else 0, stem, month, path))
+    selected.sort(key=lambda s: s[:3])
+
+    ranks = {}
+    frames = []
+    for order, stem, _, path in selected:
+        schema = pq.read_schema(path)
+        tcol = time_column(schema.names)
+        filters = []
+        if tcol and start is not None:
+            filters.append((tcol, ">=", start))
+        if tcol and end is not None:
+            filters.append((tcol, "<", end))
+        read_columns = None
+        if columns is not None:
+            read_columns = [c for c in columns if c in schema.names] + [ROW_COLUMN]
+        frame = pq.read_table(path, columns=read_columns, filters=filters or None).to_pandas()
+        frame["_source"] = ranks.setdefault((order, stem), len(ranks))
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    # same order as concatenating the source CSVs
+    df = pd.concat(frames, axis=0, ignore_index=True)
+    df = df.sort_values(["_source", ROW_COLUMN], kind="stable", ignore_index=True)
+    df = df.drop(columns=["_source", ROW_COLUMN])
+    tcol = time_column(df.columns)
+    if tcol and isinstance(df[tcol].dtype, pd.DatetimeTZDtype):
+        df[tcol] = df[tcol].dt.tz_convert(LOCAL_TZ)
+    return df
+
+
+def to_utc(value):
+    """ Returns value as a UTC Timestamp (naive values are local time), or None """
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(LOCAL_TZ)
+    return ts.tz_convert("UTC")
@@ -0,0 +1,220 @@
+"""
+Local MusicBrainz artist index, built once from the MusicBrainz JSON data dump
+(https://data.metabrainz.org/pub/musicbrainz/data/json-dumps/, file mbdump/artist in artist.tar.xz).
+
+The index is a SQLite file holding every artist's name, aliases, type, gender and group
+membership, so gender enrichment can resolve artists without calling the MusicBrainz API.
+
+    python scripts/scraped_processing/musicbrainz_index.py artist.tar.xz data/helpers/musicbrainz_artists.sqlite
+"""
+import argparse
+import bz2
+import gzip
+import json
+import logging
+import lzma
+import os
+import sqlite3
+import tarfile
+from pathlib import Path
+
+from name_matcher import NameMatcher, normalize_artist_name
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE artist (id TEXT PRIMARY KEY, name TEXT, type TEXT, gender TEXT, weight INTEGER);
+CREATE TABLE artist_name (norm TEXT, artist_id TEXT, name TEXT, is_alias INTEGER);
+CREATE TABLE member (group_id TEXT, member_id TEXT, PRIMARY KEY (group_id, member_id)) WITHOUT ROWID;
+"""
+INDEXES = """
+CREATE INDEX artist_name_norm ON artist_name (norm);
+"""
+MEMBER_RELATIONS = {'member of band'}
+
+
+def iter_dump(path):
+    """ Yields the artist records of a MusicBrainz JSON dump, one dict per line.
+
+    path -- the artist.tar.xz archive, the mbdump/artist file in it, or that file compressed (.gz, .bz2, .xz)
+    """
+    path = Path(path)
+    if path.name.endswith(('.tar.xz', '.tar.gz', '.tar.bz2', '.tar')):
+        with tarfile.open(path, 'r|*') as archive:
+            for member in archive:
+                if member.name.endswith('mbdump/artist'):
+                    yield from _iter_lines(archive.extractfile(member))
+                    return
+        raise ValueError(f"{path} has no mbdump/artist file")
+    opener = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}.get(path.suffix, open)
+    with opener(path, 'rb') as f:
+        yield from _iter_lines(f)
+
+
+def _iter_lines(f):
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _rows(record):
+    """ Splits one dump record into its artist, name and member rows """
+    artist_id = record['id']
+    aliases = record.get('aliases') or []
+    relations = record.get('relations') or []
+    # more aliases, tags and relations means a better-known artist; used to rank artists with the same name
+    weight = len(aliases) + len(record.get('tags') or []) + len(relations)
+    artist = (artist_id, record.get('name'), record.get('type'), record.get('gender'), weight)
+
+    names = {(normalize_artist_name(record.get('name')), record.get('name'), 0)}
+    for alias in aliases:
+        names.add((normalize_artist_name(alias.get('name')), alias.get('name'), 1))
+    names = [(norm, artist_id, name, is_alias) for norm, name, is_alias in names if norm]
+
+    members = []
+    for relation in relations:
+        other = relation.get('artist') or {}
+        if relation.get('type') not in MEMBER_RELATIONS or not other.get('id'):
+            continue
+        # a group lists its members as "backward" relations, a person its groups as "forward" ones
+        if relation.get('direction') == 'backward':
+            members.append((artist_id, other['id']))
+        else:
+            members.append((other['id'], artist_id))
+    return artist, names, members
+
+
+def build_index(dump_path, index_path, batch_size=10_000):
+    """ Builds the SQLite artist index from a MusicBrainz JSON dump.
+    the index is written next to index_path and only replaces it once complete.
+
+    dump_path -- see iter_dump
+    index_path -- the SQLite file to write
+
+    returns the number of artists indexed
+    """
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    db = sqlite3.connect(tmp_path)
+    try:
+        db.execute('PRAGMA journal_mode = OFF')
+        db.execute('PRAGMA synchronous = OFF')
+        db.executescript(SCHEMA)
+        count = 0
+        artists, names, members = [], [], []
+        for record in iter_dump(dump_path):
+            artist, artist_names, artist_members = _rows(record)
+            artists.append(artist)
+            names.extend(artist_names)
+            members.extend(artist_members)
+            count += 1
+            if len(artists) >= batch_size:
+                _insert(db, artists, names, members)
+                artists, names, members = [], [], []
+                logger.info(f"Indexed {count} artists")
+        _insert(db, artists, names, members)
+        db.executescript(INDEXES)
+        db.commit()
+    finally:
+        db.close()
+    os.replace(tmp_path, index_path)
+    return count
+
+
+def _insert(db, artists, names, members):
+    db.executemany('INSERT OR REPLACE INTO artist VALUES (?, ?, ?, ?, ?)', artists)
+    db.executemany('INSERT INTO artist_name VALUES (?, ?, ?, ?)', names)
+    db.executemany('INSERT OR IGNORE INTO member VALUES (?, ?)', members)
+
+
+class ArtistIndex:
+    """
+    Read-only lookups in an index written by build_index. Artists are returned as dicts
+    shaped like the entries of musicbrainzngs.search_artists: id, name, type and gender.
+
+    path -- the SQLite index file
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"No MusicBrainz index at {self.path}, build it with musicbrainz_index.py")
+        self.db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self._matcher = None
+        self._matcher_ids = None
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM artist').fetchone()[0]
+
+    def search(self, name, limit=5):
+        """ Returns up to limit artists whose name or alias normalises to the same string as name.
+        artists matched on their own name come first, then better-known artists.
+        matched_name is the name or alias that matched.
+        """
+        rows = self.db.execute(
+            'SELECT a.id, a.name, a.type, a.gender, n.name AS matched_name FROM artist_name n '
+            'JOIN artist a ON a.id = n.artist_id WHERE n.norm = ? '
+            'ORDER BY n.is_alias, a.weight DESC, a.id',
+            (normalize_artist_name(name),),
+        )
+        found = {}
+        for row in rows:
+            if row['id'] not in found:
+                found[row['id']] = dict(row)
+            if len(found) == limit:
+                break
+        return list(found.values())
+
+    def fuzzy_search(self, name, limit=5, similarity_threshold=0.85):
+        """ Returns up to limit artists with a name or alias similar to name (see NameMatcher), best first.
+        similarity is the SequenceMatcher ratio of the normalised names, matched_name the name or alias
+        it was computed on. All names are loaded and indexed on the first call.
+        """
+        if self._matcher is None:
+            rows = self.db.execute('SELECT n.name, n.artist_id FROM artist_name n JOIN artist a ON a.id = n.artist_id '
+                                   'ORDER BY n.is_alias, a.weight DESC, a.id').fetchall()
+            self._matcher = NameMatcher(row[0] for row in rows)
+            self._matcher_ids = [row[1] for row in rows]
+        found = {}
+        for similarity, position in self._matcher.search(name, limit=50, similarity_threshold=similarity_threshold):
+            artist_id = self._matcher_ids[position]
+            if artist_id not in found:
+                found[artist_id] = {**self.get(artist_id), 'matched_name': self._matcher.names[position],
+                                    'similarity': similarity}
+            if len(found) == limit:
+                break
+        return list(found.values())
+
+    def get(self, artist_id):
+        """ Returns the artist with this MusicBrainz id, or None """
+        row = self.db.execute('SELECT id, name, type, gender FROM artist WHERE id = ?', (artist_id,)).fetchone()
+        return dict(row) if row else None
+
+    def members(self, group_id):
+        """ Returns the member artists of a group (empty if the group or its members are unknown) """
+        rows = self.db.execute(
+            'SELECT a.id, a.name, a.type, a.gender FROM member m JOIN artist a ON a.id = m.member_id '
+            'WHERE m.group_id = ? ORDER BY a.name', (group_id,))
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the local MusicBrainz artist index from a JSON dump")
+    ap.add_argument('dump', help="artist.tar.xz, or its mbdump/artist file (optionally .gz/.bz2/.xz)")
+    ap.add_argument('index', help="SQLite file to write, e.g. data/helpers/musicbrainz_artists.sqlite")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    count = build_index(args.dump, args.index)
+    print(f"Indexed {count} artists into {args.index}")
+
+
+if __name__ == '__main__':
+    main()
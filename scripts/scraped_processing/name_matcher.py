@@ -0,0 +1,182 @@
+"""
+Fuzzy name lookup over a large, fixed list of names (e.g. every artist name and alias in the
+MusicBrainz index), with the same similarity as name_similarity in artist_gender.py:
+difflib.SequenceMatcher ratio between the normalised names.
+
+All names are normalised and indexed by their character trigrams and character counts once. A
+query only reads the posting lists of its own trigrams, and only the names that look enough
+alike are scored with SequenceMatcher. Names are only skipped by bounds that hold for every
+name reaching the similarity threshold, so the results are those of scoring every name.
+"""
+import math
+from collections import Counter
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+def normalize_artist_name(name):
+    """
+    Normalize artist name for comparison by removing special characters,
+    converting to lowercase, and stripping whitespace.
+
+    Args:
+        name (str): Artist name
+
+    Returns:
+        str: Normalized name
+    """
+    if not name:
+        return ""
+    # Convert to lowercase, remove extra spaces
+    name = str(name).lower().strip()
+    # Remove common punctuation that might differ
+    for char in ['.', ',', '!', '?', ';', ':']:
+        name = name.replace(char, '')
+    return ' '.join(name.split())  # Normalize whitespace
+
+
+def _numbered(items):
+    """ Returns the set of (item, k) pairs, k counting the occurrences of item (1, 2, ...), so the
+    intersection of two such sets is as large as the intersection of the multisets """
+    seen = {}
+    numbered = set()
+    for item in items:
+        seen[item] = seen.get(item, 0) + 1
+        numbered.add((item, seen[item]))
+    return numbered
+
+
+def trigrams(name):
+    """ Returns the character trigrams of a normalised name, numbered by occurrence (see _numbered)
+    and padded so short names have some too """
+    padded = f"  {name} "
+    return _numbered(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+# characters with their own column in the character count table; the others share the last one
+ALPHABET_SIZE = 63
+
+
+def min_matches(lengths, similarity_threshold):
+    """ Returns the fewest matching characters two names of the given total lengths need for
+    SequenceMatcher.ratio (2 * matches / total length) to reach similarity_threshold """
+    return np.ceil(similarity_threshold * np.asarray(lengths) / 2 - 1e-9)
+
+
+def min_shared_trigrams(lengths, similarity_threshold):
+    """ Returns a lower bound on the trigrams (as counted by trigrams()) that two names of the given
+    total lengths share when their similarity is at least similarity_threshold
+
+    With M matching characters, a has u_a = len(a) - M unmatched characters and b has u_b. Of the
+    len(a) + 1 trigrams of a, an unmatched character of a spoils at most 3 and a gap in b between
+    two matched neighbours at most 2, so at least len(a) + 1 - 3 * u_a - 2 * u_b = 5 * M + 1 - 2 *
+    (len(a) + len(b)) of them also occur in b, at distinct positions.
+    """
+    lengths = np.asarray(lengths)
+    return 5 * min_matches(lengths, similarity_threshold) + 1 - 2 * lengths
+
+
+class NameMatcher:
+    """
+    Character trigram inverted index over a list of names.
+
+    names -- the names to search, in order of preference (ties go to the earlier name)
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.norms = [normalize_artist_name(name) for name in self.names]
+        self.lengths = np.fromiter((len(norm) for norm in self.norms), dtype=np.int32, count=len(self.norms))
+        postings = {}
+        for i, norm in enumerate(self.norms):
+            if not norm:
+                continue
+            for gram in trigrams(norm):
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        # how often each name has each of the most common characters (the rest in the last column),
+        # saturating at 255
+        text = "".join(self.norms)
+        self.alphabet = {char: i for i, (char, _) in enumerate(Counter(text).most_common(ALPHABET_SIZE))}
+        self.char_counts = np.zeros((len(self.norms), len(self.alphabet) + 1), dtype=np.uint8)
+        codes = np.fromiter((self.alphabet.get(char, len(self.alphabet)) for char in text), dtype=np.int64,
+                            count=len(text))
+        rows = np.repeat(np.arange(len(self.norms)), self.lengths)
+        cells, counts = np.unique(rows * self.char_counts.shape[1] + codes, return_counts=True)
+        self.char_counts.flat[cells] = np.minimum(counts, 255)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _common_chars(self, query, candidates):
+        """ Returns, for each candidate, an upper bound on the characters (with multiplicity) it has
+        in common with query; exact for the characters with a column of their own """
+        wanted = np.bincount([self.alphabet.get(char, len(self.alphabet)) for char in query],
+                             minlength=self.char_counts.shape[1])
+        columns = np.flatnonzero(wanted)
+        common = np.minimum(self.char_counts[np.ix_(candidates, columns)], wanted[columns])
+        # a saturated count may stand for more
+        over = wanted[columns] > 255
+        common[:, over] = wanted[columns][over]
+        return common.sum(axis=1)
+
+    def search(self, query, limit=5, similarity_threshold=0.85, max_candidates=None):
+        """ Returns up to limit (similarity, position) pairs of the names most similar to query,
+        best first, keeping only names with similarity >= similarity_threshold.
+
+        Gives the same results as scoring every name with SequenceMatcher. Names are only skipped
+        by bounds that hold for any name reaching the threshold: the length of the name, the
+        trigrams it must share with the query (see min_shared_trigrams) and the characters it
+        must share (as in SequenceMatcher.quick_ratio). The rest are scored in order of that
+        bound, until it can no longer beat the limit-th best result.
+
+        query -- the name to look up (normalised here)
+        limit -- the most results to return
+        similarity_threshold -- minimum SequenceMatcher ratio between the normalised names (0-1)
+        max_candidates -- score at most this many names (faster, but may miss matches); default all
+        """
+        query = normalize_artist_name(query)
+        if not query:
+            return []
+        t = similarity_threshold
+        # SequenceMatcher.ratio can't exceed 2 * shorter / total length
+        lo = math.floor(t * len(query) / (2 - t) - 1e-9) if t < 2 else len(query)
+        hi = math.ceil((2 - t) * len(query) / t + 1e-9) if t > 0 else int(self.lengths.max(initial=0))
+        grams = [gram for gram in trigrams(query) if gram in self.postings]
+        # trigrams shared with the query, for every name at once
+        shared = np.bincount(np.concatenate([self.postings[gram] for gram in grams]), minlength=len(self.names)) \
+            if grams else np.zeros(len(self.names), dtype=np.int64)
+        in_range = (self.lengths >= lo) & (self.lengths <= hi)
+        need = int(min_shared_trigrams(len(query) + np.arange(max(lo, 1), hi + 1), t).min())
+        if need > 0:
+            # the bound for the most favourable length rules out most names before the exact one
+            in_range &= shared >= need
+        candidates = np.flatnonzero(in_range)
+        shared = shared[candidates]
+        keep = shared >= min_shared_trigrams(len(query) + self.lengths[candidates], t)
+        candidates, shared = candidates[keep], shared[keep]
+
+        # quick_ratio: the characters in common bound the matching characters
+        totals = len(query) + self.lengths[candidates]
+        chars = self._common_chars(query, candidates)
+        keep = chars >= min_matches(totals, t)
+        candidates, chars, totals, shared = candidates[keep], chars[keep], totals[keep], shared[keep]
+        bound = 2 * chars / totals
+        order = np.lexsort((candidates, -shared, -bound))[:max_candidates]
+
+        matcher = SequenceMatcher(None, query, "")
+        results = []
+        for i, upper in zip(candidates[order], bound[order]):
+            if len(results) >= limit:
+                results.sort(key=lambda result: (-result[0], result[1]))
+                del results[limit:]
+                if upper < results[-1][0]:
+                    break
+            matcher.set_seq2(self.norms[i])
+            similarity = matcher.ratio()
+            if similarity >= t:
+                results.append((similarity, int(i)))
+        results.sort(key=lambda result: (-result[0], result[1]))
+        return results[:limit]
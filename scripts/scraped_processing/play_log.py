@@ -0,0 +1,273 @@
+"""
+A binary, time-indexed copy of the play logs for range queries.
+
+Each source CSV becomes a segment folder of NumPy arrays, sorted by play time:
+
+    utc.npy      int64 epoch seconds of every play
+    local.npy    int64 Europe/Copenhagen wall-clock time of every play, as epoch seconds
+    channel.npy  int16 index into strings.json["channel"]
+    gender.npy   int8  index into strings.json["gender"] (missing genders have an entry too)
+    episode.npy  int32 index into strings.json["episode"], a list of [title, start time]
+
+The arrays are opened memory-mapped, so a query only touches the pages of its time range: the
+range is found with a binary search on utc.npy, and grouped counts are a bincount over the
+codes in that range, instead of parsing and masking every localTime of a table.
+
+Segments are rebuilt only when their CSV changed (size and mtime, as in dataset_store).
+
+    python scripts/scraped_processing/play_log.py data data/store/playlog p3_2024.csv p3_oct_2025.csv
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import LOCAL_TZ, time_column, to_utc
+
+logger = logging.getLogger(__name__)
+
+SOURCES_FILE = "_sources.json"
+STRINGS_FILE = "strings.json"
+ARRAYS = {"utc": np.int64, "local": np.int64, "channel": np.int16, "gender": np.int8, "episode": np.int32}
+# episode title and start time columns of the enriched and the raw scraped format, by time column
+EPISODE_COLUMNS = {"localTime": ("episodeTitle", "episodeStartTime"),
+                   "track_played_time": ("programme_title", "programme_start_time")}
+# number of groups and how to get them from the local time, for time keys of count()
+TIME_KEYS = {
+    "hour": (24, lambda local: local // 3600 % 24),
+    "weekday": (7, lambda local: (local // 86400 + 3) % 7),  # 1970-01-01 was a Thursday
+}
+
+
+def _intern(values):
+    """ Returns (codes, table) for a column; missing values get a code too and are None in the table """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return codes, [None if pd.isna(u) else u for u in uniques]
+
+
+def build_segment(csv_path, segment_dir):
+    """ Reads a play CSV once and writes it as a segment of sorted, integer-coded arrays
+
+    returns the number of plays written
+    """
+    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    tcol = time_column(columns)
+    if tcol is None:
+        raise ValueError(f"{csv_path} has no play-time column")
+    title_col, start_col = EPISODE_COLUMNS[tcol]
+    usecols = [c for c in [tcol, "channel", "gender", title_col, start_col] if c in columns]
+    df = pd.read_csv(csv_path, usecols=usecols)
+
+    utc = pd.to_datetime(df[tcol], utc=True, errors="coerce", format="ISO8601")
+    keep = utc.notna().to_numpy()
+    if not keep.all():
+        logger.warning(f"Skipping {(~keep).sum()} plays of {csv_path} without a valid {tcol}")
+    df, utc = df[keep], utc[keep]
+    order = np.argsort(utc.to_numpy(), kind="stable")
+
+    missing = pd.Series(None, index=df.index, dtype=object)
+    channel, channels = _intern(df["channel"] if "channel" in df else missing)
+    gender, genders = _intern(df["gender"] if "gender" in df else missing)
+    titles = df[title_col] if title_col in df else missing
+    starts = df[start_col] if start_col in df else missing
+    episode, episodes = _intern(titles.astype(str) + "\x1f" + starts.astype(str))
+    episodes = [e.split("\x1f") for e in episodes]
+
+    arrays = {
+        "utc": utc.dt.tz_localize(None).to_numpy().astype("datetime64[s]").astype(np.int64),
+        "local": utc.dt.tz_convert(LOCAL_TZ).dt.tz_localize(None).to_numpy().astype("datetime64[s]").astype(np.int64),
+        "channel": channel,
+        "gender": gender,
+        "episode": episode,
+    }
+    tmp = Path(str(segment_dir) + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, dtype in ARRAYS.items():
+        np.save(tmp / f"{name}.npy", arrays[name][order].astype(dtype))
+    (tmp / STRINGS_FILE).write_text(json.dumps({"channel": channels, "gender": genders, "episode": episodes},
+                                               ensure_ascii=False))
+    shutil.rmtree(segment_dir, ignore_errors=True)
+    os.replace(tmp, segment_dir)
+    return len(order)
+
+
+class Segment:
+    """ The memory-mapped arrays and string tables of one source """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.arrays = {name: np.load(self.path / f"{name}.npy", mmap_mode="r") for name in ARRAYS}
+        self.strings = json.loads((self.path / STRINGS_FILE).read_text())
+
+    def __len__(self):
+        return len(self.arrays["utc"])
+
+    def time_range(self, start=None, end=None):
+        """ Returns the slice of plays in [start, end) (UTC epoch seconds), found by binary search """
+        utc = self.arrays["utc"]
+        lo = 0 if start is None else int(np.searchsorted(utc, start, side="left"))
+        hi = len(utc) if end is None else int(np.searchsorted(utc, end, side="left"))
+        return slice(lo, hi)
+
+    def codes(self, key, values):
+        """ Returns the codes of the given strings of a string table (e.g. the channels starting with "p3") """
+        table = self.strings[key]
+        if key == "channel":
+            prefixes = tuple(v.lower() for v in values)
+            return [i for i, ch in enumerate(table) if ch is not None and ch.lower().startswith(prefixes)]
+        return [i for i, value in enumerate(table) if value in values]
+
+
+class PlayLog:
+    """
+    Play logs as memory-mapped segments, one per source CSV.
+
+    root -- folder of the segments, e.g. data/store/playlog
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._segments = {}
+
+    def sources(self):
+        """ Returns the entries (mtime, size, plays) of the CSV files in the log, by file stem """
+        try:
+            return json.loads((self.root / SOURCES_FILE).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_sources(self, sources):
+        path = self.root / SOURCES_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(sources, indent=1))
+        os.replace(tmp, path)
+
+    def update(self, folder, filenames):
+        """ Builds a segment for every file of filenames (inside folder) that is new or changed, and
+        deletes the segments of files that are no longer in filenames
+
+        returns the names of the files that were (re)built
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        sources = self.sources()
+        keep = {Path(filename).stem for filename in filenames}
+        gone = {stem for stem in sources if stem not in keep}
+        gone |= {path.name for path in self.root.iterdir() if path.is_dir() and path.name not in keep}
+        if gone:
+            logger.info(f"Deleting the play log segments of {', '.join(sorted(gone))}")
+            # the entries go first, so an interrupted update never lists segments that are gone
+            sources = {stem: entry for stem, entry in sources.items() if stem in keep}
+            self._write_sources(sources)
+            for stem in gone:
+                self._segments.pop(stem, None)
+                shutil.rmtree(self.root / stem, ignore_errors=True)
+        updated = []
+        for filename in filenames:
+            stat = (Path(folder) / filename).stat()
+            key = {"mtime": stat.st_mtime, "size": stat.st_size}
+            stem = Path(filename).stem
+            if {k: sources.get(stem, {}).get(k) for k in key} == key:
+                continue
+            logger.info(f"Building the play log segment of {filename}")
+            self._segments.pop(stem, None)
+            plays = build_segment(Path(folder) / filename, self.root / stem)
+            sources[stem] = {**key, "plays": plays}
+            self._write_sources(sources)
+            updated.append(filename)
+        return updated
+
+    def segment(self, source):
+        """ Returns the (cached) memory-mapped Segment of a source CSV name or stem """
+        stem = Path(source).stem
+        if stem not in self._segments:
+            self._segments[stem] = Segment(self.root / stem)
+        return self._segments[stem]
+
+    def count(self, by=(), channels=None, start=None, end=None, genders=None, sources=None):
+        """ Returns the number of plays in a time range, grouped by hour, weekday, gender, channel and/or episode
+
+        by (str or list, optional): -- keys to group by; default none, which returns the total as an int
+        channels (str or list, optional): -- channel prefixes, case-insensitive ("p4" matches P4KBH)
+        start, end (str or Timestamp, optional): -- time range [start, end), local time if naive
+        genders (list, optional): -- only these genders (None for plays without one)
+        sources (list, optional): -- source CSV names (or stems); default all
+
+        returns a Series named plays, indexed by by (hours 0-23, weekdays 0-6 with 0 Monday,
+        strings for gender and channel, (title, start time) for episode), without empty groups
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        if isinstance(channels, str):
+            channels = [channels]
+        start, end = to_utc(start), to_utc(end)
+        start = None if start is None else int(start.timestamp())
+        end = None if end is None else int(end.timestamp())
+        stems = [Path(s).stem for s in sources] if sources is not None else list(self.sources())
+
+        counts = {}
+        total = 0
+        for stem in stems:
+            segment = self.segment(stem)
+            rows = segment.time_range(start, end)
+            mask = None
+            if channels:
+                mask = np.isin(segment.arrays["channel"][rows], segment.codes("channel", channels))
+            if genders is not None:
+                keep = np.isin(segment.arrays["gender"][rows], segment.codes("gender", genders))
+                mask = keep if mask is None else mask & keep
+            if not by:
+                total += int(mask.sum()) if mask is not None else rows.stop - rows.start
+                continue
+
+            # one combined code per play, counted with a single bincount
+            combined, sizes, labels = 0, [], []
+            for key in by:
+                if key in TIME_KEYS:
+                    size, of_local = TIME_KEYS[key]
+                    codes = of_local(segment.arrays["local"][rows])
+                    labels.append(list(range(size)))
+                else:
+                    table = segment.strings[key]
+                    size, codes = len(table), segment.arrays[key][rows]
+                    labels.append([tuple(e) for e in table] if key == "episode" else table)
+                combined = combined * size + codes.astype(np.int64)
+                sizes.append(size)
+            if mask is not None:
+                combined = combined[mask]
+            binned = np.bincount(combined, minlength=int(np.prod(sizes))) if len(combined) else np.zeros(0, int)
+            for flat in np.flatnonzero(binned):
+                label = tuple(labels[i][j] for i, j in enumerate(np.unravel_index(flat, sizes)))
+                counts[label] = counts.get(label, 0) + int(binned[flat])
+        if not by:
+            return total
+        if not counts:
+            return pd.Series([], name="plays", dtype="int64")
+        index = pd.MultiIndex.from_tuples(list(counts), names=by) if len(by) > 1 else \
+            pd.Index([label[0] for label in counts], name=by[0], tupleize_cols=False)
+        return pd.Series(list(counts.values()), index=index, name="plays", dtype="int64").sort_index()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    ap = argparse.ArgumentParser(description="Brings the memory-mapped play log up to date with play CSVs")
+    ap.add_argument("folder", help="Folder with the CSV files")
+    ap.add_argument("root", help="Folder of the play log, e.g. data/store/playlog")
+    ap.add_argument("filenames", nargs="+", help="CSV files to keep in the play log")
+    args = ap.parse_args()
+
+    log = PlayLog(args.root)
+    t0 = time.perf_counter()
+    updated = log.update(args.folder, args.filenames)
+    plays = sum(entry["plays"] for entry in log.sources().values())
+    print(f"built {len(updated)} of {len(args.filenames)} segments in {time.perf_counter() - t0:.2f}s; "
+          f"{plays:,} plays")
+
+
+if __name__ == "__main__":
+    main()
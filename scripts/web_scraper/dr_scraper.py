@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
 # scrapper.py
 import argparse
-import csv
 import json
+import random
 import re
+import sys
+import threading
 import time
-import os
-from typing import Any, Dict, List, Optional, Tuple, Set
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Set
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from pathlib import Path
+from row_writer import RowWriter
+from scrape_cache import HttpCache, ScrapeManifest
+from scrape_metrics import MetricsScope, ScrapeMetrics, export, profiled
 
 BASE = "https://www.dr.dk"
 UA = {"User-Agent": "DR-Playlist-Scraper/1.0 (contact: ahma@itu.dk)"}
@@ -18,21 +26,226 @@ UA = {"User-Agent": "DR-Playlist-Scraper/1.0 (contact: ahma@itu.dk)"}
 
 
 def ts() -> str: return time.strftime("%H:%M:%S")
-def log(msg: str) -> None: print(f"[{ts()}] {msg}", flush=True)
+def log(msg: str) -> None: print(f"[{ts()}] {msg}\n", end="", flush=True)  # one write, so threads don't interleave
 
 # ---------- HTTP ----------
 
 
-def http_get(url: str, timeout: int = 25) -> requests.Response:
-    log(f"GET {url}")
-    r = requests.get(url, headers=UA, timeout=timeout)
-    log(f"→ {r.status_code} ({len(r.content)} bytes)")
+class TokenBucket:
+    """Thread-safe token bucket limiting requests to ``rate`` per second.
+
+    Replaces the old fixed sleep after every request: workers only wait when they
+    would exceed the rate. On 429/5xx the rate is halved (down to ``min_rate``) and
+    any Retry-After is honoured; every success then adds back a small step until
+    ``max_rate`` is reached again (AIMD).
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def backoff(self, retry_after: Optional[float] = None) -> None:
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            # a negative balance makes every worker wait out the penalty
+            penalty = retry_after if retry_after else 1 / self.rate
+            self.tokens = min(self.tokens, 0) - penalty * self.rate
+
+    def success(self) -> None:
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+@dataclass
+class RetryPolicy:
+    """Jittered exponential backoff for transient failures (timeouts, connection errors, 429, 5xx).
+
+    Retry ``n`` (from 0) waits a random time between 0 and ``base * 2**n`` seconds, at most
+    ``cap`` ("full jitter", so workers that failed together do not retry together), or the
+    server's Retry-After if that is longer.
+    """
+    retries: int = 3
+    base: float = 0.5
+    cap: float = 30.0
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        return max(random.uniform(0, min(self.cap, self.base * 2 ** attempt)), retry_after or 0.0)
+
+
+class CircuitBreaker:
+    """Pauses the whole crawl while the origin keeps failing.
+
+    After ``threshold`` transient failures in a row the circuit opens and every request
+    waits ``cooldown`` seconds. Then a single probe request is let through: a success
+    closes the circuit, a failure opens it again for twice as long (up to ``max_cooldown``).
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 5.0, max_cooldown: float = 120.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.delay = cooldown
+        self.failures = 0
+        self.open_until = 0.0  # 0 while closed
+        self.probe_started = 0.0  # set while the half-open probe is out
+        self.opened = 0
+        self.cond = threading.Condition()
+
+    def wait(self) -> bool:
+        """Block while the circuit is open; returns True for the request that is the probe."""
+        with self.cond:
+            while self.open_until:
+                now = time.monotonic()
+                if now < self.open_until:
+                    self.cond.wait(self.open_until - now)
+                elif not self.probe_started or now > self.probe_started + self.delay:
+                    # half-open: this request is the probe (or replaces one that never reported back)
+                    self.probe_started = now
+                    return True
+                else:
+                    self.cond.wait(self.probe_started + self.delay - now)
+            return False
+
+    def success(self, probe: bool = False) -> None:
+        with self.cond:
+            if self.open_until and not probe:
+                return  # a request sent before the circuit opened; only the probe decides
+            self.failures = 0
+            if self.open_until:
+                log("Circuit closed; resuming")
+                self.open_until = 0.0
+                self.probe_started = 0.0
+                self.delay = self.cooldown
+                self.cond.notify_all()
+
+    def failure(self, probe: bool = False) -> None:
+        with self.cond:
+            self.failures += 1
+            if probe:
+                self.delay = min(self.max_cooldown, self.delay * 2)
+            elif self.open_until or self.failures < self.threshold:
+                return
+            self.open_until = time.monotonic() + self.delay
+            self.probe_started = 0.0
+            self.opened += 1
+            log(f"Circuit open after {self.failures} failures in a row; pausing requests for {self.delay:.0f}s")
+            self.cond.notify_all()
+
+
+def retry_after_seconds(r: requests.Response) -> Optional[float]:
+    """Parse a numeric Retry-After header (HTTP-date values are ignored)."""
+    v = r.headers.get("Retry-After")
+    try:
+        return max(0.0, float(v)) if v is not None else None
+    except ValueError:
+        return None
+
+
+def make_session(pool_size: int = 8) -> requests.Session:
+    """One keep-alive connection pool shared by all workers."""
+    s = requests.Session()
+    s.headers.update(UA)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def http_get(url: str, timeout: int = 25, session: Optional[requests.Session] = None,
+             limiter: Optional[TokenBucket] = None, cache: Optional[HttpCache] = None,
+             use_cached: bool = False, scope: Optional[MetricsScope] = None,
+             kind: str = "page", retry: Optional[RetryPolicy] = None,
+             breaker: Optional[CircuitBreaker] = None) -> requests.Response:
+    """GET with optional rate limiting, retries and on-disk caching.
+
+    With a ``cache`` the request is conditional (If-None-Match/If-Modified-Since) and a
+    304 is answered from disk. ``use_cached`` skips the network entirely when the URL
+    is already cached. With a metrics ``scope`` the latency, size and status of the
+    request are recorded under ``kind``. With ``retry``, timeouts, connection errors,
+    429 and 5xx are retried after a jittered backoff; a ``breaker`` shared by the crawl
+    pauses all requests while they keep failing.
+    """
+    cached = cache.get(url) if cache else None
+    if cached and use_cached:
+        log(f"CACHED {url}")
+        if scope:
+            scope.cached(kind)
+        return HttpCache.to_response(url, *cached)
+    headers = {**UA, **HttpCache.conditional_headers(cached[1])} if cached else UA
+    retries = retry.retries if retry else 0
+    for attempt in range(retries + 1):
+        probe = breaker.wait() if breaker else False
+        if limiter:
+            limiter.acquire()
+        log(f"GET {url}")
+        t0 = time.perf_counter()
+        try:
+            r = (session or requests).get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if breaker:
+                breaker.failure(probe)
+            if attempt == retries:
+                raise
+            delay = retry.delay(attempt)
+            log(f"{type(e).__name__} on {url}; retry {attempt + 1}/{retries} in {delay:.1f}s")
+        else:
+            if scope:
+                scope.request(kind, time.perf_counter() - t0, r.status_code, len(r.content))
+            log(f"→ {r.status_code} ({len(r.content)} bytes)")
+            transient = r.status_code == 429 or r.status_code >= 500
+            if limiter:
+                if transient:
+                    limiter.backoff(retry_after_seconds(r))
+                else:
+                    limiter.success()
+            if breaker:
+                if transient:
+                    breaker.failure(probe)
+                else:
+                    breaker.success(probe)
+            if not transient or attempt == retries:
+                break
+            delay = retry.delay(attempt, retry_after_seconds(r))
+            log(f"{r.status_code} on {url}; retry {attempt + 1}/{retries} in {delay:.1f}s")
+        if scope:
+            scope.retry(kind)
+        time.sleep(delay)
+    if r.status_code == 304 and cached:
+        return HttpCache.to_response(url, *cached)
     r.raise_for_status()
+    if cache:
+        cache.put(url, r)
     return r
 
 
-def http_get_json(url: str, timeout: int = 25) -> Dict[str, Any]:
-    r = http_get(url, timeout=timeout)
+def http_get_json(url: str, timeout: int = 25, session: Optional[requests.Session] = None,
+                  limiter: Optional[TokenBucket] = None, cache: Optional[HttpCache] = None,
+                  use_cached: bool = False, scope: Optional[MetricsScope] = None,
+                  kind: str = "episode", retry: Optional[RetryPolicy] = None,
+                  breaker: Optional[CircuitBreaker] = None) -> Dict[str, Any]:
+    r = http_get(url, timeout=timeout, session=session, limiter=limiter, cache=cache,
+                 use_cached=use_cached, scope=scope, kind=kind, retry=retry, breaker=breaker)
     return r.json()
 
 # ---------- HTML/JSON helpers ----------
@@ -55,6 +268,94 @@ def extract_build_id(html: str) -> Optional[str]:
     return m2.group(1) if m2 else None
 
 
+class BuildIdCache:
+    """Remembers the Next.js buildId across the channel/day pages of one crawl.
+
+    Every playlist page references its build under ``/_next/static/{buildId}/``, so a
+    plain substring check tells us whether the cached id is still current. Only when it
+    is missing (first page, or DR deployed mid-crawl) is ``__NEXT_DATA__`` parsed again.
+    """
+
+    def __init__(self) -> None:
+        self.value: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def get(self, html: str, parsed: Optional[str] = None) -> Optional[str]:
+        """Return the current buildId; ``parsed`` is one already read from this page."""
+        with self.lock:
+            if self.value and self.value in html:
+                return self.value
+            self.value = parsed or extract_build_id(html)
+            log(f"Detected buildId: {self.value!r}")
+            return self.value
+
+
+NEXT_DATA_OPEN = re.compile(r'__NEXT_DATA__"\s*type="application/json">')
+
+
+@dataclass
+class PlaylistPage:
+    build_id: Optional[str]
+    slugs: List[str]
+    # episode metadata embedded in the page, by slug (may be empty)
+    episodes: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+def parse_next_data(html: str) -> Optional[Dict[str, Any]]:
+    m = NEXT_DATA_OPEN.search(html)
+    if not m:
+        return None
+    end = html.find("</script>", m.end())
+    try:
+        data = json.loads(html[m.end():end])
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def episodes_from_next_data(data: Dict[str, Any], channel: str, date: str) -> Dict[str, Dict[str, Any]]:
+    """Collect episode objects (anything with a slug and a startTime/productionNumber) and
+    playlist links for this channel/date from the ``__NEXT_DATA__`` tree, in document order."""
+    prefix = f"/lyd/playlister/{channel}/{date}/"
+    episodes: Dict[str, Dict[str, Any]] = {}
+    stack: List[Any] = [data.get("props", data)]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            slug = node.get("slug")
+            if isinstance(slug, str) and slug and ("startTime" in node or "productionNumber" in node):
+                if not episodes.get(slug):
+                    episodes[slug] = node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+        elif isinstance(node, str) and node.startswith(prefix):
+            slug = node[len(prefix):].split("?", 1)[0].split("#", 1)[0].strip("/")
+            if slug and "/" not in slug:
+                episodes.setdefault(slug, {})
+    return episodes
+
+
+def parse_playlist_page(html: str, channel: str, date: str) -> PlaylistPage:
+    """Read buildId, episode slugs and embedded episode metadata in one pass over ``__NEXT_DATA__``.
+
+    Falls back to the static buildManifest path and to BeautifulSoup anchor scanning
+    only for whatever the JSON blob did not provide.
+    """
+    data = parse_next_data(html)
+    build_id = None
+    episodes: Dict[str, Dict[str, Any]] = {}
+    if data:
+        bid = data.get("buildId")
+        if isinstance(bid, str) and bid.strip():
+            build_id = bid
+        episodes = episodes_from_next_data(data, channel, date)
+    if not build_id:
+        build_id = extract_build_id(html)
+    slugs = list(episodes) or find_episode_slugs_from_html(html, channel, date)
+    return PlaylistPage(build_id, slugs, episodes)
+
+
 def find_episode_slugs_from_html(html: str, channel: str, date: str) -> List[str]:
     """Find anchors like /lyd/playlister/{channel}/{date}/{slug} and return unique slugs."""
     soup = BeautifulSoup(html, "html.parser")
@@ -147,76 +448,316 @@ def episode_tracks_to_rows(
     return rows
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--channel", required=True, help="e.g. p3")
-    ap.add_argument("--date", required=True, help="YYYY-MM-DD")
-    ap.add_argument(
-        "--out", help="Output CSV path; default: dr_{channel}_{date}.csv")
-    ap.add_argument("--sleep", type=float, default=0.5,
-                    help="Delay between episode requests")
-    # we might need this delay not to overload the server or get blocked
-    args = ap.parse_args()
+class MissingEpisodes:
+    """Thread-safe record of the episodes whose rows could not be fetched, by channel and date."""
 
-    # derive page URL from channel+date
-    page_url = f"{BASE}/lyd/playlister/{args.channel}/{args.date}/"
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.episodes: Dict[Tuple[str, str], Dict[str, str]] = {}  # (channel, date) -> {slug: error}
 
-    # default to data/<channel>_<date>.csv, unless --out is provided
-    if args.out:
-        out_path = Path(args.out)
-    else:
-        out_path = Path("data") / f"dr_{args.channel}_{args.date}.csv"
+    def add(self, channel: str, date: str, slug: str, error: str) -> None:
+        with self.lock:
+            self.episodes.setdefault((channel, date), {})[slug] = error
+
+    def of_day(self, channel: str, date: str) -> Dict[str, str]:
+        with self.lock:
+            return dict(self.episodes.get((channel, date), {}))
+
+    def clear_day(self, channel: str, date: str) -> None:
+        with self.lock:
+            self.episodes.pop((channel, date), None)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return sum(len(slugs) for slugs in self.episodes.values())
+
+    def report(self) -> List[str]:
+        with self.lock:
+            return [f"{channel} {date} {slug}: {error}"
+                    for (channel, date), slugs in sorted(self.episodes.items()) for slug, error in slugs.items()]
+
+
+class IncompleteDay(Exception):
+    """A channel/day with episodes that failed; raised instead of writing it when complete days are required."""
+
+    def __init__(self, channel: str, date: str, slugs: List[str]):
+        super().__init__(f"{len(slugs)} episode(s) of {channel} {date} failed: {', '.join(slugs)}")
+        self.slugs = slugs
+
+
+def iter_in_order(items: List[Any], fetch: Callable[[int, Any], Any], max_in_flight: int = 1) -> Iterator[Any]:
+    """Run ``fetch(i, item)`` for every item with at most ``max_in_flight`` running at once.
+
+    Results are yielded in the same order as ``items`` regardless of completion order,
+    each as soon as it and everything before it is done.
+    """
+    if max_in_flight <= 1:
+        for i, item in enumerate(items, 1):
+            yield fetch(i, item)
+        return
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        yield from pool.map(fetch, range(1, len(items) + 1), items)
+
+
+def iter_episode_rows(
+    channel: str,
+    date: str,
+    session: Optional[requests.Session] = None,
+    limiter: Optional[TokenBucket] = None,
+    max_in_flight: int = 1,
+    base: str = BASE,
+    build_ids: Optional[BuildIdCache] = None,
+    cache: Optional[HttpCache] = None,
+    manifest: Optional[ScrapeManifest] = None,
+    metrics: Optional[ScrapeMetrics] = None,
+    retry: Optional[RetryPolicy] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    missing: Optional[MissingEpisodes] = None,
+    offline: bool = False,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Scrape every episode of one channel/day, yielding each episode's track rows in slug order.
+
+    Pass a shared ``build_ids`` cache when scraping many pages so the buildId is only
+    detected once per crawl. With ``cache`` and ``manifest``, episodes finished by an
+    earlier run are revalidated with a conditional GET, so only missing and changed ones
+    are downloaded; ``offline`` rebuilds them (and the page, if cached) from disk without
+    asking DR. Episodes finished earlier in this run are never requested again. With
+    ``metrics`` the requests, phase timings and errors of the day are recorded.
+    Episodes that still fail after the ``retry`` policy yield no rows and are added to
+    ``missing``.
+    """
+    scope = metrics.scope(channel, date) if metrics else None
+
+    def phase(name: str, url: str = "") -> Any:
+        return scope.phase(name, url) if scope else nullcontext()
+
+    # derive page URL from channel+date
+    page_url = f"{base}/lyd/playlister/{channel}/{date}/"
 
     log(f"Scraping {page_url}")
     # First we get the main page HTML
-    html = http_get(page_url).text
-
-    # Then we are getting build id which is needed to construct episode JSON URLs
-    build_id = extract_build_id(html)
-    log(f"Detected buildId: {build_id!r}")
+    with phase("page_fetch", page_url):
+        html = http_get(page_url, session=session, limiter=limiter, cache=cache, use_cached=offline,
+                        scope=scope, retry=retry, breaker=breaker).text
+
+    # One pass over __NEXT_DATA__ gives the build id (needed to construct episode JSON URLs)
+    # and the episode slugs, so we can get episode JSONs
+    with phase("slug_parse", page_url):
+        page = parse_playlist_page(html, channel, date)
+    with phase("build_id", page_url):
+        build_id = (build_ids or BuildIdCache()).get(html, page.build_id)
     if not build_id:
         raise RuntimeError(
             "Could not detect Next.js buildId from HTML. Site structure may have changed.")
 
-    # Later we will need episode slugs from the main page HTML so we can get episode JSONs
-    slugs = find_episode_slugs_from_html(html, args.channel, args.date)
+    slugs = page.slugs
     log(f"Found {len(slugs)} episode slugs")
     for i, s in enumerate(slugs[:12], 1):
         log(f"  [{i}] {s}")
 
-    all_rows: List[Dict[str, Any]] = []
-    for i, slug in enumerate(slugs, 1):
-        ep_url = f"{BASE}/lyd/_next/data/{build_id}/da/playlister/{args.channel}/{args.date}/{slug}.json"
+    def fetch_episode(i: int, slug: str) -> List[Dict[str, Any]]:
+        ep_url = f"{base}/lyd/_next/data/{build_id}/da/playlister/{channel}/{date}/{slug}.json"
         try:
-            ep_json = http_get_json(ep_url)
-            pp = page_props(ep_json)
-            ep_meta = pp.get("episode") or {}
-            playlist_points = pp.get(
-                "playlistIndexPoints") or []  # list of tracks
-            programme_description = get_program_description(ep_meta, pp)
-            log(f"[{i}/{len(slugs)}] {ep_meta.get('title')!r} start={ep_meta.get('startTime')} tracks={len(playlist_points)}")
-            rows = episode_tracks_to_rows(args.date, args.channel, ep_meta, playlist_points,
-                                          programme_description, ep_url)
-            all_rows.extend(rows)
+            # DR can still change a finished episode, so it is revalidated unless offline
+            unchanged = manifest is not None and (manifest.is_fresh(channel, date, slug)
+                                                  or offline and manifest.is_done(channel, date, slug))
+            with phase("episode_fetch", ep_url):
+                ep_json = http_get_json(ep_url, session=session, limiter=limiter, cache=cache,
+                                        use_cached=unchanged, scope=scope, retry=retry, breaker=breaker)
+            with phase("row_build", ep_url):
+                pp = page_props(ep_json)
+                # the episode JSON wins; the page only fills in what it lacks
+                ep_meta = {**page.episodes.get(slug, {}), **(pp.get("episode") or {})}
+                playlist_points = pp.get(
+                    "playlistIndexPoints") or []  # list of tracks
+                programme_description = get_program_description(ep_meta, pp)
+                log(f"[{i}/{len(slugs)}] {ep_meta.get('title')!r} start={ep_meta.get('startTime')} tracks={len(playlist_points)}")
+                rows = episode_tracks_to_rows(date, channel, ep_meta, playlist_points,
+                                              programme_description, ep_url)
+            if manifest is not None:
+                manifest.mark(channel, date, slug, len(rows))
+            return rows
         except Exception as e:
-            log(f"ERROR on {ep_url}: {e}")
-        time.sleep(args.sleep)
-
-    # write CSV (Episode JSONs only)
-    headers = [
-        "date", "channel", "programme_title", "programme_slug", "programme_production_number",
-        "programme_start_time", "programme_description",
-        "track_played_time", "track_title", "track_duration_ms", "track_is_classical",
-        "track_description", "track_urn", "artist_names", "artist_names_with_roles", "artist_urns", "source_json"
-    ]
-
-    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=headers)
-        w.writeheader()
-        w.writerows(all_rows)
-
-    log(f"✅ Saved {len(all_rows)} rows → {out_path}")
+            # the metrics (if any) counted it under its phase; the rest of the day goes on
+            log(f"ERROR on {ep_url}: {type(e).__name__}: {e}")
+            if missing is not None:
+                missing.add(channel, date, slug, f"{type(e).__name__}: {e}")
+            return []
+
+    yield from iter_in_order(slugs, fetch_episode, max_in_flight)
+
+
+def scrape_channel_date(channel: str, date: str, **kwargs: Any) -> List[Dict[str, Any]]:
+    """All track rows of one channel/day as a list; see iter_episode_rows for the options."""
+    return [row for rows in iter_episode_rows(channel, date, **kwargs) for row in rows]
+
+
+HEADERS = [
+    "date", "channel", "programme_title", "programme_slug", "programme_production_number",
+    "programme_start_time", "programme_description",
+    "track_played_time", "track_title", "track_duration_ms", "track_is_classical",
+    "track_description", "track_urn", "artist_names", "artist_names_with_roles", "artist_urns", "source_json"
+]
+
+
+DEFAULT_CACHE_DIR = Path("data") / ".scrape_cache"
+
+
+def open_cache(cache_dir: str, no_cache: bool = False,
+               refresh: bool = False) -> Tuple[Optional[HttpCache], Optional[ScrapeManifest]]:
+    """Build the (cache, manifest) pair for the CLI flags of dr_scraper and scrape_all_channels."""
+    if no_cache:
+        return None, None
+    cache = HttpCache(Path(cache_dir))
+    manifest = ScrapeManifest(Path(cache_dir) / "manifest.jsonl", load_done=not refresh)
+    return cache, manifest
+
+
+def add_cache_arguments(ap: argparse.ArgumentParser) -> None:
+    """The cache and manifest flags of dr_scraper and scrape_all_channels."""
+    ap.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR),
+                    help="HTTP cache + manifest of finished episodes")
+    ap.add_argument("--no-cache", action="store_true", help="Always fetch everything from DR")
+    ap.add_argument("--refresh", action="store_true",
+                    help="Ignore the finished episodes in the manifest (days already appended stay "
+                         "recorded); still revalidate cached responses with DR")
+    ap.add_argument("--offline", action="store_true",
+                    help="Rebuild finished episodes and cached pages from the cache without asking DR; "
+                         "changes DR made to them since are missed")
+
+
+def check_cache_arguments(ap: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """Reject --append without the manifest that keeps a rerun from appending a day twice."""
+    if args.append and args.no_cache:
+        ap.error("--append needs the cache: without its manifest a rerun appends the day again")
+
+
+def add_retry_arguments(ap: argparse.ArgumentParser) -> None:
+    """The retry, circuit breaker and deferred-pass flags of dr_scraper and scrape_all_channels."""
+    ap.add_argument("--retries", type=int, default=3,
+                    help="Retries of a request after a timeout, connection error, 429 or 5xx (0 = none)")
+    ap.add_argument("--breaker-threshold", type=int, default=5,
+                    help="Failures in a row that pause all requests (0 = no circuit breaker)")
+    ap.add_argument("--deferred-wait", type=float, default=10.0,
+                    help="Seconds to wait before days with failed episodes are scraped again at the end")
+
+
+def open_retry(retries: int, breaker_threshold: int) -> Tuple[Optional[RetryPolicy], Optional[CircuitBreaker]]:
+    """Build the (retry, breaker) pair for the CLI flags of dr_scraper and scrape_all_channels."""
+    return (RetryPolicy(retries) if retries > 0 else None,
+            CircuitBreaker(breaker_threshold) if breaker_threshold > 0 else None)
+
+
+def default_out_path(channel: str, date: str, append: bool = False) -> Path:
+    """data/dr_{channel}_{date}.csv, or the consolidated data/dr_{channel}.csv when appending."""
+    return Path("data") / (f"dr_{channel}.csv" if append else f"dr_{channel}_{date}.csv")
+
+
+def scrape_to_csv(channel: str, date: str, out_path: Path, append: bool = False,
+                  manifest: Optional[ScrapeManifest] = None, metrics: Optional[ScrapeMetrics] = None,
+                  missing: Optional[MissingEpisodes] = None, complete_only: bool = False,
+                  **kwargs: Any) -> int:
+    """Stream one channel/day to ``out_path`` and return the number of rows written.
+
+    With ``append`` the day is added to a consolidated file; the manifest remembers
+    which days were appended so a rerun does not add them twice. Failed episodes are
+    recorded in ``missing``; with ``complete_only``, and always with ``append``, a day
+    with failed episodes is not written at all and IncompleteDay is raised, so it can be
+    scraped again later (with the cache and manifest, only its failed episodes are
+    requested again). A consolidated file thus only ever gets complete days, once each.
+    """
+    if append and manifest is not None and manifest.is_written(channel, date, out_path):
+        log(f"{channel} {date} is already in {out_path}; skipping")
+        return 0
+    scope = metrics.scope(channel, date) if metrics else None
+    missing = missing if missing is not None else MissingEpisodes()
+    missing.clear_day(channel, date)
+    with RowWriter(out_path, HEADERS, append=append, tag=date if append else "") as writer:
+        for rows in iter_episode_rows(channel, date, manifest=manifest, metrics=metrics, missing=missing,
+                                      **kwargs):
+            with scope.phase("write", str(out_path)) if scope else nullcontext():
+                writer.write(rows)
+            if scope:
+                scope.rows(len(rows))
+        failed = missing.of_day(channel, date)
+        if failed and (complete_only or append):
+            raise IncompleteDay(channel, date, list(failed))  # discards the part file
+    if append and manifest is not None:
+        manifest.mark_written(channel, date, out_path)
+    return writer.rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--channel", required=True, help="e.g. p3")
+    ap.add_argument("--date", required=True, help="YYYY-MM-DD")
+    ap.add_argument(
+        "--out", help="Output CSV path; default: dr_{channel}_{date}.csv (dr_{channel}.csv with --append)")
+    ap.add_argument("--append", action="store_true",
+                    help="Append the day to a consolidated per-channel file instead of writing a new one")
+    ap.add_argument("--max-in-flight", type=int, default=4,
+                    help="Episode requests running concurrently (1 = sequential)")
+    ap.add_argument("--rate", type=float, default=None,
+                    help="Max requests per second across all workers (default: 1/--sleep)")
+    ap.add_argument("--sleep", type=float, default=0.5,
+                    help="Average delay between episode requests; only used to derive --rate")
+    # we might need this delay not to overload the server or get blocked
+    ap.add_argument("--base-url", default=BASE,
+                    help="Origin to scrape, e.g. a local stand-in server")
+    add_cache_arguments(ap)
+    ap.add_argument("--metrics-json", help="Write request metrics and phase timings to this JSON file")
+    ap.add_argument("--metrics-prom", help="Write the metrics as a Prometheus textfile (e.g. for node_exporter)")
+    ap.add_argument("--profile", nargs="?", const="", metavar="STACKS",
+                    help="Sample the run with a profiler and print a report; with a path, also save the "
+                         "collapsed stacks there (for flamegraph.pl/speedscope)")
+    add_retry_arguments(ap)
+    args = ap.parse_args()
+    check_cache_arguments(ap, args)
+
+    # default to data/<channel>_<date>.csv, unless --out is provided
+    if args.out:
+        out_path = Path(args.out)
+    else:
+        out_path = default_out_path(args.channel, args.date, args.append)
+
+    rate = args.rate or (1 / args.sleep if args.sleep > 0 else float("inf"))
+    session = make_session(pool_size=max(1, args.max_in_flight))
+    limiter = TokenBucket(rate) if rate != float("inf") else None
+    cache, manifest = open_cache(args.cache_dir, args.no_cache, args.refresh)
+    metrics = ScrapeMetrics() if args.metrics_json or args.metrics_prom else None
+    retry, breaker = open_retry(args.retries, args.breaker_threshold)
+    missing = MissingEpisodes()
+
+    def scrape(complete_only: bool) -> int:
+        # rows are written as each episode finishes (Episode JSONs only)
+        return scrape_to_csv(args.channel, args.date, out_path, append=args.append, manifest=manifest,
+                             session=session, limiter=limiter, max_in_flight=args.max_in_flight,
+                             base=args.base_url.rstrip("/"), cache=cache, metrics=metrics, retry=retry,
+                             breaker=breaker, missing=missing, complete_only=complete_only,
+                             offline=args.offline)
+
+    try:
+        with profiled(args.profile):
+            try:
+                n_rows = scrape(complete_only=True)
+            except IncompleteDay as e:
+                # the failed episodes are deferred: one more pass once the origin had a break
+                log(f"{e}; trying them again in {args.deferred_wait:.0f}s")
+                time.sleep(args.deferred_wait)
+                try:
+                    n_rows = scrape(complete_only=False)
+                except IncompleteDay:
+                    n_rows = None  # only with --append
+    finally:
+        export(metrics, args.metrics_json, args.metrics_prom)
+
+    if n_rows is None:
+        log(f"{args.channel} {args.date} was not appended to {out_path}; rerun to fetch the missing episodes")
+    else:
+        log(f"✅ Saved {n_rows} rows → {out_path}")
+    if len(missing):
+        log(f"{len(missing)} episode(s) still missing:\n  " + "\n  ".join(missing.report()))
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# row_writer.py
+"""
+Streaming CSV writer for dr_scraper.py output.
+
+Rows go to ``{out}.part`` as soon as an episode is finished, so memory stays flat and the
+final file only appears once the day is complete. On commit the part file either replaces
+``out`` (one file per channel/day) or is appended to a consolidated per-channel file.
+"""
+import csv
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+# Jobs for different days of the same channel may append to the same file.
+_append_locks: Dict[Path, threading.Lock] = {}
+_append_locks_guard = threading.Lock()
+
+
+def _append_lock(path: Path) -> threading.Lock:
+    with _append_locks_guard:
+        return _append_locks.setdefault(path.resolve(), threading.Lock())
+
+
+class RowWriter:
+    """Write rows incrementally and finalise atomically.
+
+    Use as a context manager: the part file is committed when the block exits normally
+    and discarded if it raises. ``tag`` keeps the part files of concurrent writers to the
+    same consolidated file apart (e.g. the date).
+    """
+
+    def __init__(self, out_path: Path, fieldnames: List[str], append: bool = False, tag: str = ""):
+        self.out_path = Path(out_path)
+        self.fieldnames = fieldnames
+        self.append = append
+        self.part_path = self.out_path.with_name(".".join(filter(None, [self.out_path.name, tag, "part"])))
+        self.rows = 0
+        self.lock = threading.Lock()
+        self.out_path.parent.mkdir(parents=True, exist_ok=True)
+        self.f = open(self.part_path, "w", newline="", encoding="utf-8")
+        self.w = csv.DictWriter(self.f, fieldnames=fieldnames)
+        if not append:
+            self.w.writeheader()
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self.lock:
+            for row in rows:
+                self.w.writerow(row)
+                self.rows += 1
+            self.f.flush()
+
+    def commit(self) -> Path:
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        self.f.close()
+        if not self.append:
+            os.replace(self.part_path, self.out_path)
+            return self.out_path
+        with _append_lock(self.out_path):
+            new_file = not self.out_path.exists() or self.out_path.stat().st_size == 0
+            with open(self.out_path, "a+b") as out:
+                start = out.tell()
+                try:
+                    if new_file:
+                        out.write((",".join(self.fieldnames) + "\r\n").encode("utf-8"))
+                    with open(self.part_path, "rb") as part:
+                        shutil.copyfileobj(part, out)
+                    out.flush()
+                    os.fsync(out.fileno())
+                except BaseException:
+                    # never leave half a day behind in the consolidated file
+                    out.truncate(start)
+                    raise
+        os.remove(self.part_path)
+        return self.out_path
+
+    def abort(self) -> None:
+        if not self.f.closed:
+            self.f.close()
+        if self.part_path.exists():
+            os.remove(self.part_path)
+
+    def __enter__(self) -> "RowWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
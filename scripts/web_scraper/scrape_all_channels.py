@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 # run_all_channels.py
 import argparse
-import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 from pathlib import Path
-from datetime import datetime
+
+import dr_scraper
+from scrape_metrics import ScrapeMetrics, export, profiled
 
 # These are channel slugs we found.
 CHANNELS = ["p1", "p2", "p3", "p4aarhus",
@@ -13,52 +18,150 @@ CHANNELS = ["p1", "p2", "p3", "p4aarhus",
             "p4trekanten", "p4vest", "p5", "p6beat", "p8jazz"]
 
 
-def run(cmd: list[str]) -> int:
-    return subprocess.run(cmd, check=False).returncode  # streams output
+@dataclass
+class Job:
+    channel: str
+    date: str
+    out_path: Path
+    rows: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+
+def parse_date(s: str) -> date:
+    return datetime.strptime(s, "%Y-%m-%d").date()
+
+
+def date_range(start: date, end: date) -> list[str]:
+    """All days from start to end, both included, as YYYY-MM-DD."""
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+def run_job(job: Job, session, limiter, build_ids, cache, manifest, max_in_flight: int, base: str,
+            append: bool = False, metrics=None, retry=None, breaker=None, missing=None,
+            complete_only: bool = False, offline: bool = False) -> Job:
+    t0 = time.perf_counter()
+    job.error = ""
+    try:
+        job.rows = dr_scraper.scrape_to_csv(job.channel, job.date, job.out_path, append=append,
+                                            manifest=manifest, session=session, limiter=limiter,
+                                            max_in_flight=max_in_flight, base=base, build_ids=build_ids,
+                                            cache=cache, metrics=metrics, retry=retry, breaker=breaker,
+                                            missing=missing, complete_only=complete_only,
+                                            offline=offline)
+    except Exception as e:
+        job.error = f"{type(e).__name__}: {e}"
+    job.seconds += time.perf_counter() - t0
+    return job
 
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--date", required=True, help="YYYY-MM-DD")
+    ap.add_argument("--date", help="YYYY-MM-DD (shortcut for --from DATE --to DATE)")
+    ap.add_argument("--from", dest="date_from", help="First day to scrape, YYYY-MM-DD")
+    ap.add_argument("--to", dest="date_to", help="Last day to scrape (inclusive); default: --from")
+    ap.add_argument("--channels", nargs="+", default=CHANNELS, help="Subset of channel slugs; default: all")
+    ap.add_argument("--workers", type=int, default=4, help="(channel, date) jobs running at once")
+    ap.add_argument("--max-in-flight", type=int, default=4, help="Concurrent episode requests per job")
+    ap.add_argument("--rate", type=float, default=4.0, help="Max requests per second for the whole crawl")
+    ap.add_argument("--base-url", default=dr_scraper.BASE)
+    dr_scraper.add_cache_arguments(ap)
+    ap.add_argument("--append", action="store_true",
+                    help="Append every day to data/dr_{channel}.csv instead of one file per day")
     ap.add_argument("--stop-on-error", action="store_true")
+    ap.add_argument("--metrics-json", help="Write request metrics and phase timings to this JSON file")
+    ap.add_argument("--metrics-prom", help="Write the metrics as a Prometheus textfile (e.g. for node_exporter)")
+    ap.add_argument("--profile", nargs="?", const="", metavar="STACKS",
+                    help="Sample the crawl with a profiler and print a report; with a path, also save the "
+                         "collapsed stacks there (for flamegraph.pl/speedscope)")
+    dr_scraper.add_retry_arguments(ap)
     args = ap.parse_args()
+    dr_scraper.check_cache_arguments(ap, args)
+
+    # validate dates
+    if args.date and (args.date_from or args.date_to):
+        ap.error("use either --date or --from/--to")
+    first = args.date or args.date_from
+    if not first:
+        ap.error("--date or --from is required")
+    start = parse_date(first)
+    end = parse_date(args.date_to) if args.date_to else start
+    if end < start:
+        ap.error("--to is before --from")
+    unknown = [ch for ch in args.channels if ch not in CHANNELS]
+    if unknown:
+        print(f"Warning: unknown channel slugs {', '.join(unknown)}", file=sys.stderr)
+
+    Path("data").mkdir(parents=True, exist_ok=True)
+    days = date_range(start, end)
+    jobs = [Job(ch, d, dr_scraper.default_out_path(ch, d, args.append)) for d in days for ch in args.channels]
+
+    # one connection pool, one rate limit and one buildId for the whole crawl
+    session = dr_scraper.make_session(pool_size=args.workers * args.max_in_flight)
+    limiter = dr_scraper.TokenBucket(args.rate)
+    build_ids = dr_scraper.BuildIdCache()
+    cache, manifest = dr_scraper.open_cache(args.cache_dir, args.no_cache, args.refresh)
+    metrics = ScrapeMetrics() if args.metrics_json or args.metrics_prom else None
+    # one retry policy and one circuit breaker too, so a degraded origin slows down every worker
+    retry, breaker = dr_scraper.open_retry(args.retries, args.breaker_threshold)
+    missing = dr_scraper.MissingEpisodes()
+
+    def run_pass(pass_jobs: list[Job], complete_only: bool) -> list[Job]:
+        """Run the jobs on the worker pool and return the failed ones."""
+        failed = []
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(run_job, job, session, limiter, build_ids, cache, manifest,
+                                   args.max_in_flight, args.base_url.rstrip("/"), args.append, metrics,
+                                   retry, breaker, missing, complete_only, args.offline)
+                       for job in pass_jobs]
+            for done, fut in enumerate(as_completed(futures), 1):
+                job = fut.result()
+                prefix = f"[{done}/{len(pass_jobs)}] {job.channel} {job.date}"
+                if job.error:
+                    status = "⏳ Deferred" if complete_only and not args.stop_on_error else "❌ Failed"
+                    print(f"{prefix} {status} after {job.seconds:.1f}s: {job.error}")
+                    failed.append(job)
+                    if args.stop_on_error:
+                        for f in futures:
+                            f.cancel()
+                        break
+                else:
+                    print(f"{prefix} ✅ {job.rows} rows in {job.seconds:.1f}s → {job.out_path}")
+        return failed
+
+    print(f"Scraping {len(args.channels)} channels × {len(days)} days = {len(jobs)} jobs "
+          f"({args.workers} workers)\n")
+    t0 = time.perf_counter()
+    with profiled(args.profile):
+        # days with failed episodes are not written in the first pass but scraped once more at the
+        # end; with the cache and manifest only their failed episodes are requested again. With
+        # --append a day still incomplete then is left out, for a rerun to append it whole
+        failures = run_pass(jobs, complete_only=True)
+        if failures and not args.stop_on_error:
+            print(f"\nRetrying {len(failures)} deferred job(s) in {args.deferred_wait:.0f}s\n")
+            time.sleep(args.deferred_wait)
+            failures = run_pass(failures, complete_only=False)
 
-    # validate date
-    datetime.strptime(args.date, "%Y-%m-%d")
-
-    data_dir = Path("data")
-    data_dir.mkdir(parents=True, exist_ok=True)
-    scraper = Path(__file__).with_name("dr_scraper.py")
-    if not scraper.exists():
-        print(
-            f"ERROR: {scraper.name} not found next to this file.", file=sys.stderr)
-        sys.exit(2)
-
-    print(
-        f"Running {scraper.name} for {len(CHANNELS)} channels on {args.date}\n")
-    failures = []
-    for i, ch in enumerate(CHANNELS, 1):
-        out_path = data_dir / f"dr_{ch}_{args.date}.csv"
-        cmd = [
-            sys.executable,  # current Python interpreter
-            "-u",            # unbuffered output
-            str(scraper),
-            "--channel", ch,
-            "--date", args.date,
-            "--out", str(out_path),
-        ]
-        print(f"[{i}/{len(CHANNELS)}] {ch} → {out_path}")
-        rc = run(cmd)
-        if rc != 0:
-            print(f"  ❌ Failed ({rc})")
-            failures.append(ch)
-            if args.stop_on_error:
-                break
-        else:
-            print("  ✅ Done")
+    # --- REPORT ---
+    finished = [job for job in jobs if job.seconds]
+    print(f"\n{'channel':<12} {'date':<10} {'rows':>6} {'seconds':>8}  status")
+    for job in finished:
+        lost = missing.of_day(job.channel, job.date)
+        status = "FAILED" if job.error else f"{len(lost)} episode(s) missing" if lost else "ok"
+        print(f"{job.channel:<12} {job.date:<10} {job.rows:>6} {job.seconds:>8.1f}  {status}")
+    print(f"\n{len(finished)}/{len(jobs)} jobs, {sum(j.rows for j in finished)} rows in "
+          f"{time.perf_counter() - t0:.1f}s")
+    if breaker and breaker.opened:
+        print(f"The circuit breaker paused the crawl {breaker.opened} time(s)")
+    if metrics:
+        print("\n" + "\n".join(metrics.summary()))
+        export(metrics, args.metrics_json, args.metrics_prom)
 
+    if len(missing):
+        print(f"\n{len(missing)} episode(s) still missing:\n  " + "\n  ".join(missing.report()))
     if failures:
-        print(f"\nCompleted with failures in: {', '.join(failures)}")
+        print(f"\nCompleted with failures in: {', '.join(f'{j.channel} {j.date}' for j in failures)}")
+    if failures or len(missing):
         sys.exit(1)
     print("\nAll channels completed successfully.")
 
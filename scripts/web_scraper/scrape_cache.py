@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# scrape_cache.py
+"""
+On-disk HTTP cache and scrape manifest used by dr_scraper.py.
+
+The cache stores every response body next to its ETag/Last-Modified so reruns can send
+conditional requests (a 304 costs no body). The manifest is an append-only JSONL log of
+finished (channel, date, slug) episodes, so a crashed or repeated run only downloads what
+is missing or changed: finished episodes are revalidated with DR (or, offline, served
+straight from the cache) and episodes finished earlier in the same run are not requested
+again.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+import requests
+
+# Episode JSON URLs embed the Next.js buildId, which changes on every DR deploy.
+# The content behind them does not, so the build segment is left out of the cache key.
+BUILD_SEGMENT = re.compile(r"/_next/data/[^/]+/")
+
+
+def cache_key(url: str) -> str:
+    return hashlib.sha256(BUILD_SEGMENT.sub("/_next/data/_/", url).encode()).hexdigest()
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class HttpCache:
+    """Response bodies keyed by URL, with the validators needed for conditional GETs."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root) / "http"
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        key = cache_key(url)
+        folder = self.root / key[:2]
+        return folder / f"{key}.body", folder / f"{key}.json"
+
+    def get(self, url: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            return body_path.read_bytes(), meta
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url: str, r: requests.Response) -> None:
+        body_path, meta_path = self._paths(url)
+        body_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "url": url,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "content_type": r.headers.get("Content-Type"),
+            "fetched_at": time.time(),
+        }
+        # body first: a meta file always points at a complete body
+        write_atomic(body_path, r.content)
+        write_atomic(meta_path, json.dumps(meta).encode())
+
+    @staticmethod
+    def conditional_headers(meta: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    @staticmethod
+    def to_response(url: str, body: bytes, meta: Dict[str, Any]) -> requests.Response:
+        """Wrap a cached body in a Response so callers can use ``.text``/``.json()`` as usual."""
+        r = requests.Response()
+        r.url = url
+        r.status_code = 200
+        r._content = body
+        r.encoding = "utf-8"
+        if meta.get("content_type"):
+            r.headers["Content-Type"] = meta["content_type"]
+        r.headers["X-From-Cache"] = "1"
+        return r
+
+
+class ScrapeManifest:
+    """Append-only record of episodes whose rows were built successfully, and of days
+    already appended to a consolidated per-channel CSV.
+
+    ``load_done=False`` forgets the finished episodes (a forced refresh) but still loads the
+    appended days, so a refresh never appends a day twice. ``fresh`` holds the episodes
+    marked by this process.
+    """
+
+    def __init__(self, path: Path, load_done: bool = True):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.done: Set[Tuple[str, str, str]] = set()
+        self.fresh: Set[Tuple[str, str, str]] = set()
+        self.written: Set[Tuple[str, str, str]] = set()
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        continue  # a torn last line from a crash
+                    if "written" in e:
+                        self.written.add((e["channel"], e["date"], e["written"]))
+                    elif load_done:
+                        self.done.add((e["channel"], e["date"], e["slug"]))
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def is_done(self, channel: str, date: str, slug: str) -> bool:
+        return (channel, date, slug) in self.done
+
+    def is_fresh(self, channel: str, date: str, slug: str) -> bool:
+        return (channel, date, slug) in self.fresh
+
+    def mark(self, channel: str, date: str, slug: str, rows: int) -> None:
+        entry = {"channel": channel, "date": date, "slug": slug, "rows": rows, "at": time.time()}
+        with self.lock:
+            self.fresh.add((channel, date, slug))
+            if (channel, date, slug) in self.done:
+                return
+            self._append(entry)
+            self.done.add((channel, date, slug))
+
+    def is_written(self, channel: str, date: str, out_path: Path) -> bool:
+        return (channel, date, str(out_path)) in self.written
+
+    def mark_written(self, channel: str, date: str, out_path: Path) -> None:
+        with self.lock:
+            self._append({"channel": channel, "date": date, "written": str(out_path), "at": time.time()})
+            self.written.add((channel, date, str(out_path)))
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# scrape_metrics.py
+"""
+Request metrics, per-phase timings and a sampling profiler for dr_scraper.py.
+
+ScrapeMetrics collects, per channel and date:
+
+    requests  latency histogram, bytes, status codes, cache hits and retries, by kind (page/episode)
+    phases    time spent in page_fetch, build_id, slug_parse, episode_fetch, row_build and write
+    errors    exceptions by phase and type, with the first few messages kept as samples
+    rows      rows written
+
+and exports them as JSON or as a Prometheus textfile (for node_exporter's textfile collector).
+The scraper gets a MetricsScope (``metrics.scope(channel, date)``), so nothing has to pass the
+labels around.
+
+SamplingProfiler samples the Python stacks of all scraper threads every few milliseconds, so a
+report shows where a crawl spends its wall-clock time, waiting on sockets and the rate limit
+included, which a tracing profiler (cProfile) would distort with its per-call overhead.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from scrape_cache import write_atomic
+
+# upper bounds (seconds) of the histogram buckets; +Inf is implied
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PHASES = ("page_fetch", "build_id", "slug_parse", "episode_fetch", "row_build", "write")
+MAX_ERROR_SAMPLES = 50
+PREFIX = "dr_scraper"
+
+
+class Histogram:
+    """Counts of observations per bucket, with their sum and maximum (not thread-safe on its own)."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        i = 0
+        while i < len(BUCKETS) and value > BUCKETS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, observations <= le) pairs, as Prometheus buckets are."""
+        total, out = 0, []
+        for bound, n in zip([*map(str, BUCKETS), "+Inf"], self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the maximum for the last bucket)."""
+        if not self.count:
+            return 0.0
+        for (bound, n) in self.cumulative():
+            if n >= q * self.count:
+                return min(float(bound), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "sum": round(self.sum, 6), "max": round(self.max, 6),
+                "p50": round(self.quantile(0.5), 6), "p95": round(self.quantile(0.95), 6),
+                "buckets": dict(self.cumulative())}
+
+
+class RequestStats:
+    def __init__(self) -> None:
+        self.latency = Histogram()
+        self.bytes = 0
+        self.status: Counter = Counter()
+        self.cached = 0
+        self.retries = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"latency": self.latency.to_dict(), "bytes": self.bytes,
+                "status": {str(k): v for k, v in sorted(self.status.items())},
+                "cached": self.cached, "retries": self.retries}
+
+
+class ScrapeMetrics:
+    """Thread-safe metrics of one crawl, labelled by channel and date."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests: Dict[Tuple[str, str, str], RequestStats] = defaultdict(RequestStats)
+        self.phases: Dict[Tuple[str, str, str], Histogram] = defaultdict(Histogram)
+        self.errors: Counter = Counter()  # (channel, date, phase, exception type) -> count
+        self.error_samples: List[Dict[str, str]] = []
+        self.rows: Counter = Counter()  # (channel, date) -> rows written
+
+    def scope(self, channel: str, date: str) -> "MetricsScope":
+        return MetricsScope(self, channel, date)
+
+    # ---------- export ----------
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            channels: Dict[str, Dict[str, Any]] = defaultdict(dict)
+
+            def entry(channel: str, date: str) -> Dict[str, Any]:
+                return channels[channel].setdefault(date, {"requests": {}, "phases": {}, "errors": {}, "rows": 0})
+
+            for (channel, date, kind), stats in sorted(self.requests.items()):
+                entry(channel, date)["requests"][kind] = stats.to_dict()
+            for (channel, date, phase), hist in sorted(self.phases.items()):
+                entry(channel, date)["phases"][phase] = hist.to_dict()
+            for (channel, date, phase, kind), n in sorted(self.errors.items()):
+                entry(channel, date)["errors"].setdefault(phase, {})[kind] = n
+            for (channel, date), n in sorted(self.rows.items()):
+                entry(channel, date)["rows"] = n
+            return {"started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+                    "seconds": round(time.time() - self.started, 3),
+                    "channels": channels, "error_samples": list(self.error_samples)}
+
+    def write_json(self, path: Path) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(Path(path), json.dumps(self.to_dict(), indent=1, ensure_ascii=False).encode())
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        def labels(**kv: Any) -> str:
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in kv.items()) + "}"
+
+        def histogram(name: str, hist: Histogram, **kv: Any) -> List[str]:
+            out = [f"{name}_bucket{labels(**kv, le=le)} {n}" for le, n in hist.cumulative()]
+            return out + [f"{name}_sum{labels(**kv)} {hist.sum:.6f}", f"{name}_count{labels(**kv)} {hist.count}"]
+
+        metric = {
+            "request_seconds": ("histogram", "Latency of HTTP requests to DR"),
+            "response_bytes_total": ("counter", "Bytes of response bodies"),
+            "responses_total": ("counter", "HTTP responses by status code"),
+            "cached_responses_total": ("counter", "Responses served from the cache without a request"),
+            "retries_total": ("counter", "Requests sent again after a failure"),
+            "phase_seconds": ("histogram", "Time spent in each phase of a channel/day"),
+            "errors_total": ("counter", "Exceptions by phase and type"),
+            "rows_total": ("counter", "Track rows written"),
+        }
+        lines: Dict[str, List[str]] = {name: [] for name in metric}
+        with self.lock:
+            for (channel, date, kind), stats in sorted(self.requests.items()):
+                key = dict(channel=channel, date=date, kind=kind)
+                lines["request_seconds"] += histogram(f"{PREFIX}_request_seconds", stats.latency, **key)
+                lines["response_bytes_total"].append(f"{PREFIX}_response_bytes_total{labels(**key)} {stats.bytes}")
+                lines["responses_total"] += [f"{PREFIX}_responses_total{labels(**key, status=status)} {n}"
+                                             for status, n in sorted(stats.status.items())]
+                lines["cached_responses_total"].append(f"{PREFIX}_cached_responses_total{labels(**key)} {stats.cached}")
+                lines["retries_total"].append(f"{PREFIX}_retries_total{labels(**key)} {stats.retries}")
+            for (channel, date, phase), hist in sorted(self.phases.items()):
+                lines["phase_seconds"] += histogram(f"{PREFIX}_phase_seconds", hist,
+                                                    channel=channel, date=date, phase=phase)
+            for (channel, date, phase, kind), n in sorted(self.errors.items()):
+                lines["errors_total"].append(
+                    f"{PREFIX}_errors_total{labels(channel=channel, date=date, phase=phase, type=kind)} {n}")
+            for (channel, date), n in sorted(self.rows.items()):
+                lines["rows_total"].append(f"{PREFIX}_rows_total{labels(channel=channel, date=date)} {n}")
+        out = []
+        for name, (kind, help_text) in metric.items():
+            out += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} {kind}", *lines[name]]
+        return "\n".join(out) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """Write the textfile in one rename, so the collector never reads half a file."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(Path(path), self.to_prometheus().encode())
+
+    def summary(self) -> List[str]:
+        """Report lines: requests by kind and time by phase, summed over channels and dates."""
+        with self.lock:
+            kinds: Dict[str, RequestStats] = defaultdict(RequestStats)
+            for (_, _, kind), stats in self.requests.items():
+                total = kinds[kind]
+                total.latency.count += stats.latency.count
+                total.latency.sum += stats.latency.sum
+                total.latency.max = max(total.latency.max, stats.latency.max)
+                total.latency.counts = [a + b for a, b in zip(total.latency.counts, stats.latency.counts)]
+                total.bytes += stats.bytes
+                total.status.update(stats.status)
+                total.cached += stats.cached
+                total.retries += stats.retries
+            phases: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+            for (_, _, phase), hist in self.phases.items():
+                phases[phase][0] += hist.count
+                phases[phase][1] += hist.sum
+            errors: Counter = Counter()
+            for (_, _, phase, kind), n in self.errors.items():
+                errors[f"{phase} {kind}"] += n
+
+        out = [f"{'requests':<14} {'count':>7} {'cached':>7} {'retries':>7} {'MB':>8} {'p50':>7} {'p95':>7} "
+               f"{'max':>7}  status"]
+        for kind, s in sorted(kinds.items()):
+            status = ", ".join(f"{k}: {v}" for k, v in sorted(s.status.items()))
+            out.append(f"{kind:<14} {s.latency.count:>7} {s.cached:>7} {s.retries:>7} {s.bytes / 1e6:>8.2f} "
+                       f"{s.latency.quantile(0.5):>6.3f}s {s.latency.quantile(0.95):>6.3f}s {s.latency.max:>6.3f}s"
+                       f"  {status}")
+        out.append(f"\n{'phase':<14} {'count':>7} {'seconds':>9}")
+        for phase in PHASES:
+            if phase in phases:
+                n, seconds = phases[phase]
+                out.append(f"{phase:<14} {n:>7} {seconds:>9.2f}")
+        for what, n in sorted(errors.items()):
+            out.append(f"errors in {what}: {n}")
+        return out
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+class MetricsScope:
+    """The metrics of one channel/date, as handed to http_get and iter_episode_rows."""
+
+    def __init__(self, metrics: ScrapeMetrics, channel: str, date: str):
+        self.metrics = metrics
+        self.channel = channel
+        self.date = date
+
+    def request(self, kind: str, seconds: float, status: int, nbytes: int) -> None:
+        with self.metrics.lock:
+            stats = self.metrics.requests[self.channel, self.date, kind]
+            stats.latency.observe(seconds)
+            stats.bytes += nbytes
+            stats.status[status] += 1
+
+    def cached(self, kind: str) -> None:
+        with self.metrics.lock:
+            self.metrics.requests[self.channel, self.date, kind].cached += 1
+
+    def retry(self, kind: str) -> None:
+        with self.metrics.lock:
+            self.metrics.requests[self.channel, self.date, kind].retries += 1
+
+    def rows(self, n: int) -> None:
+        with self.metrics.lock:
+            self.metrics.rows[self.channel, self.date] += n
+
+    @contextmanager
+    def phase(self, name: str, url: str = "") -> Iterator[None]:
+        """Time the block as phase ``name``; an exception leaving it is counted (and re-raised)."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            with self.metrics.lock:
+                self.metrics.errors[self.channel, self.date, name, type(e).__name__] += 1
+                if len(self.metrics.error_samples) < MAX_ERROR_SAMPLES:
+                    self.metrics.error_samples.append({"channel": self.channel, "date": self.date, "phase": name,
+                                                       "type": type(e).__name__, "message": str(e), "url": url})
+            raise
+        finally:
+            seconds = time.perf_counter() - t0
+            with self.metrics.lock:
+                self.metrics.phases[self.channel, self.date, name].observe(seconds)
+
+
+def export(metrics: Optional[ScrapeMetrics], json_path: Optional[str], prom_path: Optional[str]) -> None:
+    """Write the metrics files asked for on the command line."""
+    if metrics is None:
+        return
+    if json_path:
+        metrics.write_json(Path(json_path))
+        print(f"metrics → {json_path}")
+    if prom_path:
+        metrics.write_prometheus(Path(prom_path))
+        print(f"metrics → {prom_path}")
+
+
+# ---------- sampling profiler ----------
+
+
+class SamplingProfiler:
+    """Samples the stacks of all other threads every ``interval`` seconds while active.
+
+    Only stacks with a frame from ``root`` (the scripts folder) are kept, which drops idle
+    pool workers and the profiler itself. Use as a context manager, then ``report()``.
+    """
+
+    def __init__(self, interval: float = 0.005, root: Optional[Path] = None):
+        self.interval = interval
+        self.root = str(root or Path(__file__).resolve().parents[1])
+        self.stacks: Counter = Counter()  # tuple of (file, line, function), outermost first -> samples
+        self.samples = 0
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                ours = False
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    ours = ours or code.co_filename.startswith(self.root)
+                    frame = frame.f_back
+                if ours:
+                    self.stacks[tuple(reversed(stack))] += 1
+                    self.samples += 1
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self._t0
+
+    @staticmethod
+    def _name(func: Tuple[str, int, str]) -> str:
+        filename, line, name = func
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def report(self, top: int = 25) -> str:
+        """Functions by share of samples: self (innermost frame) and total (anywhere on the stack)."""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, n in self.stacks.items():
+            own[stack[-1]] += n
+            for func in set(stack):
+                total[func] += n
+        n = max(self.samples, 1)
+        out = [f"{self.samples} stack samples of busy threads in {self.seconds:.1f}s "
+               f"(every {self.interval * 1000:g}ms, wall-clock)",
+               f"\n{'self':>6} {'total':>6}  function"]
+        out += [f"{own[f] / n:>6.1%} {total[f] / n:>6.1%}  {self._name(f)}" for f, _ in own.most_common(top)]
+        out += [f"\n{'total':>6}  function (top by total)"]
+        out += [f"{c / n:>6.1%}  {self._name(f)}" for f, c in total.most_common(top)]
+        return "\n".join(out)
+
+    def write_collapsed(self, path: Path) -> None:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        lines = [";".join(f[2] for f in stack) + f" {n}" for stack, n in self.stacks.most_common()]
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(Path(path), ("\n".join(lines) + "\n").encode())
+
+
+@contextmanager
+def profiled(profile: Optional[str]) -> Iterator[None]:
+    """``--profile [STACKS]``: profile the block and print the report (and save stacks when a path is given)."""
+    if profile is None:
+        yield
+        return
+    profiler = SamplingProfiler()
+    try:
+        with profiler:
+            yield
+    finally:
+        print("\n" + profiler.report(), file=sys.stderr)
+        if profile:
+            profiler.write_collapsed(Path(profile))
+            print(f"profile stacks → {profile}", file=sys.stderr)
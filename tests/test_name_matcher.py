@@ -0,0 +1,66 @@
+"""
+NameMatcher.search must give the same results as scoring every name with SequenceMatcher,
+on random names and on typos of them.
+"""
+import random
+import sys
+from difflib import SequenceMatcher
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts" / "scraped_processing"))
+
+import name_matcher  # noqa: E402
+from name_matcher import NameMatcher, normalize_artist_name  # noqa: E402
+
+
+def exhaustive(norms, query, threshold, limit):
+    query = normalize_artist_name(query)
+    if not query:
+        return []
+    results = [(SequenceMatcher(None, query, norm).ratio(), i) for i, norm in enumerate(norms)]
+    results = [(similarity, i) for similarity, i in results if similarity >= threshold]
+    results.sort(key=lambda result: (-result[0], result[1]))
+    return results[:limit]
+
+
+def typo(name, alphabet, rnd):
+    chars = list(name)
+    for _ in range(rnd.randint(0, 3)):
+        i = rnd.randrange(len(chars) + 1)
+        kind = rnd.random()
+        if kind < 0.4 and i < len(chars):
+            del chars[i]
+        elif kind < 0.7:
+            chars.insert(i, rnd.choice(alphabet))
+        elif i < len(chars):
+            chars[i] = rnd.choice(alphabet)
+    return "".join(chars)
+
+
+def check_against_exhaustive_scan(alphabet, threshold):
+    rnd = random.Random(f"{alphabet}-{threshold}")
+    names = ["".join(rnd.choice(alphabet + "  ") for _ in range(rnd.randint(3, 16))).strip() or "x"
+             for _ in range(500)]
+    matcher = NameMatcher(names)
+    queries = [typo(rnd.choice(names), alphabet, rnd) for _ in range(80)]
+    matched = 0
+    for query in queries:
+        for limit in (1, 5):
+            expected = exhaustive(matcher.norms, query, threshold, limit)
+            assert matcher.search(query, limit=limit, similarity_threshold=threshold) == expected, query
+            matched += bool(expected)
+    assert matched > 40  # the queries are close enough to the names to test recall
+
+
+@pytest.mark.parametrize("alphabet", ["abcdefghij", "abcdefghijklmnopqrstuvwxyz"])
+@pytest.mark.parametrize("threshold", [0.85, 0.7])
+def test_search_matches_exhaustive_scan(alphabet, threshold):
+    check_against_exhaustive_scan(alphabet, threshold)
+
+
+def test_search_with_shared_character_column(monkeypatch):
+    # most characters end up in the shared column of the character counts
+    monkeypatch.setattr(name_matcher, "ALPHABET_SIZE", 4)
+    check_against_exhaustive_scan("abcdefghijklmnopqrstuvwxyz", 0.7)
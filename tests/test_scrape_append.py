@@ -0,0 +1,49 @@
+"""
+scrape_all_channels.py --append against the DR stand-in with injected 503s: a day whose episodes
+keep failing is left out of the consolidated file, and a rerun appends it, complete and once.
+"""
+import csv
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS / "benchmarks"))
+
+import dr_standin  # noqa: E402
+
+DAYS = ["2025-10-27", "2025-10-28", "2025-10-29"]
+EPISODES, TRACKS = 8, 4
+
+
+def scrape(base, folder):
+    return subprocess.run(
+        [sys.executable, str(SCRIPTS / "web_scraper" / "scrape_all_channels.py"), "--from", DAYS[0],
+         "--to", DAYS[-1], "--channels", "p3", "--append", "--base-url", base, "--rate", "1000",
+         "--retries", "0", "--breaker-threshold", "0", "--deferred-wait", "0"],
+        cwd=folder, capture_output=True, text=True)
+
+
+def rows_per_day(folder):
+    with open(folder / "data" / "dr_p3.csv", encoding="utf-8", newline="") as f:
+        return Counter(row["date"] for row in csv.DictReader(f))
+
+
+def test_append_only_complete_days_once(tmp_path):
+    # with this seed one day loads, but some of its episodes fail in both passes
+    server, base = dr_standin.serve(latency=0, episodes=EPISODES, tracks=TRACKS, error_rate=0.35, seed=5)
+    try:
+        first = scrape(base, tmp_path)
+        assert first.returncode == 1 and "IncompleteDay" in first.stdout, first.stdout
+        days = rows_per_day(tmp_path)
+        assert len(days) < len(DAYS)
+        assert all(n == EPISODES * TRACKS for n in days.values()), days
+
+        server.config["error_rate"] = 0
+        for _ in range(2):  # the second rerun finds every day appended already
+            rerun = scrape(base, tmp_path)
+            assert rerun.returncode == 0, rerun.stdout
+            assert rows_per_day(tmp_path) == {day: EPISODES * TRACKS for day in DAYS}
+    finally:
+        server.shutdown()